@@ -0,0 +1,83 @@
+# benchmarks/bench_clock.py
+"""
+Latencia de INSERT de Equipo con el reloj compartido (utils.clock).
+
+Levanta un servidor HTTP local que tarda SLOW_SECONDS en responder la hora
+(simula worldtimeapi lento/caído) y mide inserts sin `fecha_ingreso`
+explícita. Con el reloj cacheado la latencia no depende de la red.
+
+Uso (desde fastapi_app/):
+    python -m benchmarks.bench_clock [n_inserts] [slow_seconds]
+"""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+N_INSERTS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+SLOW_SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+
+class _SlowTimeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(SLOW_SECONDS)
+        body = json.dumps({"utc_datetime": "2030-01-01T00:00:00+00:00"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = HTTPServer(("127.0.0.1", 0), _SlowTimeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Configurar ENV antes de importar la app
+    os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    os.environ["TIME_SYNC_URL"] = f"http://127.0.0.1:{server.server_port}/"
+
+    from database import Base, engine, SessionLocal
+    import models.client  # noqa: F401  (registrar mappers relacionados)
+    import models.estado_equipo  # noqa: F401
+    import models.historial_reparaciones  # noqa: F401
+    import models.cobros  # noqa: F401
+    from models.equipo import Equipo
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+
+    latencias = []
+    for i in range(N_INSERTS):
+        t0 = time.perf_counter()
+        db.add(Equipo(
+            cliente_id=1,
+            cliente_nombre="Bench",
+            cliente_numero="5550000000",
+            modelo="Bench",
+            fallo="Bench",
+            tipo_clave="NINGUNA",
+        ))
+        db.commit()
+        latencias.append(time.perf_counter() - t0)
+    db.close()
+    server.shutdown()
+
+    latencias.sort()
+    print(json.dumps({
+        "benchmark": "equipo_insert_clock",
+        "n": N_INSERTS,
+        "slow_time_server_s": SLOW_SECONDS,
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 3),
+        "p99_ms": round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 3),
+        "max_ms": round(latencias[-1] * 1000, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
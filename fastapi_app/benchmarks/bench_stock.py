@@ -0,0 +1,149 @@
+# benchmarks/bench_stock.py
+"""
+Ventas concurrentes sobre el mismo producto (crud.detalle_cobro).
+
+Muchos hilos compran a la vez el mismo SKU con stock limitado. Al final
+se comprueba que no hubo sobreventa (ventas exitosas == stock inicial,
+stock final == 0, sin filas de más en detalle_cobros) y se cuentan las
+sentencias SQL por carrito, que no deben depender del número de líneas.
+
+Uso (desde fastapi_app/):
+    python -m benchmarks.bench_stock [hilos] [compras_por_hilo] [stock]
+
+Por defecto usa un SQLite temporal; exporta DATABASE_URL para medir
+contra Postgres.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+
+HILOS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+COMPRAS_POR_HILO = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+STOCK = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+
+def main():
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp.name}/bench_stock.db")
+    # solo usa el engine síncrono: el async se queda con el mínimo
+    os.environ.setdefault("DB_POOL_SIZE", str(HILOS + 1))
+    os.environ.setdefault("DB_ASYNC_POOL_SIZE", "1")
+
+    from sqlalchemy import func, select
+    from database import Base, engine, SessionLocal
+    import models.cobros  # noqa: F401  (registrar mappers relacionados)
+    from models.categoria import Categoria
+    from models.productos import Producto
+    from models.detalle_cobro import DetalleCobro
+    from crud.detalle_cobro import crear_detalles_cobro
+    from services import query_guard
+
+    Base.metadata.create_all(bind=engine)
+
+    with SessionLocal() as db:
+        categoria = Categoria(nombre=f"Bench {time.time()}")
+        db.add(categoria)
+        db.flush()
+        sku = Producto(nombre="SKU disputado", categoria_id=categoria.id, precio_venta=10.0, stock_actual=STOCK)
+        extras = [
+            Producto(nombre=f"Extra {i}", categoria_id=categoria.id, precio_venta=1.0, stock_actual=10 ** 6)
+            for i in range(10)
+        ]
+        db.add(sku)
+        db.add_all(extras)
+        db.commit()
+        sku_id = sku.id
+        extra_ids = [p.id for p in extras]
+        detalles_antes = db.scalar(select(func.count()).select_from(DetalleCobro))
+
+    # ---- sentencias por carrito (1 línea vs 10 líneas) ----
+    def _sentencias(carrito):
+        with query_guard.track("carrito") as rec:
+            with SessionLocal() as db:
+                crear_detalles_cobro(db, carrito)
+        return rec.statements
+
+    sentencias_1 = _sentencias([{"producto_id": extra_ids[0], "cantidad": 1}])
+    sentencias_10 = _sentencias([{"producto_id": pid, "cantidad": 1} for pid in extra_ids])
+
+    # ---- contención sobre el mismo SKU ----
+    exitos = []
+    rechazos = []
+    errores = []
+    lock = threading.Lock()
+    barrera = threading.Barrier(HILOS)
+
+    def _comprador():
+        barrera.wait()
+        for _ in range(COMPRAS_POR_HILO):
+            with SessionLocal() as db:
+                t0 = time.perf_counter()
+                try:
+                    crear_detalles_cobro(db, [
+                        {"producto_id": sku_id, "cantidad": 1},
+                        {"producto_id": extra_ids[0], "cantidad": 1},
+                    ])
+                except Exception as exc:
+                    with lock:
+                        if "Stock insuficiente" in str(exc):
+                            rechazos.append(str(exc))
+                        else:
+                            errores.append(str(exc))
+                    continue
+                with lock:
+                    exitos.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    hilos = [threading.Thread(target=_comprador) for _ in range(HILOS)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    elapsed = time.perf_counter() - t0
+
+    with SessionLocal() as db:
+        stock_final = db.scalar(select(Producto.stock_actual).where(Producto.id == sku_id))
+        vendidos_bd = db.scalar(
+            select(func.coalesce(func.sum(DetalleCobro.cantidad), 0)).where(DetalleCobro.producto_id == sku_id)
+        )
+        detalles_despues = db.scalar(select(func.count()).select_from(DetalleCobro))
+
+    intentos = HILOS * COMPRAS_POR_HILO
+    esperados = min(STOCK, intentos)
+    latencias = sorted(exitos)
+    resultado = {
+        "benchmark": "detalle_cobro_contention",
+        "backend": engine.url.get_backend_name(),
+        "threads": HILOS,
+        "attempts": intentos,
+        "initial_stock": STOCK,
+        "sold": len(exitos),
+        "rejected_no_stock": len(rechazos),
+        "errors": len(errores),
+        "final_stock": stock_final,
+        "sold_rows_in_db": vendidos_bd,
+        "detail_rows_inserted": detalles_despues - detalles_antes,
+        "oversold": stock_final < 0 or vendidos_bd > STOCK,
+        "statements_per_cart_1_line": sentencias_1,
+        "statements_per_cart_10_lines": sentencias_10,
+        "seconds": round(elapsed, 4),
+        "checkouts_per_second": round(intentos / elapsed, 2),
+        "p50_ms": round(latencias[len(latencias) // 2] * 1000, 3) if latencias else None,
+    }
+    print(json.dumps(resultado, indent=2))
+    if errores:
+        print("Primer error:", errores[0], file=sys.stderr)
+
+    engine.dispose()
+    tmp.cleanup()
+
+    ok = (not resultado["oversold"] and not errores and len(exitos) == esperados
+          and vendidos_bd == esperados and sentencias_1 == sentencias_10)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_tickets.py
+"""
+Tickets por segundo de los generadores PDF.
+
+Uso (desde fastapi_app/):
+    python -m benchmarks.bench_tickets [n_tickets]
+
+Escribe en un directorio temporal y usa static/logo.png para medir
+también el costo del logo.
+"""
+import sys
+import json
+import time
+import tempfile
+
+from utils.tickets import generar_ticket_venta_multiple
+from utils.ticket import generar_ticket_ingreso_reparacion
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+LOGO = "static/logo.png"
+
+DETALLES = [
+    {"producto": f"Producto de prueba con nombre largo número {i}", "cantidad": i % 3 + 1,
+     "precio_venta": 99.5, "subtotal": 99.5 * (i % 3 + 1)}
+    for i in range(12)
+]
+
+
+def _bench(nombre, fn, n):
+    fn()  # calentar cachés (logo, fuentes)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - t0
+    return {"benchmark": nombre, "n": n, "seconds": round(elapsed, 4),
+            "tickets_per_second": round(n / elapsed, 2), "ms_per_ticket": round(elapsed / n * 1000, 3)}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        resultados = [
+            _bench("generar_ticket_venta_multiple", lambda: generar_ticket_venta_multiple(
+                detalles=DETALLES, total=1500.0, tipo_pago="Efectivo",
+                monto_recibido=2000.0, cambio=500.0, path=tmp, logo_path=LOGO,
+            ), N),
+            _bench("generar_ticket_ingreso_reparacion", lambda: generar_ticket_ingreso_reparacion(
+                cliente_nombre="José Pérez", contacto="5551234567", articulo="Celular",
+                modelo="Galaxy S21", serie="356789012345678",
+                falla_descripcion="No enciende después de caída, pantalla estrellada y botón de volumen suelto",
+                observaciones="Trae funda", anticipo=200.0, total=950.0, tipo_pago="Efectivo",
+                path=tmp, logo_path=LOGO, equipo_id=42,
+            ), N),
+        ]
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
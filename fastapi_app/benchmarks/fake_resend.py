@@ -0,0 +1,89 @@
+# benchmarks/fake_resend.py
+"""
+Servidor Resend falso para probar el outbox de correos en local.
+
+    python -m benchmarks.fake_resend [puerto] [tasa_fallos]
+
+y arrancar la API con:
+    RESEND_API_KEY=test RESEND_API_URL=http://127.0.0.1:<puerto>/emails
+
+Acepta POST /emails; con `tasa_fallos` (0..1) responde 503 al azar para
+ejercitar los reintentos. GET /emails devuelve los correos recibidos.
+
+Desde tests: `serve(0)` (puerto libre), `responder(503, 422)` fija los
+códigos de los próximos POST y `recibidos()` / `reset()` inspeccionan.
+"""
+import sys
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = 8025
+FAIL_RATE = 0.0  # la línea de comandos lo cambia (ver __main__)
+
+_recibidos = []
+_forzados = []  # códigos de error para los próximos POST (ver responder)
+_lock = threading.Lock()
+
+
+def responder(*codigos: int) -> None:
+    with _lock:
+        _forzados.extend(codigos)
+
+
+def recibidos() -> list:
+    with _lock:
+        return list(_recibidos)
+
+
+def reset() -> None:
+    with _lock:
+        _recibidos.clear()
+        _forzados.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with _lock:
+            forzado = _forzados.pop(0) if _forzados else None
+        if forzado is not None:
+            return self._json(forzado, {"message": "forzado"})
+        if random.random() < FAIL_RATE:
+            return self._json(503, {"message": "unavailable"})
+        with _lock:
+            _recibidos.append(payload)
+            email_id = len(_recibidos)
+        self._json(200, {"id": f"fake-{email_id}"})
+
+    def do_GET(self):
+        with _lock:
+            self._json(200, {"count": len(_recibidos), "emails": _recibidos})
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int = PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    PORT = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    FAIL_RATE = float(sys.argv[2]) if len(sys.argv) > 2 else FAIL_RATE
+    print(f"Fake Resend en http://127.0.0.1:{PORT}/emails (fallos={FAIL_RATE})")
+    ThreadingHTTPServer(("127.0.0.1", PORT), _Handler).serve_forever()
@@ -0,0 +1,166 @@
+# benchmarks/fake_s3.py
+"""
+S3 falso (estilo MinIO, path-style) para probar services.storage en local.
+
+    python -m benchmarks.fake_s3 [puerto]
+
+y arrancar la API con:
+    STORAGE_BACKEND=s3 STORAGE_S3_ENDPOINT=http://127.0.0.1:<puerto> \
+    STORAGE_S3_BUCKET=technicell AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x
+
+Soporta lo que usa services.storage: PUT/GET/HEAD/DELETE de objetos
+(con metadatos x-amz-meta-*) y subidas multipart. No valida firmas.
+Los objetos viven en memoria; GET /_stats devuelve conteos de operaciones.
+"""
+import sys
+import json
+import uuid
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 9000
+
+_objetos = {}   # (bucket, key) -> (body, headers)
+_multipart = {}  # upload_id -> {part_number: bytes}
+_stats = {"PUT": 0, "GET": 0, "HEAD": 0, "DELETE": 0, "bytes_in": 0}
+_lock = threading.Lock()
+
+
+def _decode_aws_chunked(raw: bytes) -> bytes:
+    """Cuerpo 'aws-chunked' (tamaño-hex;chunk-signature=...\\r\\n datos \\r\\n ... 0)."""
+    out = bytearray()
+    pos = 0
+    while True:
+        fin = raw.index(b"\r\n", pos)
+        size = int(raw[pos:fin].split(b";")[0], 16)
+        pos = fin + 2
+        if size == 0:
+            return bytes(out)
+        out += raw[pos:pos + size]
+        pos += size + 2
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _ruta(self):
+        partes = urlsplit(self.path)
+        bucket, _, key = unquote(partes.path).lstrip("/").partition("/")
+        return bucket, key, parse_qs(partes.query, keep_blank_values=True)
+
+    def _leer_cuerpo(self) -> bytes:
+        if "chunked" in self.headers.get("Transfer-Encoding", ""):
+            raw = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b""):
+                        pass  # trailers
+                    break
+                raw += self.rfile.read(size)
+                self.rfile.readline()
+            raw = bytes(raw)
+        else:
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+            raw = _decode_aws_chunked(raw)
+        return raw
+
+    def _responder(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _no_existe(self):
+        self._responder(404, b"<Error><Code>NoSuchKey</Code></Error>", {"Content-Type": "application/xml"})
+
+    def do_PUT(self):
+        bucket, key, qs = self._ruta()
+        body = self._leer_cuerpo()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        with _lock:
+            _stats["PUT"] += 1
+            _stats["bytes_in"] += len(body)
+            if "uploadId" in qs:
+                _multipart[qs["uploadId"][0]][int(qs["partNumber"][0])] = body
+            else:
+                headers = {k: v for k, v in self.headers.items() if k.lower().startswith("x-amz-meta-")}
+                headers["Content-Type"] = self.headers.get("Content-Type", "application/octet-stream")
+                headers["ETag"] = etag
+                _objetos[(bucket, key)] = (body, headers)
+        self._responder(200, headers={"ETag": etag})
+
+    def do_POST(self):
+        bucket, key, qs = self._ruta()
+        self._leer_cuerpo()
+        if "uploads" in qs:
+            upload_id = uuid.uuid4().hex
+            with _lock:
+                _multipart[upload_id] = {}
+                _multipart[upload_id + ":meta"] = {
+                    k: v for k, v in self.headers.items() if k.lower().startswith("x-amz-meta-")
+                }
+                _multipart[upload_id + ":meta"]["Content-Type"] = self.headers.get("Content-Type", "application/octet-stream")
+            xml = (f"<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>"
+                   f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>")
+            return self._responder(200, xml.encode(), {"Content-Type": "application/xml"})
+        if "uploadId" in qs:
+            upload_id = qs["uploadId"][0]
+            with _lock:
+                partes = _multipart.pop(upload_id)
+                headers = _multipart.pop(upload_id + ":meta")
+                body = b"".join(partes[n] for n in sorted(partes))
+                headers["ETag"] = '"' + hashlib.md5(body).hexdigest() + '-' + str(len(partes)) + '"'
+                _objetos[(bucket, key)] = (body, headers)
+            xml = (f"<CompleteMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>"
+                   f"<ETag>{headers['ETag']}</ETag></CompleteMultipartUploadResult>")
+            return self._responder(200, xml.encode(), {"Content-Type": "application/xml"})
+        self._responder(400)
+
+    def do_GET(self):
+        bucket, key, _ = self._ruta()
+        if bucket == "_stats":
+            with _lock:
+                body = json.dumps({**_stats, "objects": len(_objetos)}).encode()
+            return self._responder(200, body, {"Content-Type": "application/json"})
+        with _lock:
+            _stats[self.command] += 1
+            obj = _objetos.get((bucket, key))
+        if obj is None:
+            return self._no_existe()
+        body, headers = obj
+        self._responder(200, body, headers)
+
+    do_HEAD = do_GET
+
+    def do_DELETE(self):
+        bucket, key, _ = self._ruta()
+        with _lock:
+            _stats["DELETE"] += 1
+            _objetos.pop((bucket, key), None)
+        self._responder(204)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int = PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "objects": len(_objetos)}
+
+
+if __name__ == "__main__":
+    print(f"Fake S3 en http://127.0.0.1:{PORT} (path-style, sin firmas)")
+    ThreadingHTTPServer(("127.0.0.1", PORT), _Handler).serve_forever()
@@ -0,0 +1,255 @@
+# benchmarks/seed.py
+"""
+Datos sintéticos realistas para benchmarks.
+
+Clientes con nombres y teléfonos mexicanos, equipos en todos los
+VALID_ESTADOS (con su historial en estados_equipo), categorías, productos,
+cobros y detalles de venta. Todo se genera con una semilla fija: la misma
+escala produce los mismos datos (solo cambian los prefijos de teléfono,
+IMEI y SKU, para poder sembrar dos veces la misma BD) y los resultados
+de dos corridas son comparables.
+
+Uso (desde fastapi_app/):
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed [escala]
+    DATABASE_URL=postgresql://... python -m benchmarks.seed 10
+
+Escala 1 ≈ 500 clientes, 1 000 equipos, 300 productos, 2 000 cobros y
+5 000 detalles; todo crece linealmente.
+"""
+import os
+import sys
+import json
+import time
+import random
+from datetime import datetime, timedelta, timezone
+
+SEED = 20240601
+BASE = {"clientes": 500, "equipos": 1000, "productos": 300, "cobros": 2000, "detalles": 5000}
+LOTE = 2000
+
+NOMBRES = [
+    "José", "María", "Juan", "Guadalupe", "Luis", "Ana", "Carlos", "Sofía", "Jorge", "Fernanda",
+    "Miguel Ángel", "Verónica", "Alejandro", "Mónica", "Ramón", "Lucía", "Héctor", "Valeria",
+    "Raúl", "Adriana", "Andrés", "Ximena", "Iván", "Rocío", "Óscar", "Beatriz", "Sebastián", "Inés",
+]
+APELLIDOS = [
+    "Hernández", "García", "Martínez", "López", "González", "Pérez", "Rodríguez", "Sánchez",
+    "Ramírez", "Cruz", "Flores", "Gómez", "Morales", "Vázquez", "Jiménez", "Reyes", "Díaz",
+    "Torres", "Gutiérrez", "Ruiz", "Mendoza", "Aguilar", "Ortiz", "Núñez", "Muñoz", "Domínguez",
+]
+DOMINIOS = ["gmail.com", "hotmail.com", "outlook.com", "yahoo.com.mx"]
+
+MODELOS = {
+    "Samsung": ["Galaxy A14", "Galaxy A54", "Galaxy S21", "Galaxy S23 Ultra", "Galaxy Note 10"],
+    "Apple": ["iPhone 11", "iPhone 12 Pro", "iPhone 13", "iPhone 14 Pro Max", "iPhone SE"],
+    "Motorola": ["Moto G32", "Moto G84", "Edge 40", "Moto E13"],
+    "Xiaomi": ["Redmi Note 12", "Redmi 13C", "Poco X5 Pro", "Mi 11 Lite"],
+    "Huawei": ["P30 Lite", "Y9 2019", "Nova 9"],
+    "OPPO": ["A78", "Reno 8"],
+}
+FALLAS = [
+    "Pantalla estrellada, táctil no responde en la parte inferior",
+    "No enciende después de caída al agua",
+    "No carga, el centro de carga está flojo",
+    "Batería se descarga muy rápido y se calienta",
+    "Bocina no suena en llamadas",
+    "Cámara trasera desenfocada",
+    "Se reinicia solo al abrir WhatsApp",
+    "Olvidó el patrón de desbloqueo",
+    "Botón de encendido hundido",
+    "No reconoce la SIM",
+]
+ARTICULOS = ["Funda", "Cargador", "Mica", "Chip", "Memoria SD", "Caja"]
+TIPOS_CLAVE = ["PIN", "Patrón", "Contraseña"]
+
+CATEGORIAS = {
+    "Fundas": ["Funda uso rudo", "Funda transparente", "Funda cartera", "Funda silicón"],
+    "Micas": ["Mica cristal templado 9D", "Mica privacidad", "Mica hidrogel"],
+    "Cargadores": ["Cargador carga rápida 25W", "Cargador USB-C 20W", "Cargador inalámbrico", "Cable USB-C 1m", "Cable Lightning 2m"],
+    "Audio": ["Audífonos Bluetooth", "Audífonos manos libres", "Bocina portátil"],
+    "Refacciones": ["Pantalla OLED", "Batería original", "Centro de carga", "Flex de encendido", "Tapa trasera"],
+    "Accesorios": ["Soporte para auto", "Anillo magnético", "Power bank 10000 mAh", "Memoria microSD 64GB"],
+}
+MARCAS_ACCESORIO = ["Samsung", "iPhone", "Motorola", "Xiaomi", "Universal"]
+
+
+def _escalar(escala: float) -> dict:
+    return {k: max(1, int(v * escala)) for k, v in BASE.items()}
+
+
+def _insertar(db, model, filas) -> None:
+    from sqlalchemy import insert
+
+    for i in range(0, len(filas), LOTE):
+        db.execute(insert(model), filas[i:i + LOTE])
+
+
+def seed(db, escala: float = 1.0, seed: int = SEED) -> dict:
+    """
+    Inserta los datos en la sesión `db` (con inserts por lotes) y hace commit.
+    Devuelve los conteos y los ids útiles para los benchmarks.
+    """
+    from models.client import Cliente
+    from models.equipo import Equipo
+    from models.estado_equipo import EstadoEquipo
+    from models.categoria import Categoria
+    from models.productos import Producto
+    from models.cobros import Cobro, MetodoPagoEnum
+    from models.detalle_cobro import DetalleCobro
+    from crud.equipos import VALID_ESTADOS
+    from services.search import normalizar
+
+    rng = random.Random(seed)
+    n = _escalar(escala)
+    ahora = datetime.now(timezone.utc)
+    # prefijo por corrida: evita chocar con UNIQUE al sembrar dos veces
+    corrida = f"{int(time.time()) % 100000:05d}"
+
+    # ---- clientes ----
+    clientes = []
+    for i in range(n["clientes"]):
+        nombre = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+        correo = None
+        if rng.random() < 0.6:
+            usuario = normalizar(nombre).replace(" ", ".")
+            correo = f"{usuario}{rng.randint(1, 99)}@{rng.choice(DOMINIOS)}"
+        clientes.append({
+            "nombre_completo": nombre,
+            "telefono": f"55{corrida}{i:06d}",
+            "correo": correo,
+            "nombre_busqueda": normalizar(nombre),
+        })
+    _insertar(db, Cliente, clientes)
+    db.flush()
+    cliente_rows = db.query(Cliente.id, Cliente.nombre_completo, Cliente.telefono, Cliente.correo) \
+        .filter(Cliente.telefono.like(f"55{corrida}%")).order_by(Cliente.id).all()
+
+    # ---- equipos (todos los estados, fechas en los últimos 365 días) ----
+    equipos = []
+    for i in range(n["equipos"]):
+        cli = rng.choice(cliente_rows)
+        marca = rng.choice(list(MODELOS))
+        estado = VALID_ESTADOS[i % len(VALID_ESTADOS)]
+        ingreso = ahora - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        equipos.append({
+            "cliente_id": cli.id,
+            "cliente_nombre": cli.nombre_completo,
+            "cliente_numero": cli.telefono,
+            "cliente_correo": cli.correo,
+            "cliente_nombre_busqueda": normalizar(cli.nombre_completo),
+            "marca": marca,
+            "modelo": rng.choice(MODELOS[marca]),
+            "fallo": rng.choice(FALLAS),
+            "observaciones": rng.choice([None, "Trae golpe en esquina", "Cliente pide respaldo", "Urgente"]),
+            "tipo_clave": rng.choice(TIPOS_CLAVE),
+            "clave_bloqueo": str(rng.randint(1000, 999999)),
+            "articulos_entregados": rng.sample(ARTICULOS, rng.randint(0, 3)),
+            "estado": estado,
+            "imei": f"35{corrida}{i:08d}",
+            "fecha_ingreso": ingreso,
+            "fecha_entrega": ingreso + timedelta(days=rng.randint(1, 10)) if estado == "entregado" else None,
+            "archived": estado in ("entregado", "cancelado") and rng.random() < 0.5,
+        })
+    _insertar(db, Equipo, equipos)
+    db.flush()
+    equipo_rows = db.query(Equipo.id, Equipo.cliente_id, Equipo.estado, Equipo.fecha_ingreso) \
+        .filter(Equipo.imei.like(f"35{corrida}%")).order_by(Equipo.id).all()
+
+    _insertar(db, EstadoEquipo, [
+        {"equipo_id": e.id, "estado": e.estado, "fecha_inicio": e.fecha_ingreso, "observaciones": None}
+        for e in equipo_rows
+    ])
+
+    # ---- categorías y productos ----
+    categoria_ids = {}
+    for nombre in CATEGORIAS:
+        cat = Categoria(nombre=f"{nombre} {corrida}", descripcion=f"Categoría {nombre.lower()}")
+        db.add(cat)
+        db.flush()
+        categoria_ids[nombre] = cat.id
+
+    productos = []
+    for i in range(n["productos"]):
+        categoria = rng.choice(list(CATEGORIAS))
+        nombre = f"{rng.choice(CATEGORIAS[categoria])} {rng.choice(MARCAS_ACCESORIO)}"
+        descripcion = rng.choice([None, "Compatible con varios modelos", "Garantía 30 días", "Original"])
+        codigo = f"SKU-{corrida}-{i:06d}"
+        productos.append({
+            "nombre": nombre,
+            "descripcion": descripcion,
+            "categoria_id": categoria_ids[categoria],
+            "codigo": codigo,
+            "precio_venta": round(rng.uniform(49, 2500), 2),
+            "stock_actual": rng.randint(0, 200),
+            "stock_minimo": 5,
+            "activo": True,
+            "busqueda": normalizar(" ".join(x for x in (nombre, descripcion, codigo) if x)),
+        })
+    _insertar(db, Producto, productos)
+    db.flush()
+    producto_rows = db.query(Producto.id, Producto.precio_venta) \
+        .filter(Producto.codigo.like(f"SKU-{corrida}-%")).order_by(Producto.id).all()
+
+    # ---- cobros y detalles ----
+    metodos = list(MetodoPagoEnum)
+    cobros = []
+    for _ in range(n["cobros"]):
+        e = rng.choice(equipo_rows)
+        total = round(rng.uniform(150, 4500), 2)
+        anticipo = round(total * rng.choice([0, 0.25, 0.5, 1]), 2)
+        cobros.append({
+            "cliente_id": e.cliente_id,
+            "equipo_id": e.id,
+            "monto_total": total,
+            "anticipo": anticipo,
+            "saldo_pendiente": round(total - anticipo, 2),
+            "fecha_pago": (e.fecha_ingreso + timedelta(days=rng.randint(0, 7))).replace(tzinfo=None),
+            "metodo_pago": rng.choice(metodos),
+        })
+    _insertar(db, Cobro, cobros)
+
+    detalles = []
+    for _ in range(n["detalles"]):
+        p = rng.choice(producto_rows)
+        cantidad = rng.choices([1, 2, 3, 5], weights=[70, 20, 8, 2])[0]
+        detalles.append({"producto_id": p.id, "cantidad": cantidad, "subtotal": round(p.precio_venta * cantidad, 2)})
+    _insertar(db, DetalleCobro, detalles)
+
+    # los inserts masivos no disparan los eventos de services.kpi
+    from services import kpi
+
+    kpi.reconstruir(db.connection())
+    db.commit()
+
+    return {
+        "scale": escala,
+        "counts": {**n, "estados_equipo": len(equipo_rows), "categorias": len(categoria_ids)},
+        "producto_ids": [p.id for p in producto_rows],
+        "equipo_ids": [e.id for e in equipo_rows],
+    }
+
+
+def preparar_esquema(engine) -> None:
+    """Tablas, columnas de búsqueda e índices: el mismo paso que migrate.py."""
+    import migrate
+
+    migrate.run(engine)
+
+
+def main():
+    escala = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+    from database import engine, SessionLocal
+
+    preparar_esquema(engine)
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        info = seed(db, escala)
+    info["seconds"] = round(time.perf_counter() - t0, 3)
+    info["backend"] = engine.url.get_backend_name()
+    print(json.dumps({k: v for k, v in info.items() if not k.endswith("_ids")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
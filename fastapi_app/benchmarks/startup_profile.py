@@ -0,0 +1,156 @@
+# benchmarks/startup_profile.py
+"""
+Perfil de arranque en frío: tiempo de import por módulo y tiempo hasta
+que GET / responde.
+
+1. `python -X importtime -c "import main"` en un proceso nuevo: tiempo
+   propio por paquete de primer nivel y los módulos más caros (acumulado).
+2. Qué dependencias pesadas (cv2, numpy, PIL, qrcode, reportlab, boto3)
+   quedaron cargadas tras importar main: deben cargarse en su primer uso.
+3. Arranca uvicorn en un puerto libre y mide hasta el primer 200 en /.
+
+Uso (desde fastapi_app/):
+    python -m benchmarks.startup_profile [--top 25] [--max-seconds 1.0] [--output startup.json]
+
+Sin DATABASE_URL usa un SQLite temporal (el arranque no debe tocar la BD).
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import http.client
+from collections import defaultdict
+
+HEAVY = ("cv2", "numpy", "PIL", "qrcode", "reportlab", "boto3", "botocore")
+
+
+def _env(tmp: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/startup.db")
+    # sin hilos de fondo que compitan con la medición
+    env.setdefault("EMAIL_OUTBOX_WORKER", "0")
+    return env
+
+
+def perfil_imports(env: dict, top: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import main falló:\n{proc.stderr[-2000:]}")
+
+    por_paquete = defaultdict(int)
+    modulos = []
+    total_us = 0
+    for linea in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not linea.startswith("import time:") or "imported package" in linea:
+            continue
+        try:
+            propio, acumulado, nombre = linea[len("import time:"):].split("|")
+            propio, acumulado = int(propio), int(acumulado)
+        except ValueError:
+            continue
+        nombre_limpio = nombre.strip()
+        por_paquete[nombre_limpio.split(".")[0]] += propio
+        modulos.append((acumulado, propio, nombre_limpio))
+        if nombre_limpio == "main":
+            total_us = acumulado
+
+    modulos.sort(reverse=True)
+    return {
+        "import_main_ms": round(total_us / 1000, 1),
+        "by_package_ms": {
+            k: round(v / 1000, 1) for k, v in sorted(por_paquete.items(), key=lambda kv: -kv[1])[:top]
+        },
+        "top_modules_cumulative_ms": [
+            {"module": n, "cumulative_ms": round(a / 1000, 1), "self_ms": round(p / 1000, 1)}
+            for a, p, n in modulos[:top]
+        ],
+    }
+
+
+def pesados_cargados(env: dict) -> list:
+    codigo = (
+        "import sys, json, main; "
+        f"print(json.dumps(sorted(m for m in {HEAVY!r} if m in sys.modules)))"
+    )
+    proc = subprocess.run([sys.executable, "-c", codigo], env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return [f"error: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}"]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def primer_respuesta(env: dict, timeout: float = 30.0) -> dict:
+    """Segundos desde lanzar uvicorn hasta el primer 200 en GET /."""
+    puerto = _puerto_libre()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(puerto), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                return {"error": (proc.stderr.read() or "")[-2000:]}
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", puerto, timeout=1)
+                conn.request("GET", "/")
+                status = conn.getresponse().status
+                conn.close()
+                if status == 200:
+                    return {"seconds_to_first_200": round(time.perf_counter() - t0, 3)}
+            except OSError:
+                time.sleep(0.01)
+        return {"error": f"sin respuesta en {timeout}s"}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de arranque en frío")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="sale con código 1 si el primer 200 tarda más que esto")
+    parser.add_argument("--output", help="archivo JSON (default: stdout)")
+    parser.add_argument("--no-server", action="store_true", help="solo el perfil de imports")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(tmp)
+        resultado = {"python": sys.version.split()[0]}
+        resultado.update(perfil_imports(env, args.top))
+        resultado["heavy_loaded_at_import"] = pesados_cargados(env)
+        if not args.no_server:
+            resultado.update(primer_respuesta(env))
+
+    salida = json.dumps(resultado, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(salida + "\n")
+    else:
+        print(salida)
+
+    lento = resultado.get("seconds_to_first_200")
+    if args.max_seconds is not None and (lento is None or lento > args.max_seconds):
+        print(f"Arranque en frío por encima de {args.max_seconds}s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
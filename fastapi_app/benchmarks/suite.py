@@ -0,0 +1,338 @@
+# benchmarks/suite.py
+"""
+Suite de benchmarks de las rutas calientes, con salida JSON.
+
+Siembra una BD (benchmarks.seed) y mide:
+  - crud.equipos.list_equipos (página inicial, por estado, búsqueda, cursor)
+  - búsqueda de productos (crud.productos.list_productos)
+  - crud.detalle_cobro.crear_detalles_cobro (carrito de 1 y de 5 líneas)
+  - services.qr_decode.try_decode_qr sobre fotos de muestra
+  - utils.tickets.generar_ticket_venta_multiple y
+    utils.ticket.generar_ticket_ingreso_reparacion
+  - generación del PNG del QR (services.qr_assets)
+  - crud.dashboard.get_dashboard (tablas resumen)
+  - exportación CSV completa de cobros (routers/export.py, por lotes)
+
+Cada medición reporta p50/p95/media en ms y, en las de BD, las sentencias
+SQL por llamada. Con --baseline se compara contra un JSON anterior.
+
+Uso (desde fastapi_app/):
+    python -m benchmarks.suite --scale 1 --output bench.json
+    python -m benchmarks.suite --baseline bench.json --max-regression 20
+    DATABASE_URL=postgresql://... python -m benchmarks.suite --scale 10
+
+Sin DATABASE_URL usa un SQLite temporal. Con --no-seed mide los datos que
+ya hay en la BD indicada.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de rutas calientes")
+    parser.add_argument("--scale", type=float, default=1.0, help="factor de escala de los datos (default 1)")
+    parser.add_argument("--repeat", type=int, default=50, help="iteraciones por benchmark rápido (default 50)")
+    parser.add_argument("--output", help="archivo JSON de resultados (default: stdout)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="sale con código 1 si algún p50 empeora más de este porcentaje")
+    parser.add_argument("--no-seed", action="store_true", help="no sembrar; usar los datos existentes")
+    parser.add_argument("--only", help="solo los benchmarks cuyo nombre contenga este texto")
+    return parser.parse_args(argv)
+
+
+# =====================================================
+# ⏱️ Medición
+# =====================================================
+class Suite:
+    def __init__(self, repeat: int, only: Optional[str] = None):
+        self.repeat = repeat
+        self.only = only
+        self.results = []
+
+    def bench(self, nombre: str, fn: Callable[[], object], n: Optional[int] = None, warmup: int = 1, sql: bool = False):
+        if self.only and self.only not in nombre:
+            return
+        n = n or self.repeat
+        try:
+            for _ in range(warmup):
+                fn()
+            tiempos = []
+            sentencias = 0
+            for _ in range(n):
+                if sql:
+                    from services import query_guard
+
+                    with query_guard.track(nombre) as rec:
+                        t0 = time.perf_counter()
+                        fn()
+                        tiempos.append(time.perf_counter() - t0)
+                    sentencias += rec.statements
+                else:
+                    t0 = time.perf_counter()
+                    fn()
+                    tiempos.append(time.perf_counter() - t0)
+        except ImportError as exc:
+            # dependencia opcional ausente (cv2, reportlab, qrcode...): se reporta, no se aborta
+            self.results.append({"benchmark": nombre, "skipped": f"falta dependencia: {exc.name or exc}"})
+            print(f"  {nombre:<40} omitido ({exc})", file=sys.stderr)
+            return
+
+        tiempos.sort()
+        ms = [t * 1000 for t in tiempos]
+        resultado = {
+            "benchmark": nombre,
+            "n": n,
+            "mean_ms": round(statistics.fmean(ms), 3),
+            "p50_ms": round(ms[len(ms) // 2], 3),
+            "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+            "min_ms": round(ms[0], 3),
+            "max_ms": round(ms[-1], 3),
+        }
+        if sql:
+            resultado["statements_per_call"] = round(sentencias / n, 2)
+        self.results.append(resultado)
+        print(f"  {nombre:<40} p50 {resultado['p50_ms']:>9.3f} ms   p95 {resultado['p95_ms']:>9.3f} ms", file=sys.stderr)
+
+
+# =====================================================
+# 📷 Fotos de muestra para el decodificador de QR
+# =====================================================
+def _fotos_muestra(rng: random.Random) -> dict:
+    """
+    Imitan fotos de celular: el QR ocupa una parte de la imagen, girado,
+    sobre un fondo con ruido, guardado como JPEG. Incluye una sin QR
+    (el peor caso: se prueban todas las variantes).
+    """
+    import io
+    import qrcode
+    from PIL import Image, ImageDraw, ImageFilter
+
+    def _foto(ancho, alto, texto=None, angulo=0):
+        fondo = Image.effect_noise((ancho, alto), 40).convert("RGB")
+        dibujo = ImageDraw.Draw(fondo)
+        for _ in range(12):
+            x, y = rng.randrange(ancho), rng.randrange(alto)
+            dibujo.rectangle([x, y, x + rng.randrange(50, 400), y + rng.randrange(50, 400)],
+                             fill=tuple(rng.randrange(256) for _ in range(3)))
+        if texto is not None:
+            lado = min(ancho, alto) // 3
+            qr = qrcode.make(texto).convert("RGB").resize((lado, lado)).rotate(angulo, expand=True, fillcolor="white")
+            fondo.paste(qr, (ancho // 2 - qr.width // 2, alto // 2 - qr.height // 2))
+        buffer = io.BytesIO()
+        fondo.filter(ImageFilter.GaussianBlur(0.8)).save(buffer, format="JPEG", quality=85)
+        buffer.seek(0)
+        imagen = Image.open(buffer)
+        imagen.load()
+        return imagen
+
+    return {
+        "qr_1200x1600": _foto(1200, 1600, "1234"),
+        "qr_girado_1200x1600": _foto(1200, 1600, "5678", angulo=90),
+        "qr_3024x4032": _foto(3024, 4032, "91011"),
+        "sin_qr_1200x1600": _foto(1200, 1600),
+    }
+
+
+# =====================================================
+# 🏃 Corrida
+# =====================================================
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(args) -> dict:
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp.name}/bench_suite.db")
+
+    from sqlalchemy import select, update
+    from database import engine, SessionLocal
+    from benchmarks.seed import seed, preparar_esquema
+    from models.productos import Producto
+    from models.equipo import Equipo
+    from crud.equipos import list_equipos, next_cursor
+    from crud.productos import list_productos
+    from crud.detalle_cobro import crear_detalles_cobro
+
+    rng = random.Random(7)
+    suite = Suite(args.repeat, args.only)
+
+    # ---- datos ----
+    print("Preparando datos...", file=sys.stderr)
+    preparar_esquema(engine)
+    info = {"scale": args.scale, "counts": None}
+    with SessionLocal() as db:
+        if args.no_seed:
+            producto_ids = list(db.scalars(select(Producto.id).order_by(Producto.id).limit(500)))
+        else:
+            t0 = time.perf_counter()
+            info = seed(db, args.scale)
+            info["seed_seconds"] = round(time.perf_counter() - t0, 3)
+            producto_ids = info.pop("producto_ids")
+            info.pop("equipo_ids")
+        if not producto_ids:
+            raise SystemExit("La BD no tiene productos; corre sin --no-seed")
+        # productos del carrito con stock de sobra: se mide la venta, no el rechazo
+        carrito_ids = producto_ids[:5]
+        db.execute(
+            update(Producto).where(Producto.id.in_(carrito_ids)).values(stock_actual=10 ** 9)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    # ---- BD ----
+    print("Benchmarks:", file=sys.stderr)
+    with SessionLocal() as db:
+        primera = list_equipos(db, limit=50)
+        cursor = next_cursor(primera, 50)
+        nombre = db.scalar(select(Equipo.cliente_nombre).limit(1)) or "Hernández"
+        apellido = nombre.split()[-1]
+
+        suite.bench("list_equipos.primera_pagina", lambda: list_equipos(db, limit=50), sql=True)
+        suite.bench("list_equipos.por_estado", lambda: list_equipos(db, limit=50, estado="en_reparacion"), sql=True)
+        suite.bench("list_equipos.busqueda_cliente", lambda: list_equipos(db, limit=50, cliente_nombre=apellido), sql=True)
+        if cursor:
+            suite.bench("list_equipos.cursor_pagina_2", lambda: list_equipos(db, limit=50, cursor=cursor), sql=True)
+
+        suite.bench("productos.busqueda_texto", lambda: list_productos(db, q="funda samsung", limit=50), sql=True)
+        suite.bench("productos.busqueda_codigo", lambda: list_productos(db, q="sku", limit=50), sql=True)
+        suite.bench("productos.por_categoria", lambda: list_productos(db, categoria_nombre="cargadores", limit=50), sql=True)
+
+        from datetime import timedelta
+        from crud.dashboard import get_dashboard
+        from services.kpi import dia_local
+
+        hoy = dia_local()
+        suite.bench("dashboard.30_dias", lambda: get_dashboard(db, hoy - timedelta(days=29), hoy), sql=True)
+
+    from crud import export as crud_export
+    from routers.export import _csv
+
+    def _exportar(entidad):
+        return sum(len(b) for b in _csv(crud_export.columnas(entidad), crud_export.iter_lotes(entidad)))
+
+    suite.bench("export.cobros_csv", lambda: _exportar("cobros"), n=max(3, args.repeat // 10))
+
+    def _venta(lineas):
+        with SessionLocal() as db:
+            crear_detalles_cobro(db, [{"producto_id": pid, "cantidad": 1} for pid in carrito_ids[:lineas]])
+
+    suite.bench("crear_detalles_cobro.1_linea", lambda: _venta(1), sql=True)
+    suite.bench("crear_detalles_cobro.5_lineas", lambda: _venta(5), sql=True)
+
+    # ---- QR ----
+    try:
+        from services.qr_decode import try_decode_qr
+
+        fotos = _fotos_muestra(rng)
+    except ImportError as exc:
+        fotos = {}
+        suite.results.append({"benchmark": "try_decode_qr", "skipped": f"falta dependencia: {exc.name or exc}"})
+    for nombre_foto, foto in fotos.items():
+        suite.bench(f"try_decode_qr.{nombre_foto}", lambda foto=foto: try_decode_qr(foto), n=max(3, args.repeat // 10))
+
+    from services import qr_assets
+
+    ids_qr = iter(range(10 ** 6))
+    suite.bench("qr_assets.render_png", lambda: qr_assets._render_png(str(next(ids_qr))))
+
+    # ---- tickets PDF ----
+    from utils.tickets import generar_ticket_venta_multiple
+    from utils.ticket import generar_ticket_ingreso_reparacion
+
+    detalles = [
+        {"producto": f"Funda uso rudo Samsung Galaxy A{i}", "cantidad": i % 3 + 1,
+         "precio_venta": 149.0, "subtotal": 149.0 * (i % 3 + 1)}
+        for i in range(8)
+    ]
+    tickets_dir = os.path.join(tmp.name, "tickets")
+    suite.bench("ticket.venta_multiple", lambda: generar_ticket_venta_multiple(
+        detalles=detalles, total=2384.0, tipo_pago="Efectivo", monto_recibido=2500.0,
+        cambio=116.0, path=tickets_dir, logo_path="static/logo.png",
+    ), n=max(5, args.repeat // 2))
+    suite.bench("ticket.ingreso_reparacion", lambda: generar_ticket_ingreso_reparacion(
+        cliente_nombre="María Guadalupe Hernández", contacto="5512345678", articulo="Celular",
+        modelo="Galaxy S21", serie="356789012345678",
+        falla_descripcion="Pantalla estrellada, táctil no responde en la parte inferior",
+        observaciones="Trae funda", anticipo=200.0, total=950.0, tipo_pago="Efectivo",
+        path=tickets_dir, logo_path="static/logo.png", equipo_id=42,
+    ), n=max(5, args.repeat // 2))
+
+    engine.dispose()
+    tmp.cleanup()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "backend": engine.url.get_backend_name(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "seed": info,
+        "results": suite.results,
+    }
+
+
+# =====================================================
+# 📊 Comparación contra baseline
+# =====================================================
+def comparar(actual: dict, baseline: dict) -> list:
+    """Agrega baseline_p50_ms y change_pct a cada resultado; devuelve los que empeoraron."""
+    previos = {r["benchmark"]: r for r in baseline.get("results", []) if "p50_ms" in r}
+    cambios = []
+    for r in actual["results"]:
+        previo = previos.get(r["benchmark"])
+        if previo is None or "p50_ms" not in r or not previo["p50_ms"]:
+            continue
+        r["baseline_p50_ms"] = previo["p50_ms"]
+        r["change_pct"] = round((r["p50_ms"] - previo["p50_ms"]) / previo["p50_ms"] * 100, 1)
+        cambios.append(r)
+    return cambios
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    resultado = run(args)
+
+    regresiones = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            cambios = comparar(resultado, json.load(fh))
+        resultado["meta"]["baseline"] = args.baseline
+        print("\nContra baseline (p50):", file=sys.stderr)
+        for r in cambios:
+            print(f"  {r['benchmark']:<40} {r['baseline_p50_ms']:>9.3f} -> {r['p50_ms']:>9.3f} ms  ({r['change_pct']:+.1f}%)",
+                  file=sys.stderr)
+            if args.max_regression is not None and r["change_pct"] > args.max_regression:
+                regresiones.append(r["benchmark"])
+
+    salida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(salida + "\n")
+        print(f"\nResultados en {args.output}", file=sys.stderr)
+    else:
+        print(salida)
+
+    if regresiones:
+        print(f"Regresiones mayores a {args.max_regression}%: {', '.join(regresiones)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
-from models.client import Client
-from models.equipo import Equipo
-from database import Base, engine
+# Alias de migrate.py (se conserva por compatibilidad)
+import migrate
 
-Base.metadata.create_all(bind=engine)
+migrate.run()
 print("Tablas creadas correctamente")
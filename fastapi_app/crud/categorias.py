@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from models.categoria import Categoria
 from schemas.productos import CategoriaCreate, CategoriaUpdate
+from services import catalog_cache
 
 
 # 🔹 Crear categoría
@@ -12,6 +13,7 @@ def create_categoria(db: Session, payload: CategoriaCreate) -> Categoria:
     )
     db.add(db_obj)
     db.commit()
+    catalog_cache.bump()
     db.refresh(db_obj)
     return db_obj
 
@@ -40,6 +42,7 @@ def update_categoria(db: Session, categoria_id: int, payload: CategoriaUpdate) -
 
     db.add(obj)
     db.commit()
+    catalog_cache.bump()
     db.refresh(obj)
     return obj
 
@@ -51,4 +54,5 @@ def delete_categoria(db: Session, categoria_id: int) -> bool:
         return False
     db.delete(obj)
     db.commit()
+    catalog_cache.bump()
     return True
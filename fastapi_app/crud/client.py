@@ -5,6 +5,7 @@ from typing import List, Optional
 
 from models.client import Cliente
 from schemas.client import ClientCreate, ClientUpdate
+from services.search import apply_search
 
 
 # ---------------------------------------------------------
@@ -75,7 +76,8 @@ def get_clients(
     stmt = select(Cliente)
 
     if nombre:
-        stmt = stmt.where(Cliente.nombre_completo.ilike(f"%{nombre}%"))
+        # indexado, sin acentos y ordenado por relevancia
+        stmt = apply_search(stmt, "clientes", nombre)
 
     stmt = stmt.offset(skip).limit(limit)
     return db.execute(stmt).scalars().all()
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from models.cobros import Cobro
 from schemas.cobros import CobroCreate, CobroUpdate
+from services import kpi  # noqa: F401  (resumen del dashboard en la misma transacción)
 
 def create_cobro(db: Session, cobro: CobroCreate):
     if cobro.anticipo > cobro.monto_total:
@@ -0,0 +1,81 @@
+# crud/dashboard.py
+"""
+Lecturas del dashboard: solo tablas resumen (models/kpi.py) y categorías.
+Nunca recorre cobros, equipos ni detalle_cobros, así que el costo no
+crece con el historial.
+"""
+from datetime import date
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.kpi import KpiCobrosDia, KpiEquiposEstado, KpiVentasCategoriaDia
+from models.categoria import Categoria
+from crud.equipos import VALID_ESTADOS
+
+
+def get_dashboard(db: Session, desde: date, hasta: date) -> dict:
+    # ---- cobros por día y método (≤ días × métodos filas) ----
+    filas = db.execute(
+        select(KpiCobrosDia)
+        .where(KpiCobrosDia.dia >= desde, KpiCobrosDia.dia <= hasta)
+        .order_by(KpiCobrosDia.dia, KpiCobrosDia.metodo_pago)
+    ).scalars().all()
+
+    por_dia = []
+    totales = {"cobros": 0, "monto_total": 0.0, "anticipos": 0.0, "saldo_pendiente": 0.0, "por_metodo_pago": {}}
+    for f in filas:
+        if not f.cobros:
+            continue  # fila que quedó en cero tras mover un cobro de día/método
+        por_dia.append({
+            "dia": f.dia,
+            "metodo_pago": f.metodo_pago,
+            "cobros": f.cobros,
+            "monto_total": round(f.monto_total, 2),
+            "anticipos": round(f.anticipos, 2),
+            "saldo_pendiente": round(f.saldo_pendiente, 2),
+        })
+        totales["cobros"] += f.cobros
+        totales["monto_total"] += f.monto_total
+        totales["anticipos"] += f.anticipos
+        totales["saldo_pendiente"] += f.saldo_pendiente
+        metodo = totales["por_metodo_pago"]
+        metodo[f.metodo_pago] = metodo.get(f.metodo_pago, 0.0) + f.monto_total
+    for campo in ("monto_total", "anticipos", "saldo_pendiente"):
+        totales[campo] = round(totales[campo], 2)
+    totales["por_metodo_pago"] = {k: round(v, 2) for k, v in totales["por_metodo_pago"].items()}
+
+    # ---- equipos por estado (una fila por estado/archivado) ----
+    estados = {e: {"activos": 0, "archivados": 0} for e in VALID_ESTADOS}
+    for f in db.execute(select(KpiEquiposEstado)).scalars():
+        grupo = estados.setdefault(f.estado, {"activos": 0, "archivados": 0})
+        grupo["archivados" if f.archived else "activos"] += f.total
+
+    # ---- ventas por categoría en el rango (≤ días × categorías filas) ----
+    ventas = (
+        select(
+            KpiVentasCategoriaDia.categoria_id,
+            func.sum(KpiVentasCategoriaDia.unidades).label("unidades"),
+            func.sum(KpiVentasCategoriaDia.monto).label("monto"),
+        )
+        .where(KpiVentasCategoriaDia.dia >= desde, KpiVentasCategoriaDia.dia <= hasta)
+        .group_by(KpiVentasCategoriaDia.categoria_id)
+        .subquery()
+    )
+    unidades = func.coalesce(ventas.c.unidades, 0)
+    categorias = db.execute(
+        select(Categoria.id, Categoria.nombre, unidades, func.coalesce(ventas.c.monto, 0.0))
+        .outerjoin(ventas, ventas.c.categoria_id == Categoria.id)
+        .order_by(unidades.desc(), Categoria.nombre)
+    ).all()
+
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "ingresos_por_dia": por_dia,
+        "totales": totales,
+        "equipos_por_estado": estados,
+        "ventas_por_categoria": [
+            {"categoria_id": cid, "categoria": nombre, "unidades_vendidas": int(total), "monto_total": round(monto, 2)}
+            for cid, nombre, total, monto in categorias
+        ],
+    }
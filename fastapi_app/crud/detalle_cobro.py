@@ -1,64 +1,176 @@
 # crud/detalle_cobro.py
-from typing import List, Dict, Any
+"""
+Venta de varios productos (carrito) con descuento de stock atómico.
+
+Por carrito se hacen siempre las mismas consultas, sin importar cuántas
+líneas traiga:
+  1. un UPDATE condicional sobre todos los productos del carrito
+     (stock_actual >= cantidad) con RETURNING de nombre/precio/stock;
+  2. un INSERT masivo de los DetalleCobro;
+  3. un UPSERT en kpi_ventas_categoria_dia (una fila por categoría);
+  4. COMMIT.
+La BD hace la comprobación y el descuento en la misma sentencia, así que
+dos ventas concurrentes del mismo producto no pueden dejar stock negativo.
+Si algún producto no existe o no alcanza, se hace rollback y una consulta
+extra (solo en ese caso) para armar el mensaje de error.
+"""
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, insert, select, update
 from models.detalle_cobro import DetalleCobro
 from models.productos import Producto
+from utils import clock
+from services import catalog_cache, kpi
+from models.kpi import KpiVentasCategoriaDia
 
 
 # --------------------------------------
-# Crear varios detalles de cobro (CORREGIDO)
+# Helpers comunes (sync / async)
 # --------------------------------------
-def crear_detalles_cobro(db: Session, detalles: List[Dict[str, Any]]):
-    nuevos_detalles = []
-    total_general = 0
-
+def _preparar_carrito(detalles: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, int]], "OrderedDict[int, int]"]:
+    """Valida las líneas y suma cantidades por producto (orden de aparición)."""
+    lineas = []
+    totales: "OrderedDict[int, int]" = OrderedDict()
     for detalle in detalles:
-
-        # ✔ Obtener datos desde dict
         producto_id = detalle.get("producto_id")
         cantidad = detalle.get("cantidad")
 
-        if not producto_id or not cantidad:
+        if not producto_id or not cantidad or int(cantidad) <= 0:
             raise Exception("Cada detalle debe incluir producto_id y cantidad")
 
-        # Buscar producto
-        producto = db.query(Producto).filter(Producto.id == producto_id).first()
-
-        if not producto:
-            raise Exception(f"Producto con ID {producto_id} no encontrado")
+        producto_id, cantidad = int(producto_id), int(cantidad)
+        lineas.append((producto_id, cantidad))
+        totales[producto_id] = totales.get(producto_id, 0) + cantidad
 
-        # Verificar stock disponible
-        if producto.stock_actual < cantidad:
-            raise Exception(f"Stock insuficiente para el producto '{producto.nombre}'")
+    if not lineas:
+        raise Exception("No se enviaron detalles")
+    return lineas, totales
 
-        # Calcular subtotal
-        subtotal = producto.precio_venta * cantidad
-        total_general += subtotal
 
-        # Crear registro del detalle
-        db_detalle = DetalleCobro(
-            producto_id=producto_id,
-            cantidad=cantidad,
-            subtotal=subtotal
+def _stmt_descontar(totales: Dict[int, int]):
+    """
+    UPDATE ... WHERE stock_actual >= :n RETURNING para todo el carrito.
+    También acumula unidades_vendidas / ultima_venta del producto.
+    """
+    cantidad = case(totales, value=Producto.id)
+    return (
+        update(Producto)
+        .where(Producto.id.in_(list(totales)), Producto.stock_actual >= cantidad)
+        .values(
+            stock_actual=Producto.stock_actual - cantidad,
+            unidades_vendidas=Producto.unidades_vendidas + cantidad,
+            ultima_venta=clock.now(),
         )
+        .returning(Producto.id, Producto.nombre, Producto.precio_venta, Producto.stock_actual, Producto.categoria_id)
+        .execution_options(synchronize_session=False)
+    )
 
-        # Actualizar stock
-        producto.stock_actual -= cantidad
 
-        db.add(db_detalle)
+def _error_carrito(lineas, totales, encontrados: Dict[int, Tuple[str, int]]) -> Exception:
+    """Mismo mensaje que daba la validación línea a línea."""
+    for producto_id, _ in lineas:
+        if producto_id not in encontrados:
+            return Exception(f"Producto con ID {producto_id} no encontrado")
+    for producto_id, total in totales.items():
+        nombre, stock = encontrados[producto_id]
+        if stock < total:
+            return Exception(f"Stock insuficiente para el producto '{nombre}'")
+    # el stock cambió entre el UPDATE y esta consulta (otra venta concurrente)
+    return Exception("Stock insuficiente")
 
+
+def _armar_resultado(lineas, totales, filas):
+    """
+    Filas del INSERT masivo y respuesta con el stock restante tras cada
+    línea (como si se hubieran descontado una por una).
+    """
+    productos = {fila.id: fila for fila in filas}
+    stock = {pid: productos[pid].stock_actual + total for pid, total in totales.items()}
+
+    valores = []
+    nuevos_detalles = []
+    total_general = 0
+    for producto_id, cantidad in lineas:
+        producto = productos[producto_id]
+        subtotal = producto.precio_venta * cantidad
+        total_general += subtotal
+        stock[producto_id] -= cantidad
+
+        valores.append({"producto_id": producto_id, "cantidad": cantidad, "subtotal": subtotal})
         nuevos_detalles.append({
             "producto": producto.nombre,
             "precio_venta": producto.precio_venta,
             "cantidad": cantidad,
             "subtotal": subtotal,
-            "stock_restante": producto.stock_actual
+            "stock_restante": stock[producto_id]
         })
 
-    db.commit()
-
-    return {
+    return valores, {
         "detalles": nuevos_detalles,
         "total_general": total_general
     }
+
+
+def _ventas_kpi(dialecto: str, valores, filas):
+    """UPSERT del resumen de ventas por (día, categoría) del dashboard."""
+    categorias = {fila.id: fila.categoria_id for fila in filas}
+    lineas = [(categorias[v["producto_id"]], v["cantidad"], v["subtotal"]) for v in valores]
+    stmt = kpi.stmt_upsert(dialecto, KpiVentasCategoriaDia, kpi.CLAVES_VENTAS)
+    return stmt, kpi.filas_ventas(lineas)
+
+
+def _stmt_diagnostico(totales):
+    return select(Producto.id, Producto.nombre, Producto.stock_actual).where(Producto.id.in_(list(totales)))
+
+
+# --------------------------------------
+# Crear varios detalles de cobro
+# --------------------------------------
+def crear_detalles_cobro(db: Session, detalles: List[Dict[str, Any]]):
+    lineas, totales = _preparar_carrito(detalles)
+
+    try:
+        filas = db.execute(_stmt_descontar(totales)).all()
+        if len(filas) != len(totales):
+            db.rollback()
+            encontrados = {f.id: (f.nombre, f.stock_actual) for f in db.execute(_stmt_diagnostico(totales))}
+            raise _error_carrito(lineas, totales, encontrados)
+
+        valores, resultado = _armar_resultado(lineas, totales, filas)
+        db.execute(insert(DetalleCobro), valores)
+        db.execute(*_ventas_kpi(db.get_bind().dialect.name, valores, filas))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # el stock cambió: el catálogo cacheado ya no es válido
+    catalog_cache.bump()
+    return resultado
+
+
+# --------------------------------------
+# Variante async (misma lógica, AsyncSession)
+# --------------------------------------
+async def crear_detalles_cobro_async(db: AsyncSession, detalles: List[Dict[str, Any]]):
+    lineas, totales = _preparar_carrito(detalles)
+
+    try:
+        filas = (await db.execute(_stmt_descontar(totales))).all()
+        if len(filas) != len(totales):
+            await db.rollback()
+            encontrados = {f.id: (f.nombre, f.stock_actual) for f in await db.execute(_stmt_diagnostico(totales))}
+            raise _error_carrito(lineas, totales, encontrados)
+
+        valores, resultado = _armar_resultado(lineas, totales, filas)
+        await db.execute(insert(DetalleCobro), valores)
+        await db.execute(*_ventas_kpi(db.get_bind().dialect.name, valores, filas))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    catalog_cache.bump()
+    return resultado
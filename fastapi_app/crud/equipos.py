@@ -1,12 +1,19 @@
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_, update, insert, func
+import base64
 import json
 
 from models.equipo import Equipo
+from models.estado_equipo import EstadoEquipo
 from schemas.equipo import EquipoCreate, EquipoUpdate
 from crud.client import get_or_create_client
+from utils import clock
+from services.search import apply_search
+from services import kpi  # resumen del dashboard en la misma transacción
+from services import equipo_eventos  # push a tablets al confirmar
 
 
 # ==========================
@@ -22,11 +29,18 @@ VALID_ESTADOS = [
     "pendientes",
 ]
 
+# Límite máximo de filas por página en listados
+MAX_PAGE_SIZE = 200
+
 
 # =====================================================
 # 🔹 Crear equipo (crea cliente si no existe)
 # =====================================================
-def create_equipo(db: Session, payload: EquipoCreate) -> Equipo:
+def create_equipo(
+    db: Session,
+    payload: EquipoCreate,
+    qr_url_for: Optional[Callable[[int], str]] = None,
+) -> Equipo:
     cliente = get_or_create_client(
         db=db,
         nombre=payload.cliente_nombre,
@@ -58,11 +72,17 @@ def create_equipo(db: Session, payload: EquipoCreate) -> Equipo:
         estado=estado,
         imei=payload.imei,
 
-        fecha_ingreso=datetime.utcnow(),
+        fecha_ingreso=clock.now(),
         archived=False,
     )
 
     db.add(db_equipo)
+
+    # La URL del QR solo depende del id: se guarda en el mismo commit
+    if qr_url_for is not None:
+        db.flush()
+        db_equipo.qr_url = qr_url_for(db_equipo.id)
+
     db.commit()
     db.refresh(db_equipo)
     return db_equipo
@@ -75,23 +95,56 @@ def get_equipo(db: Session, equipo_id: int) -> Optional[Equipo]:
     return db.get(Equipo, equipo_id)
 
 
+async def get_equipo_async(db: AsyncSession, equipo_id: int) -> Optional[Equipo]:
+    return await db.get(Equipo, equipo_id)
+
+
+# =====================================================
+# 🔹 Cursor opaco para paginación keyset (fecha_ingreso, id)
+# =====================================================
+def encode_cursor(equipo: Equipo) -> str:
+    raw = json.dumps({
+        "f": equipo.fecha_ingreso.isoformat(),  # NOT NULL (migración v0006)
+        "i": equipo.id,
+    })
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["f"]), int(data["i"])
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+def next_cursor(items: List[Equipo], limit: int) -> Optional[str]:
+    """Cursor de la siguiente página, o None si ya no hay más filas."""
+    if len(items) < limit or not items:
+        return None
+    return encode_cursor(items[-1])
+
+
 # =====================================================
 # 🔹 Listar equipos ACTIVOS (NO archivados)
 # =====================================================
-def list_equipos(
-    db: Session,
+# Usa el índice ix_equipos_listado (archived, estado, fecha_ingreso DESC, id):
+# con `cursor` la página se resuelve con un seek, sin descartar filas
+# como hace OFFSET. `skip` se mantiene por compatibilidad.
+def _list_equipos_stmt(
     skip: int = 0,
     limit: int = 50,
     cliente_nombre: Optional[str] = None,
     estado: Optional[str] = None,
-) -> List[Equipo]:
-
+    cursor: Optional[str] = None,
+):
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
     stmt = select(Equipo).where(Equipo.archived == False)
 
     if cliente_nombre:
-        stmt = stmt.where(
-            Equipo.cliente_nombre.ilike(f"%{cliente_nombre}%")
-        )
+        # sin ranking: el orden lo fija la paginación keyset
+        stmt = apply_search(stmt, "equipos", cliente_nombre, rank=False)
 
     if estado:
         if estado in VALID_ESTADOS:
@@ -100,32 +153,52 @@ def list_equipos(
             # estado inválido → no retorna nada
             stmt = stmt.where(Equipo.id == -1)
 
-    stmt = (
-        stmt.order_by(Equipo.fecha_ingreso.desc())
-        .offset(skip)
+    if cursor:
+        fecha, equipo_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Equipo.fecha_ingreso, Equipo.id) < (fecha, equipo_id))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    return (
+        stmt.order_by(Equipo.fecha_ingreso.desc(), Equipo.id.desc())
         .limit(limit)
     )
 
+
+def list_equipos(
+    db: Session,
+    skip: int = 0,
+    limit: int = 50,
+    cliente_nombre: Optional[str] = None,
+    estado: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> List[Equipo]:
+
+    stmt = _list_equipos_stmt(skip, limit, cliente_nombre, estado, cursor)
     return list(db.execute(stmt).scalars())
 
 
+async def list_equipos_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 50,
+    cliente_nombre: Optional[str] = None,
+    estado: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> List[Equipo]:
+
+    stmt = _list_equipos_stmt(skip, limit, cliente_nombre, estado, cursor)
+    return list((await db.execute(stmt)).scalars())
+
+
 # =====================================================
 # 🔹 Buscar equipos activos por nombre de cliente
 # =====================================================
 def get_equipos_by_cliente_nombre(
-    db: Session, nombre: str
+    db: Session, nombre: str, limit: int = 50, cursor: Optional[str] = None
 ) -> List[Equipo]:
 
-    stmt = (
-        select(Equipo)
-        .where(
-            Equipo.archived == False,
-            Equipo.cliente_nombre.ilike(f"%{nombre}%"),
-        )
-        .order_by(Equipo.fecha_ingreso.desc())
-    )
-
-    return list(db.execute(stmt).scalars())
+    return list_equipos(db, limit=limit, cliente_nombre=nombre, cursor=cursor)
 
 
 # =====================================================
@@ -165,7 +238,7 @@ def marcar_equipo_listo(
         return None
 
     equipo.estado = "listo"
-    equipo.fecha_entrega = datetime.utcnow()
+    equipo.fecha_entrega = clock.now()
 
     if archivar:
         equipo.archived = True
@@ -185,13 +258,116 @@ def cancelar_equipo(db: Session, equipo_id: int) -> Optional[Equipo]:
 
     equipo.estado = "cancelado"
     equipo.archived = True
-    equipo.fecha_entrega = datetime.utcnow()
+    equipo.fecha_entrega = clock.now()
 
     db.commit()
     db.refresh(equipo)
     return equipo
 
 
+# =====================================================
+# 🔹 Cambio de estado masivo (cierre del día)
+# =====================================================
+# transición -> (estado, archiva, marca fecha_entrega); igual que
+# update_equipo(reparando) / marcar_equipo_listo / cancelar_equipo
+TRANSICIONES = {
+    "reparando": ("en_reparacion", False, False),
+    "listo": ("listo", True, True),
+    "cancelar": ("cancelado", True, True),
+}
+
+
+def transicion_masiva(
+    db: Session,
+    ids: List[int],
+    transicion: str,
+    archivar: bool = True,
+    observaciones: Optional[str] = None,
+) -> List[dict]:
+    """
+    Aplica `transicion` a varios equipos activos en una transacción y un
+    número fijo de sentencias (no tres idas y vueltas por equipo):
+
+    - SELECT ... FOR UPDATE del estado previo (bloquea las filas: el
+      estado anterior que va a KPIs y eventos no cambia en medio);
+    - un solo UPDATE ... RETURNING con el estado nuevo;
+    - cierra (fecha_fin) e inserta en bloque el historial de estados;
+    - ajusta KPIs y eventos a mano (los UPDATE por Core no disparan los
+      eventos de mapper).
+
+    Devuelve un resultado por id, en el orden recibido.
+    """
+    estado, archiva, entrega = TRANSICIONES[transicion]
+    if transicion == "listo":
+        archiva = archivar
+    ids = list(dict.fromkeys(ids))
+
+    previos = {
+        f.id: f
+        for f in db.execute(
+            select(Equipo.id, Equipo.estado, Equipo.archived)
+            .where(Equipo.id.in_(ids))
+            .with_for_update()
+        )
+    }
+    activos = [i for i in ids if i in previos and not previos[i].archived]
+
+    filas = []
+    if activos:
+        valores = {"estado": estado}
+        if archiva:
+            valores["archived"] = True
+        if entrega:
+            valores["fecha_entrega"] = clock.now()
+
+        tabla = Equipo.__table__
+        filas = db.execute(
+            update(tabla)
+            .where(tabla.c.id.in_(activos), tabla.c.archived == False)
+            .values(**valores)
+            .returning(*(tabla.c[c] for c in equipo_eventos.CAMPOS_RESUMEN))
+        ).all()
+
+    actualizados = {f.id: f for f in filas}
+    if filas:
+        historial = EstadoEquipo.__table__
+        db.execute(
+            update(historial)
+            .where(historial.c.equipo_id.in_(list(actualizados)), historial.c.fecha_fin.is_(None))
+            .values(fecha_fin=func.now())
+        )
+        db.execute(
+            insert(historial),
+            [{"equipo_id": i, "estado": estado, "observaciones": observaciones} for i in actualizados],
+        )
+
+        antes = {i: previos[i].estado for i in actualizados}
+        kpi.ajustar_equipos(db.connection(), [
+            ((antes[f.id] or "recibido", False), (f.estado, bool(f.archived))) for f in filas
+        ])
+        equipo_eventos.registrar(db, [
+            equipo_eventos.fila(
+                f,
+                "archivado" if f.archived else ("estado" if f.estado != antes[f.id] else "actualizado"),
+                antes[f.id],
+            )
+            for f in filas
+        ])
+
+    db.commit()
+
+    resultados = []
+    for i in ids:
+        f = actualizados.get(i)
+        if f is not None:
+            resultados.append({"id": i, "ok": True, "estado": f.estado, "archived": bool(f.archived)})
+        elif i in previos:
+            resultados.append({"id": i, "ok": False, "detail": "Equipo archivado"})
+        else:
+            resultados.append({"id": i, "ok": False, "detail": "Equipo no encontrado"})
+    return resultados
+
+
 # =====================================================
 # 🔹 Borrado lógico (NO se elimina de BD)
 # =====================================================
@@ -238,6 +414,7 @@ def set_equipo_foto(
         return None
 
     equipo.foto_url = foto_url
+    equipo.foto_variantes = None  # eran de la foto anterior
     db.commit()
     db.refresh(equipo)
     return equipo
@@ -277,7 +454,25 @@ def set_equipo_foto_json(
     except Exception:
         # fallback: guardar texto plano
         equipo.foto_url = fotos_json
+    equipo.foto_variantes = None  # eran de las fotos anteriores
 
     db.commit()
     db.refresh(equipo)
     return equipo
+
+
+# =====================================================
+# 🔹 Registrar derivados de fotos (pool de imágenes)
+# =====================================================
+def set_equipo_foto_variantes(db: Session, equipo_id: int, foto_url: str, variantes: dict) -> bool:
+    """
+    Guarda las URLs de miniatura/medio. Solo si foto_url sigue siendo la
+    misma: si subieron otras fotos mientras tanto, estas ya no aplican.
+    """
+    resultado = db.execute(
+        update(Equipo.__table__)
+        .where(Equipo.id == equipo_id, Equipo.foto_url == foto_url)
+        .values(foto_variantes=variantes)
+    )
+    db.commit()
+    return resultado.rowcount > 0
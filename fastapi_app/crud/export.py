@@ -0,0 +1,115 @@
+# crud/export.py
+"""
+Exportaciones completas (contabilidad) de equipos, cobros y ventas.
+
+Se leen por lotes keyset sobre la PK:
+    SELECT ... WHERE id > :ultimo [AND fecha en rango] ORDER BY id LIMIT :lote
+Cada lote toma una conexión del pool solo mientras se lee y la devuelve
+antes de entregar las filas: un cliente que descarga lento no retiene
+conexiones, y en memoria nunca hay más de un lote.
+
+No es una foto única: una fila nueva con id mayor al último leído puede
+entrar en la descarga. Para contabilidad se exportan rangos ya cerrados.
+"""
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator, List, Optional
+
+from sqlalchemy import select
+
+from database import engine as _engine
+from models.equipo import Equipo
+from models.cobros import Cobro
+from models.detalle_cobro import DetalleCobro
+from models.productos import Producto
+from models.categoria import Categoria
+from services import query_guard
+from services.kpi import KPI_TIMEZONE
+
+EXPORT_LOTE = int(os.environ.get("EXPORT_LOTE", "5000"))
+
+
+# =====================================================
+# 📋 Entidades: (select base, columna id, columna fecha)
+# =====================================================
+def _equipos():
+    # sin clave_bloqueo: la exportación sale del sistema
+    stmt = select(
+        Equipo.id, Equipo.cliente_id, Equipo.cliente_nombre, Equipo.cliente_numero,
+        Equipo.cliente_correo, Equipo.marca, Equipo.modelo, Equipo.imei, Equipo.fallo,
+        Equipo.estado, Equipo.archived, Equipo.fecha_ingreso, Equipo.fecha_entrega,
+    )
+    return stmt, Equipo.id, Equipo.fecha_ingreso
+
+
+def _cobros():
+    stmt = select(
+        Cobro.id, Cobro.fecha_pago, Cobro.cliente_id, Cobro.equipo_id, Cobro.metodo_pago,
+        Cobro.monto_total, Cobro.anticipo, Cobro.saldo_pendiente,
+    )
+    return stmt, Cobro.id, Cobro.fecha_pago
+
+
+def _ventas():
+    stmt = (
+        select(
+            DetalleCobro.id, DetalleCobro.fecha, DetalleCobro.producto_id,
+            Producto.nombre.label("producto"), Producto.codigo,
+            Categoria.nombre.label("categoria"), DetalleCobro.cantidad, DetalleCobro.subtotal,
+        )
+        .outerjoin(Producto, Producto.id == DetalleCobro.producto_id)
+        .outerjoin(Categoria, Categoria.id == Producto.categoria_id)
+    )
+    return stmt, DetalleCobro.id, DetalleCobro.fecha
+
+
+ENTIDADES = {
+    "equipos": _equipos,
+    "cobros": _cobros,
+    "ventas": _ventas,
+}
+
+
+def columnas(entidad: str) -> List[str]:
+    stmt, _, _ = ENTIDADES[entidad]()
+    return list(stmt.selected_columns.keys())
+
+
+def _limite(dia: date, columna) -> datetime:
+    """Medianoche de `dia` en KPI_TIMEZONE (mismo criterio de día que el dashboard)."""
+    instante = datetime.combine(dia, time.min, tzinfo=KPI_TIMEZONE)
+    if not getattr(columna.type, "timezone", False):
+        # columnas sin zona guardan UTC (datetime.utcnow)
+        return instante.astimezone(timezone.utc).replace(tzinfo=None)
+    return instante
+
+
+# =====================================================
+# 📤 Lectura por lotes
+# =====================================================
+def iter_lotes(
+    entidad: str,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    lote: int = EXPORT_LOTE,
+    engine=_engine,
+) -> Iterator[list]:
+    """Lotes de filas en orden de id; `desde`/`hasta` son días inclusivos."""
+    base, id_col, fecha_col = ENTIDADES[entidad]()
+    if desde:
+        base = base.where(fecha_col >= _limite(desde, fecha_col))
+    if hasta:
+        base = base.where(fecha_col < _limite(hasta + timedelta(days=1), fecha_col))
+
+    ultimo = None
+    while True:
+        stmt = base if ultimo is None else base.where(id_col > ultimo)
+        # la misma sentencia por lote es lo esperado, no un N+1
+        with query_guard.pausar(), engine.connect() as conn:
+            filas = conn.execute(stmt.order_by(id_col).limit(lote)).all()
+        if not filas:
+            return
+        yield filas
+        if len(filas) < lote:
+            return
+        ultimo = filas[-1].id
@@ -1,7 +1,14 @@
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from utils import clock
 from models.productos import Producto
+from models.categoria import Categoria
 from models.detalle_cobro import DetalleCobro
 from schemas.productos import ProductoCreate, ProductoUpdate
+from services.search import apply_search
+from services import catalog_cache, kpi
 
 # -----------------------------------------------------
 # CRUD base
@@ -11,10 +18,87 @@ def get_producto(db: Session, producto_id: int):
     return db.query(Producto).filter(Producto.id == producto_id).first()
 
 
+def get_producto_detalle(db: Session, producto_id: int):
+    """Producto con su categoría en el mismo SELECT; el historial va por list_ventas_producto."""
+    return (
+        db.query(Producto)
+        .options(joinedload(Producto.categoria))
+        .filter(Producto.id == producto_id)
+        .first()
+    )
+
+
 def get_productos(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Producto).offset(skip).limit(limit).all()
 
 
+# -----------------------------------------------------
+# Listado con filtros y búsqueda (GET /productos)
+# -----------------------------------------------------
+
+# tope de productos por página (acota la respuesta cacheada del catálogo)
+MAX_CATALOGO_PAGE = 200
+
+
+def _list_productos_stmt(
+    skip: int = 0,
+    limit: int = 50,
+    categoria_id: Optional[int] = None,
+    categoria_nombre: Optional[str] = None,
+    q: Optional[str] = None,
+):
+    limit = max(1, min(limit, MAX_CATALOGO_PAGE))
+    # categoría precargada (en AsyncSession no hay lazy-load implícito);
+    # el historial de ventas no se carga: ver list_ventas_producto
+    stmt = select(Producto).options(selectinload(Producto.categoria))
+
+    if categoria_id is not None:
+        stmt = stmt.where(Producto.categoria_id == categoria_id)
+
+    if categoria_nombre:
+        stmt = stmt.join(Producto.categoria).where(Categoria.nombre.ilike(f"%{categoria_nombre}%"))
+
+    if q:
+        # nombre + descripción + código, sin acentos, ordenado por relevancia
+        stmt = apply_search(stmt, "productos", q)
+
+    return stmt.offset(skip).limit(limit)
+
+
+def list_productos(db: Session, **filtros) -> List[Producto]:
+    return list(db.execute(_list_productos_stmt(**filtros)).scalars())
+
+
+async def list_productos_async(db: AsyncSession, **filtros) -> List[Producto]:
+    return list((await db.execute(_list_productos_stmt(**filtros))).scalars())
+
+
+# -----------------------------------------------------
+# Ventas de un producto (GET /productos/{id}/ventas)
+# -----------------------------------------------------
+MAX_VENTAS_PAGE = 200
+
+
+def list_ventas_producto(
+    db: Session,
+    producto_id: int,
+    limit: int = 50,
+    antes_de: Optional[int] = None,
+) -> Tuple[List[DetalleCobro], Optional[int]]:
+    """
+    Página de detalles de cobro del producto, más recientes primero.
+    Paginación por id (keyset): devuelve (items, cursor siguiente o None).
+    """
+    limit = max(1, min(limit, MAX_VENTAS_PAGE))
+    stmt = select(DetalleCobro).where(DetalleCobro.producto_id == producto_id)
+    if antes_de is not None:
+        stmt = stmt.where(DetalleCobro.id < antes_de)
+    # uno de más para saber si hay otra página
+    items = list(db.execute(stmt.order_by(DetalleCobro.id.desc()).limit(limit + 1)).scalars())
+    siguiente = items[limit - 1].id if len(items) > limit else None
+    return items[:limit], siguiente
+
+
 def create_producto(db: Session, producto: ProductoCreate):
 
     # -------- VALIDACIONES --------
@@ -30,6 +114,7 @@ def create_producto(db: Session, producto: ProductoCreate):
     db_producto = Producto(**producto.dict())
     db.add(db_producto)
     db.commit()
+    catalog_cache.bump()
     db.refresh(db_producto)
     return db_producto
 
@@ -60,6 +145,7 @@ def update_producto(db: Session, producto_id: int, producto: ProductoUpdate):
         setattr(db_producto, key, value)
 
     db.commit()
+    catalog_cache.bump()
     db.refresh(db_producto)
     return db_producto
 
@@ -71,9 +157,36 @@ def delete_producto(db: Session, producto_id: int):
 
     db.delete(db_producto)
     db.commit()
+    catalog_cache.bump()
     return True  # 🔹 mejor para el router
 
 
+def set_producto_foto(db: Session, producto_id: int, foto_url: str):
+    db_producto = get_producto(db, producto_id)
+    if not db_producto:
+        return None
+
+    db_producto.foto_url = foto_url
+    db_producto.foto_variantes = None  # eran de la foto anterior
+    db.commit()
+    catalog_cache.bump()
+    db.refresh(db_producto)
+    return db_producto
+
+
+def set_producto_foto_variantes(db: Session, producto_id: int, foto_url: str, variantes: dict) -> bool:
+    """Guarda las URLs de los derivados si la foto no cambió mientras se generaban."""
+    resultado = db.execute(
+        update(Producto.__table__)
+        .where(Producto.id == producto_id, Producto.foto_url == foto_url)
+        .values(foto_variantes=variantes)
+    )
+    db.commit()
+    if resultado.rowcount:
+        catalog_cache.bump()
+    return resultado.rowcount > 0
+
+
 # -----------------------------------------------------
 # 🚀 Nueva función: registrar venta y actualizar stock
 # -----------------------------------------------------
@@ -82,6 +195,8 @@ def registrar_venta(db: Session, producto_id: int, cantidad_vendida: int):
     """
     Resta del stock del producto la cantidad vendida.
     Retorna el producto actualizado o lanza un ValueError si no hay suficiente stock.
+    Como crear_detalles_cobro, guarda el DetalleCobro y suma la venta al
+    resumen del dashboard en la misma transacción.
     """
 
     # Validar cantidad
@@ -100,6 +215,12 @@ def registrar_venta(db: Session, producto_id: int, cantidad_vendida: int):
 
     # 🔻 Restar stock
     producto.stock_actual -= cantidad_vendida
+    producto.unidades_vendidas = (producto.unidades_vendidas or 0) + cantidad_vendida
+    producto.ultima_venta = clock.now()
+
+    subtotal = producto.precio_venta * cantidad_vendida
+    db.add(DetalleCobro(producto_id=producto.id, cantidad=cantidad_vendida, subtotal=subtotal))
+    kpi.sumar_ventas(db.connection(), [(producto.categoria_id, cantidad_vendida, subtotal)])
 
     # ⚠️ Verificar si queda por debajo del mínimo
     alerta = None
@@ -110,6 +231,7 @@ def registrar_venta(db: Session, producto_id: int, cantidad_vendida: int):
         )
 
     db.commit()
+    catalog_cache.bump()
     db.refresh(producto)
 
     return {
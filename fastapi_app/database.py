@@ -1,16 +1,143 @@
 # database.py
 import os
+import time
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 
 # 🔹 Leer la URL de la base de datos desde variable de entorno
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL no está configurada. Define la variable de entorno en Render o localmente")
 
+
+# 🔹 Configuración del pool (ENV)
+def _env_bool(name: str, default: bool) -> bool:
+    return str(os.getenv(name, "1" if default else "0")).lower() in ("1", "true", "yes")
+
+
+# DB_POOL_SIZE / DB_MAX_OVERFLOW son el presupuesto TOTAL del proceso: se
+# reparte entre el engine síncrono y el async (DB_ASYNC_*, por defecto la
+# mitad), así el async no duplica las conexiones por worker.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_ASYNC_POOL_SIZE = max(1, int(os.getenv("DB_ASYNC_POOL_SIZE", str(DB_POOL_SIZE // 2))))
+DB_ASYNC_MAX_OVERFLOW = max(0, int(os.getenv("DB_ASYNC_MAX_OVERFLOW", str(DB_MAX_OVERFLOW // 2))))
+DB_SYNC_POOL_SIZE = max(1, DB_POOL_SIZE - DB_ASYNC_POOL_SIZE)
+DB_SYNC_MAX_OVERFLOW = max(0, DB_MAX_OVERFLOW - DB_ASYNC_MAX_OVERFLOW)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+
+# 🔹 Estadísticas de espera en el pool
+class _PoolWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0          # checkouts que tardaron > 1 ms en obtener conexión
+        self.timeouts = 0       # checkouts que agotaron DB_POOL_TIMEOUT
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        # callbacks (elapsed, timed_out), p. ej. services.metrics
+        self.observers = []
+
+    def record(self, elapsed: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            if timed_out:
+                self.timeouts += 1
+            if elapsed > 0.001:
+                self.waits += 1
+            self.wait_total_s += elapsed
+            self.wait_max_s = max(self.wait_max_s, elapsed)
+        for observer in self.observers:
+            observer(elapsed, timed_out)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "wait_total_s": round(self.wait_total_s, 6),
+                "wait_max_s": round(self.wait_max_s, 6),
+            }
+
+
+pool_wait_stats = _PoolWaitStats()        # engine síncrono
+async_pool_wait_stats = _PoolWaitStats()  # engine async
+
+
+class _TimedCheckout:
+    """Mide cuánto espera cada checkout por una conexión libre."""
+
+    wait_stats = pool_wait_stats
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - t0, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - t0)
+        return conn
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool del engine síncrono."""
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """Pool del engine async (asyncpg / aiosqlite)."""
+
+    wait_stats = async_pool_wait_stats
+
+
+# 🔹 Fábrica única de engine (un solo pool por proceso)
+def _engine_kwargs(url: str) -> dict:
+    backend = make_url(url).get_backend_name()
+    kwargs = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+
+    if backend == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+        database = make_url(url).database
+        if not database or database == ":memory:":
+            # una sola conexión compartida para que todas las sesiones vean las mismas tablas
+            kwargs["poolclass"] = StaticPool
+            return kwargs
+    elif backend == "postgresql":
+        kwargs["connect_args"] = {
+            "connect_timeout": DB_CONNECT_TIMEOUT,
+            "application_name": os.getenv("DB_APPLICATION_NAME", "technicell_api"),
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 5,
+        }
+
+    kwargs.update(
+        poolclass=TimedQueuePool,
+        pool_size=DB_SYNC_POOL_SIZE,
+        max_overflow=DB_SYNC_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    return kwargs
+
+
+def create_app_engine(url: str = DATABASE_URL):
+    return create_engine(url, **_engine_kwargs(url))
+
+
 # 🔹 Crear engine
-engine = create_engine(DATABASE_URL)
+engine = create_app_engine()
 
 # 🔹 Crear sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -25,3 +152,97 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# =====================================================
+# ⚡ Variante ASYNC (asyncpg en Postgres, aiosqlite en SQLite)
+# =====================================================
+# Se crea de forma perezosa: los routers síncronos siguen usando
+# `get_db` y el engine de arriba; solo las rutas calientes usan esta.
+_async_engine = None
+AsyncSessionLocal = None
+
+
+def to_async_url(url: str):
+    """
+    Traduce la URL síncrona al driver async equivalente.
+    Devuelve (url_async, connect_args).
+    """
+    u = make_url(url)
+    backend = u.get_backend_name()
+    connect_args = {}
+
+    if backend == "postgresql":
+        # asyncpg no entiende `sslmode` en la URL: se pasa como `ssl`
+        query = dict(u.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = "require"
+        connect_args["timeout"] = DB_CONNECT_TIMEOUT
+        connect_args["server_settings"] = {
+            "application_name": os.getenv("DB_APPLICATION_NAME", "technicell_api"),
+        }
+        u = u.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+    else:
+        raise RuntimeError(f"No hay driver async configurado para '{backend}'")
+
+    return u, connect_args
+
+
+def get_async_engine():
+    global _async_engine, AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        url, connect_args = to_async_url(DATABASE_URL)
+        kwargs = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING, "connect_args": connect_args}
+        if url.get_backend_name() == "sqlite" and (not url.database or url.database == ":memory:"):
+            kwargs["poolclass"] = StaticPool
+        else:
+            kwargs.update(
+                poolclass=TimedAsyncQueuePool,
+                pool_size=DB_ASYNC_POOL_SIZE,
+                max_overflow=DB_ASYNC_MAX_OVERFLOW,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_timeout=DB_POOL_TIMEOUT,
+            )
+        _async_engine = create_async_engine(url, **kwargs)
+        AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+# 🔹 Dependencia async para FastAPI
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# 🔹 Estado actual de los pools (para /internal/pool y /metrics)
+def _estado_pool(pool, max_overflow: int, stats: _PoolWaitStats) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=max_overflow,
+            timeout_s=DB_POOL_TIMEOUT,
+        )
+    status["wait"] = stats.snapshot()
+    return status
+
+
+def pool_status() -> dict:
+    """Pool síncrono en la raíz; el async en "async" (None si aún no se creó)."""
+    status = _estado_pool(engine.pool, DB_SYNC_MAX_OVERFLOW, pool_wait_stats)
+    status["async"] = None
+    if _async_engine is not None:
+        status["async"] = _estado_pool(_async_engine.pool, DB_ASYNC_MAX_OVERFLOW, async_pool_wait_stats)
+    status["presupuesto"] = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    return status
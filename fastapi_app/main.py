@@ -2,14 +2,13 @@
 
 import os
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from database import Base  # tu Base de modelos
+from fastapi.responses import PlainTextResponse
+from services import qr_decode, email_outbox, image_variants, storage, metrics, query_guard, equipo_eventos
 
 # Routers
 from routers.client import router as clientes_router
 from routers.equipos import router as equipos_router
+from routers.equipos_eventos import router as equipos_eventos_router
 from routers.estados_equipo import router as estados_router
 from routers.historial_reparaciones import router as historial_routers
 from routers.cobros import router as cobros_router
@@ -18,6 +17,10 @@ from routers.productos import router as producto_router
 from routers.user import router as user_router
 from routers.detalle_cobro import router as detalle_cobro_router 
 from routers.ingreso_reparaciones import router as ingreso 
+from routers.internal import router as internal_router
+from routers.outbox import router as outbox_router
+from routers.dashboard import router as dashboard_router
+from routers.export import router as export_router
 
 # Modelos (para que SQLAlchemy conozca las tablas)
 from models.client import Cliente
@@ -29,26 +32,34 @@ from models.productos import Producto
 from models.user import User
 from models.detalle_cobro import DetalleCobro 
 from models.ingreso_reparacion import IngresoReparacion 
+from models.email_outbox import EmailOutbox
+from models.ticket_counter import TicketCounter
+from models.kpi import KpiCobrosDia, KpiEquiposEstado, KpiVentasCategoriaDia
+from models.equipo_evento import EquipoEvento
+from utils import ticket_retention
 
-# 🔹 Configurar base de datos con variable de entorno
-DATABASE_URL = os.getenv("DATABASE_URL")  # Debe estar configurada en Render/Aiven
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL no está configurada")
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# 🔹 Crear tablas (solo si no usas Alembic)
-Base.metadata.create_all(bind=engine)
+# 🔹 El esquema (tablas, columnas, índices) se aplica con `python migrate.py`
+#    antes de arrancar: importar la app no hace viajes a la BD.
 
 # 🔹 Inicializar FastAPI
 app = FastAPI(title="Technicell API")
 
+# 🔹 Detector de N+1 / consultas lentas por petición (QUERY_GUARD_STRICT=1 en tests).
+#    Usa los eventos SQL de metrics: se añade antes para quedar por dentro.
+app.add_middleware(query_guard.QueryGuardMiddleware)
+
+# 🔹 Métricas (latencia por ruta, sentencias SQL por petición, pool) -> GET /metrics
+metrics.install()
+app.add_middleware(metrics.MetricsMiddleware)
+
 # 🔹 Servir archivos estáticos (fotos)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# /static: disco local y, con STORAGE_BACKEND=s3, el bucket compartido
+app.mount("/static", storage.static_files("static"), name="static")
 
 # 🔹 Incluir routers con prefijos claros
 app.include_router(clientes_router, prefix="/clientes")
+# antes que equipos_router: /eventos chocaría con /{equipo_id}
+app.include_router(equipos_eventos_router, prefix="/equipos")
 app.include_router(equipos_router, prefix="/equipos")
 app.include_router(estados_router, prefix="/estados")
 app.include_router(historial_routers, prefix="/historial")
@@ -58,12 +69,59 @@ app.include_router(producto_router, prefix="/productos")
 app.include_router(user_router, prefix="/users")
 app.include_router(detalle_cobro_router , prefix="/detalle-cobro")
 app.include_router(ingreso , prefix="/ingreso")
+app.include_router(internal_router)
+app.include_router(outbox_router)
+app.include_router(dashboard_router)
+app.include_router(export_router)
+
+# 🔹 Solo desarrollo: aplicar el esquema al arrancar (MIGRATE_ON_STARTUP=1)
+@app.on_event("startup")
+def _migrate_on_startup():
+    if os.environ.get("MIGRATE_ON_STARTUP", "0").lower() in ("1", "true", "yes"):
+        import migrate
+
+        migrate.run()
+
+
+# 🔹 Worker de correos (EMAIL_OUTBOX_WORKER=0 para no arrancarlo en este proceso)
+@app.on_event("startup")
+def _start_email_outbox():
+    if os.environ.get("EMAIL_OUTBOX_WORKER", "1").lower() in ("1", "true", "yes"):
+        email_outbox.start()
+
+
+# 🔹 Push de equipos: LISTEN de Postgres y limpieza de equipo_eventos
+@app.on_event("startup")
+def _start_equipo_eventos():
+    equipo_eventos.start()
+
+
+# 🔹 Limpieza periódica de tickets PDF (fuera de las peticiones)
+@app.on_event("startup")
+def _start_ticket_retention():
+    ticket_retention.start()
+
+
+# 🔹 Liberar pools en segundo plano al apagar
+@app.on_event("shutdown")
+def _shutdown_pools():
+    qr_decode.shutdown()
+    email_outbox.stop()
+    image_variants.shutdown()
+    equipo_eventos.stop()
+
 
 # 🔹 Endpoint raíz simple
 @app.get("/")
 def root():
     return {"ok": True, "service": "Technicell API"}
 
+
+# 🔹 Métricas en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # 🔹 Configuración para correr en Render
 if __name__ == "__main__":
     import uvicorn
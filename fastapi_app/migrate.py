@@ -0,0 +1,225 @@
+# migrate.py
+"""
+Paso explícito de esquema: crea tablas, columnas e índices.
+
+La app ya no toca el esquema al importarse ni al arrancar (eran varios
+viajes a la BD antes de poder abrir el puerto). Correr antes de arrancar
+cada versión nueva:
+
+    python migrate.py && uvicorn main:app ...
+
+En Render: como "Pre-Deploy Command" o delante del start command.
+Para desarrollo local, MIGRATE_ON_STARTUP=1 hace que main.py lo ejecute
+al arrancar.
+
+Orden: create_all (tablas nuevas) -> búsqueda y resumen de ventas
+(idempotentes) -> migraciones versionadas pendientes de migrations/.
+En Postgres un advisory lock evita que dos réplicas migren a la vez.
+
+    python migrate.py            aplica lo pendiente
+    python migrate.py --status   versiones aplicadas / pendientes
+    python migrate.py --check    índices declarados en los modelos que
+                                 faltan en la BD y FKs sin índice
+                                 (sale con 1 si hay faltantes)
+"""
+import sys
+import json
+import time
+import logging
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger("migrate")
+
+# clave del pg_advisory_lock (cualquier entero fijo de la app)
+_LOCK_ID = 7271001
+
+
+def _registrar_modelos() -> None:
+    # create_all solo conoce las tablas de los modelos importados
+    import models.client  # noqa: F401
+    import models.equipo  # noqa: F401
+    import models.estado_equipo  # noqa: F401
+    import models.historial_reparaciones  # noqa: F401
+    import models.cobros  # noqa: F401
+    import models.categoria  # noqa: F401
+    import models.productos  # noqa: F401
+    import models.user  # noqa: F401
+    import models.detalle_cobro  # noqa: F401
+    import models.ingreso_reparacion  # noqa: F401
+    import models.email_outbox  # noqa: F401
+    import models.ticket_counter  # noqa: F401
+    import models.kpi  # noqa: F401
+    import models.equipo_evento  # noqa: F401
+
+
+def _engine(engine=None):
+    from database import engine as _default
+
+    return engine or _default
+
+
+# =====================================================
+# 🗂️ Versiones aplicadas
+# =====================================================
+def _asegurar_tabla_versiones(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "nombre VARCHAR NOT NULL, "
+            "aplicada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+
+
+def aplicadas(engine=None) -> set:
+    engine = _engine(engine)
+    _asegurar_tabla_versiones(engine)
+    with engine.connect() as conn:
+        return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+@contextmanager
+def _lock(engine):
+    """Un solo migrador a la vez (Postgres); en SQLite no hace falta."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_ID})
+
+
+# =====================================================
+# 🚀 Aplicar
+# =====================================================
+def run(engine=None) -> list:
+    """Aplica todo lo pendiente. Devuelve las versiones aplicadas en esta corrida."""
+    from database import Base
+    from services.search import setup_search
+    from services.resumen_ventas import setup_resumen_ventas
+    import migrations
+
+    engine = _engine(engine)
+    _registrar_modelos()
+
+    with _lock(engine):
+        # 🔹 Tablas nuevas (create_all no altera tablas existentes)
+        Base.metadata.create_all(bind=engine)
+
+        # 🔹 Columnas normalizadas + índices de búsqueda (pg_trgm / FTS5)
+        setup_search(engine)
+
+        # 🔹 Columnas de ventas pre-agregadas en productos
+        setup_resumen_ventas(engine)
+
+        # 🔹 Migraciones versionadas
+        hechas = aplicadas(engine)
+        nuevas = []
+        for m in migrations.cargar():
+            if m.version in hechas:
+                continue
+            t0 = time.perf_counter()
+            logger.info("Aplicando migración %s (%s)", m.nombre, m.descripcion)
+            if m.transaccional:
+                with engine.begin() as conn:
+                    m.upgrade(conn)
+                    _registrar_version(conn, m)
+            else:
+                # p. ej. CREATE INDEX CONCURRENTLY: fuera de transacción.
+                # upgrade es idempotente: si falla a medias se reintenta completa.
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    m.upgrade(conn)
+                with engine.begin() as conn:
+                    _registrar_version(conn, m)
+            logger.info("Migración %s aplicada en %.2fs", m.nombre, time.perf_counter() - t0)
+            nuevas.append(m.version)
+    return nuevas
+
+
+def _registrar_version(conn, m) -> None:
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, nombre) VALUES (:v, :n)"),
+        {"v": m.version, "n": m.nombre},
+    )
+
+
+def status(engine=None) -> list:
+    import migrations
+
+    hechas = aplicadas(engine)
+    return [
+        {"version": m.version, "nombre": m.nombre, "aplicada": m.version in hechas}
+        for m in migrations.cargar()
+    ]
+
+
+# =====================================================
+# 🔍 Revisión de índices
+# =====================================================
+def check(engine=None) -> list:
+    """
+    Compara los modelos con la BD viva. Reporta:
+    - índices declarados en los modelos (Index / index=True) que no existen;
+    - FKs sin ningún índice que empiece por esa columna (ni PK).
+    Solo revisa tablas que ya existen (las que faltan las crea create_all).
+    """
+    from database import Base
+
+    engine = _engine(engine)
+    _registrar_modelos()
+    faltantes = []
+
+    with engine.connect() as conn:
+        insp = inspect(conn)
+        existentes = set(insp.get_table_names())
+        for tabla in Base.metadata.sorted_tables:
+            if tabla.name not in existentes:
+                continue
+            vivos = insp.get_indexes(tabla.name)
+            nombres_vivos = {i["name"] for i in vivos}
+            primeras = {(i.get("column_names") or [None])[0] for i in vivos}
+            primeras |= {(u.get("column_names") or [None])[0] for u in insp.get_unique_constraints(tabla.name)}
+            pk = insp.get_pk_constraint(tabla.name).get("constrained_columns") or []
+            if pk:
+                primeras.add(pk[0])
+
+            for indice in tabla.indexes:
+                if indice.name not in nombres_vivos:
+                    faltantes.append({
+                        "tabla": tabla.name,
+                        "indice": indice.name,
+                        "columnas": [str(e) for e in indice.expressions],
+                        "motivo": "declarado en el modelo, no existe en la BD",
+                    })
+
+            for fk in tabla.foreign_keys:
+                columna = fk.parent.name
+                if columna not in primeras:
+                    faltantes.append({
+                        "tabla": tabla.name,
+                        "indice": None,
+                        "columnas": [columna],
+                        "motivo": f"FK a {fk.target_fullname} sin índice",
+                    })
+    return faltantes
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    if "--status" in sys.argv:
+        print(json.dumps(status(), indent=2, ensure_ascii=False))
+    elif "--check" in sys.argv:
+        faltantes = check()
+        print(json.dumps(faltantes, indent=2, ensure_ascii=False))
+        if faltantes:
+            print(f"{len(faltantes)} índice(s) faltante(s): correr `python migrate.py`", file=sys.stderr)
+            sys.exit(1)
+    else:
+        t0 = time.perf_counter()
+        nuevas = run()
+        print(f"Esquema al día ({time.perf_counter() - t0:.2f}s); migraciones aplicadas: {nuevas or 'ninguna'}")
@@ -0,0 +1,76 @@
+# migrations/__init__.py
+"""
+Migraciones versionadas (las aplica migrate.py, en orden, una sola vez).
+
+Cada módulo `vNNNN_<nombre>.py` define:
+  VERSION        entero creciente
+  DESCRIPCION    texto corto
+  TRANSACCIONAL  False si no puede correr dentro de una transacción
+                 (p. ej. CREATE INDEX CONCURRENTLY en Postgres)
+  upgrade(conn)  aplica el cambio; debe ser idempotente (IF NOT EXISTS)
+
+Las versiones aplicadas se registran en la tabla schema_migrations.
+Las de esquema son fotos fijas (SQL escrito, sin importar modelos); las
+de datos pueden reutilizar funciones de services/.
+"""
+import pkgutil
+import importlib
+import logging
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger("migrate")
+
+
+class Migracion(NamedTuple):
+    version: int
+    nombre: str
+    descripcion: str
+    transaccional: bool
+    upgrade: Callable
+
+
+def cargar() -> List[Migracion]:
+    migraciones = []
+    for info in pkgutil.iter_modules(__path__):
+        if not info.name.startswith("v"):
+            continue
+        mod = importlib.import_module(f"{__name__}.{info.name}")
+        migraciones.append(Migracion(
+            version=mod.VERSION,
+            nombre=info.name,
+            descripcion=mod.DESCRIPCION,
+            transaccional=getattr(mod, "TRANSACCIONAL", True),
+            upgrade=mod.upgrade,
+        ))
+    migraciones.sort(key=lambda m: m.version)
+    versiones = [m.version for m in migraciones]
+    if len(set(versiones)) != len(versiones):
+        raise RuntimeError(f"Versiones de migración repetidas: {versiones}")
+    return migraciones
+
+
+# =====================================================
+# 🔧 Utilidades para migraciones
+# =====================================================
+def crear_indice(conn, nombre: str, tabla: str, columnas: str, unique: bool = False) -> None:
+    """
+    CREATE INDEX IF NOT EXISTS; en Postgres con CONCURRENTLY (no bloquea
+    escrituras en tablas grandes). Requiere conexión en AUTOCOMMIT.
+
+    Un CONCURRENTLY interrumpido deja un índice INVALID que IF NOT EXISTS
+    daría por bueno: se elimina y se vuelve a crear.
+    """
+    tipo = "UNIQUE INDEX" if unique else "INDEX"
+    if conn.dialect.name == "postgresql":
+        valido = conn.execute(text(
+            "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :n"
+        ), {"n": nombre}).scalar()
+        if valido is False:
+            logger.warning("Índice %s inválido (build interrumpido): se recrea", nombre)
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {nombre}"))
+        conn.execute(text(f"CREATE {tipo} CONCURRENTLY IF NOT EXISTS {nombre} ON {tabla} ({columnas})"))
+    else:
+        conn.execute(text(f"CREATE {tipo} IF NOT EXISTS {nombre} ON {tabla} ({columnas})"))
@@ -0,0 +1,41 @@
+# migrations/v0001_indices_fk_y_filtros.py
+"""
+Índices para llaves foráneas y columnas de filtro/orden.
+
+create_all solo crea índices en tablas nuevas: en BDs existentes faltan
+estos (y los compuestos que ya declaraban equipos y email_outbox).
+"""
+from migrations import crear_indice
+
+VERSION = 1
+DESCRIPCION = "Índices de FKs y filtros (equipos, estados, historial, cobros, ventas, productos, ingresos)"
+TRANSACCIONAL = False  # CREATE INDEX CONCURRENTLY
+
+# (nombre, tabla, columnas) — el nombre coincide con el declarado en models/
+INDICES = [
+    # equipos: cliente y listado principal (ver crud.equipos._list_equipos_stmt)
+    ("ix_equipos_cliente_id", "equipos", "cliente_id"),
+    ("ix_equipos_listado", "equipos", "archived, estado, fecha_ingreso DESC, id DESC"),
+    ("ix_equipos_listado_todos", "equipos", "archived, fecha_ingreso DESC, id DESC"),
+    # listar_estados_equipo: WHERE equipo_id ORDER BY fecha_inicio DESC
+    ("ix_estados_equipos_equipo_fecha", "estados_equipos", "equipo_id, fecha_inicio DESC"),
+    # historial por equipo: WHERE equipo_id ORDER BY fecha_reparacion DESC
+    ("ix_historial_reparaciones_equipo_fecha", "historial_reparaciones", "equipo_id, fecha_reparacion DESC"),
+    # cobros por cliente / equipo / fecha
+    ("ix_cobros_cliente_id", "cobros", "cliente_id"),
+    ("ix_cobros_equipo_id", "cobros", "equipo_id"),
+    ("ix_cobros_fecha_pago", "cobros", "fecha_pago"),
+    # ventas de un producto (keyset por id)
+    ("ix_detalle_cobros_producto_id", "detalle_cobros", "producto_id, id"),
+    # catálogo por categoría
+    ("ix_productos_categoria_id", "productos", "categoria_id"),
+    ("ix_ingreso_reparaciones_cliente_id", "ingreso_reparaciones", "cliente_id"),
+    # worker de correos; equipo_id: ON DELETE SET NULL al borrar equipos
+    ("ix_email_outbox_pendientes", "email_outbox", "status, next_attempt_at"),
+    ("ix_email_outbox_equipo_id", "email_outbox", "equipo_id"),
+]
+
+
+def upgrade(conn) -> None:
+    for nombre, tabla, columnas in INDICES:
+        crear_indice(conn, nombre, tabla, columnas)
@@ -0,0 +1,15 @@
+# migrations/v0002_kpi_dashboard.py
+"""
+Llena las tablas resumen del dashboard (kpi_cobros_dia, kpi_equipos_estado)
+con el historial existente. Las tablas las crea create_all (models/kpi.py);
+desde aquí en adelante las mantiene services/kpi.py.
+"""
+VERSION = 2
+DESCRIPCION = "Carga inicial de los KPIs del dashboard"
+TRANSACCIONAL = True
+
+
+def upgrade(conn) -> None:
+    from services import kpi
+
+    kpi.reconstruir(conn)
@@ -0,0 +1,22 @@
+# migrations/v0003_detalle_cobros_fecha.py
+"""
+Fecha de venta en detalle_cobros (filtro por rango de /export/ventas).
+
+Las ventas anteriores quedan con fecha NULL: no se guardaba en ningún
+lado. Salen en la exportación completa, no en las filtradas por fecha.
+"""
+from sqlalchemy import inspect, text
+
+from migrations import crear_indice
+
+VERSION = 3
+DESCRIPCION = "detalle_cobros.fecha + índice"
+TRANSACCIONAL = False  # CREATE INDEX CONCURRENTLY
+
+
+def upgrade(conn) -> None:
+    columnas = {c["name"] for c in inspect(conn).get_columns("detalle_cobros")}
+    if "fecha" not in columnas:
+        tipo = "TIMESTAMP WITH TIME ZONE" if conn.dialect.name == "postgresql" else "TIMESTAMP"
+        conn.execute(text(f"ALTER TABLE detalle_cobros ADD COLUMN fecha {tipo}"))
+    crear_indice(conn, "ix_detalle_cobros_fecha", "detalle_cobros", "fecha")
@@ -0,0 +1,20 @@
+# migrations/v0004_foto_variantes.py
+"""
+Columna foto_variantes en equipos y productos: las URLs de los derivados
+se guardan al generarlos, en vez de consultar el storage al serializar.
+
+Las fotos ya subidas quedan en NULL (se sirve el original) hasta correr
+    python -m services.image_variants
+"""
+from sqlalchemy import inspect, text
+
+VERSION = 4
+DESCRIPCION = "equipos.foto_variantes y productos.foto_variantes"
+
+
+def upgrade(conn) -> None:
+    insp = inspect(conn)
+    for tabla in ("equipos", "productos"):
+        columnas = {c["name"] for c in insp.get_columns(tabla)}
+        if "foto_variantes" not in columnas:
+            conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN foto_variantes JSON"))
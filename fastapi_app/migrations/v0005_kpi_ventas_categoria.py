@@ -0,0 +1,14 @@
+# migrations/v0005_kpi_ventas_categoria.py
+"""
+Carga kpi_ventas_categoria_dia (ventas por día y categoría del dashboard)
+desde detalle_cobros. Solo cuentan las ventas con fecha (v0003).
+"""
+VERSION = 5
+DESCRIPCION = "Carga inicial de ventas por día y categoría"
+TRANSACCIONAL = True
+
+
+def upgrade(conn) -> None:
+    from services import kpi
+
+    kpi.reconstruir_ventas(conn)
@@ -0,0 +1,38 @@
+# migrations/v0006_equipos_fecha_ingreso.py
+"""
+equipos.fecha_ingreso NOT NULL: es la clave de la paginación keyset
+(crud/equipos.py) y una fila en NULL daba un cursor {"f": null} que
+luego no se podía decodificar (400), además de ordenarse distinto en
+Postgres (NULLS FIRST en DESC) y en SQLite (al final).
+
+Las filas en NULL toman el primer cambio de estado registrado del
+equipo o, si no hay, una fecha fija antigua (quedan al final del
+listado).
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+VERSION = 6
+DESCRIPCION = "Rellenar equipos.fecha_ingreso NULL y marcarla NOT NULL"
+TRANSACCIONAL = True
+
+FECHA_DESCONOCIDA = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def upgrade(conn) -> None:
+    fecha = FECHA_DESCONOCIDA
+    if conn.dialect.name != "postgresql":
+        # SQLite guarda la fecha sin zona (UTC)
+        fecha = fecha.replace(tzinfo=None)
+    conn.execute(
+        text(
+            "UPDATE equipos SET fecha_ingreso = COALESCE("
+            "(SELECT MIN(fecha_inicio) FROM estados_equipos WHERE equipo_id = equipos.id), :fecha) "
+            "WHERE fecha_ingreso IS NULL"
+        ),
+        {"fecha": fecha},
+    )
+    if conn.dialect.name == "postgresql":
+        # SQLite no permite ALTER COLUMN: ahí lo garantizan los defaults del modelo
+        conn.execute(text("ALTER TABLE equipos ALTER COLUMN fecha_ingreso SET NOT NULL"))
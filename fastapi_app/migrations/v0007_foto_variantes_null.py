@@ -0,0 +1,20 @@
+# migrations/v0007_foto_variantes_null.py
+"""
+foto_variantes se declaraba JSON con none_as_null=False: al reemplazar una
+foto, `foto_variantes = None` guardaba el JSON 'null' y no SQL NULL, así
+que generar_pendientes() (filtra IS NULL) nunca reintentaba esas filas.
+El modelo ya usa none_as_null=True; aquí se limpian los 'null' guardados.
+"""
+from sqlalchemy import text
+
+VERSION = 7
+DESCRIPCION = "foto_variantes 'null' (JSON) -> NULL"
+TRANSACCIONAL = True
+
+
+def upgrade(conn) -> None:
+    for tabla in ("equipos", "productos"):
+        conn.execute(text(
+            f"UPDATE {tabla} SET foto_variantes = NULL "
+            f"WHERE foto_variantes IS NOT NULL AND CAST(foto_variantes AS TEXT) = 'null'"
+        ))
@@ -10,6 +10,9 @@ class Cliente(Base):
     telefono = Column(String, unique=True, nullable=False)
     correo = Column(String, nullable=True)
 
+    # nombre normalizado (minúsculas, sin acentos) para búsqueda: services/search.py
+    nombre_busqueda = Column(String, nullable=True)
+
     __table_args__ = (
         UniqueConstraint('telefono', name='uq_cliente_telefono'),
     )
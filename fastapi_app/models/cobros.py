@@ -21,12 +21,12 @@ class Cobro(Base):
     __tablename__ = "cobros"
 
     id = Column(Integer, primary_key=True, index=True)
-    cliente_id = Column(Integer, ForeignKey("clientes.id"))
-    equipo_id = Column(Integer, ForeignKey("equipos.id"))
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), index=True)
+    equipo_id = Column(Integer, ForeignKey("equipos.id"), index=True)
     monto_total = Column(Float, nullable=False)
     anticipo = Column(Float, default=0.0)
     saldo_pendiente = Column(Float, nullable=False)
-    fecha_pago = Column(DateTime, default=datetime.utcnow)
+    fecha_pago = Column(DateTime, default=datetime.utcnow, index=True)
     metodo_pago = Column(Enum(MetodoPagoEnum), nullable=False)
 
     # Relaciones
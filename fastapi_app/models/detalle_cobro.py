@@ -1,7 +1,8 @@
 # models/detalle_cobro.py
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index, DateTime
 from sqlalchemy.orm import relationship
 from database import Base
+from utils import clock
 
 class DetalleCobro(Base):
     __tablename__ = "detalle_cobros"
@@ -10,5 +11,12 @@ class DetalleCobro(Base):
     producto_id = Column(Integer, ForeignKey("productos.id"))
     cantidad = Column(Integer, nullable=False)
     subtotal = Column(Float, nullable=False)
+    # filtros por fecha de /export/ventas (NULL en ventas anteriores a la migración v0003)
+    fecha = Column(DateTime(timezone=True), nullable=True, default=clock.now, index=True)
 
     producto = relationship("Producto")
+
+    # ventas de un producto (keyset): WHERE producto_id [AND id < ?] ORDER BY id DESC
+    __table_args__ = (
+        Index("ix_detalle_cobros_producto_id", "producto_id", "id"),
+    )
@@ -0,0 +1,36 @@
+# models/email_outbox.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from database import Base
+from utils import clock
+
+
+class EmailOutbox(Base):
+    """
+    Correos pendientes de enviar. La API solo inserta aquí;
+    services/email_outbox.py los entrega en segundo plano.
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    equipo_id = Column(Integer, ForeignKey("equipos.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body_html = Column(Text, nullable=False)
+    body_text = Column(Text, nullable=False)
+
+    # pendiente | enviando | enviado | fallido
+    status = Column(String, nullable=False, default="pendiente")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), default=clock.now, server_default=func.now())
+    next_attempt_at = Column(DateTime(timezone=True), default=clock.now, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # el worker busca: status = 'pendiente' AND next_attempt_at <= now
+        Index("ix_email_outbox_pendientes", "status", "next_attempt_at"),
+    )
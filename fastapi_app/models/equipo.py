@@ -6,26 +6,12 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Boolean,
+    Index,
 )
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from database import Base
-from datetime import datetime
-import requests
-
-
-def get_internet_time() -> datetime:
-    try:
-        resp = requests.get(
-            "http://worldtimeapi.org/api/timezone/Etc/UTC", timeout=5
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return datetime.fromisoformat(
-                data["utc_datetime"].replace("Z", "+00:00")
-            )
-    except Exception:
-        pass
-    return datetime.utcnow()
+from utils import clock
 
 
 class Equipo(Base):
@@ -36,12 +22,14 @@ class Equipo(Base):
     # ==========================
     # CLIENTE
     # ==========================
-    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False, index=True)
 
     # Copias para evitar joins
     cliente_nombre = Column(String, nullable=False)
     cliente_numero = Column(String, nullable=False)
     cliente_correo = Column(String, nullable=True)
+    # cliente_nombre normalizado para búsqueda (services/search.py)
+    cliente_nombre_busqueda = Column(String, nullable=True)
 
     cliente = relationship("Cliente", back_populates="equipos")
 
@@ -50,6 +38,8 @@ class Equipo(Base):
     # ==========================
     qr_url = Column(String, nullable=True)
     foto_url = Column(String, nullable=True)
+    # URLs de miniatura/medio por foto, las guarda services/image_variants al terminar
+    foto_variantes = Column(JSON(none_as_null=True), nullable=True)  # None = SQL NULL, no 'null'
 
     # ==========================
     # DATOS DEL EQUIPO
@@ -71,8 +61,9 @@ class Equipo(Base):
     # ==========================
     # FECHAS
     # ==========================
+    # NOT NULL: clave de la paginación keyset (migración v0006)
     fecha_ingreso = Column(
-        DateTime(timezone=True), default=get_internet_time
+        DateTime(timezone=True), nullable=False, default=clock.now, server_default=func.now()
     )
 
     # 👉 cuando se marca como LISTO / ENTREGADO
@@ -99,3 +90,24 @@ class Equipo(Base):
     )
 
     cobros = relationship("Cobro", back_populates="equipo")
+
+    # ==========================
+    # ÍNDICES
+    # ==========================
+    # Listado principal: WHERE archived [AND estado] ORDER BY fecha_ingreso DESC, id DESC
+    __table_args__ = (
+        Index(
+            "ix_equipos_listado",
+            "archived",
+            "estado",
+            fecha_ingreso.desc(),
+            id.desc(),
+        ),
+        # mismo listado sin filtro de estado
+        Index(
+            "ix_equipos_listado_todos",
+            "archived",
+            fecha_ingreso.desc(),
+            id.desc(),
+        ),
+    )
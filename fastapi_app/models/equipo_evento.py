@@ -0,0 +1,30 @@
+# models/equipo_evento.py
+"""
+Bitácora de cambios de equipos para el push en tiempo real
+(services/equipo_eventos.py). El id es el cursor que guardan las tablets
+para reanudar tras una reconexión.
+"""
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Boolean
+from database import Base
+from utils import clock
+
+
+class EquipoEvento(Base):
+    __tablename__ = "equipo_eventos"
+
+    id = Column(Integer, primary_key=True)
+
+    # sin FK: los eventos sobreviven al borrado del equipo
+    equipo_id = Column(Integer, nullable=False)
+
+    # creado | actualizado | estado | archivado
+    tipo = Column(String, nullable=False)
+    estado = Column(String, nullable=True)
+    estado_anterior = Column(String, nullable=True)
+    archived = Column(Boolean, nullable=False, default=False)
+
+    # resumen del equipo (lo que la tablet muestra en la lista)
+    datos = Column(JSON, nullable=True)
+
+    # la limpieza borra por antigüedad (EQUIPO_EVENTOS_RETENCION_HORAS)
+    creado_en = Column(DateTime(timezone=True), nullable=False, default=clock.now, index=True)
@@ -1,5 +1,5 @@
 # models/estado_equipo.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -15,3 +15,8 @@ class EstadoEquipo(Base):
 
     # Relación inversa
     equipo = relationship("Equipo", back_populates="historial_estados")
+
+    # listar_estados_equipo: WHERE equipo_id ORDER BY fecha_inicio DESC
+    __table_args__ = (
+        Index("ix_estados_equipos_equipo_fecha", "equipo_id", fecha_inicio.desc()),
+    )
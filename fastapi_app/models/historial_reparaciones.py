@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -14,3 +14,8 @@ class HistorialReparacion(Base):
     estado_post_reparacion = Column(String, default="Pendiente")
 
     equipo = relationship("Equipo", back_populates="historial_reparaciones")
+
+    # historial por equipo: WHERE equipo_id ORDER BY fecha_reparacion DESC
+    __table_args__ = (
+        Index("ix_historial_reparaciones_equipo_fecha", "equipo_id", fecha_reparacion.desc()),
+    )
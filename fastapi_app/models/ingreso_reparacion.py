@@ -10,7 +10,7 @@ class IngresoReparacion(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # FK opcional
-    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=True)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=True, index=True)
 
     # Datos capturados
     cliente_nombre = Column(String(150), nullable=False)
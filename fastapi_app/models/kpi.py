@@ -0,0 +1,38 @@
+# models/kpi.py
+"""
+Tablas resumen del dashboard (las mantiene services/kpi.py en la misma
+transacción que los cambios de cobros, equipos y ventas).
+"""
+from sqlalchemy import Column, Integer, String, Float, Date, Boolean
+from database import Base
+
+
+class KpiCobrosDia(Base):
+    """Cobros por día (zona KPI_TIMEZONE) y método de pago."""
+    __tablename__ = "kpi_cobros_dia"
+
+    dia = Column(Date, primary_key=True)
+    metodo_pago = Column(String, primary_key=True)
+    cobros = Column(Integer, nullable=False, default=0)
+    monto_total = Column(Float, nullable=False, default=0.0)
+    anticipos = Column(Float, nullable=False, default=0.0)
+    saldo_pendiente = Column(Float, nullable=False, default=0.0)
+
+
+class KpiEquiposEstado(Base):
+    """Equipos por estado (activos y archivados por separado)."""
+    __tablename__ = "kpi_equipos_estado"
+
+    estado = Column(String, primary_key=True)
+    archived = Column(Boolean, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+
+class KpiVentasCategoriaDia(Base):
+    """Unidades y monto vendidos por día (zona KPI_TIMEZONE) y categoría."""
+    __tablename__ = "kpi_ventas_categoria_dia"
+
+    dia = Column(Date, primary_key=True)
+    categoria_id = Column(Integer, primary_key=True)
+    unidades = Column(Integer, nullable=False, default=0)
+    monto = Column(Float, nullable=False, default=0.0)
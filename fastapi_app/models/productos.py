@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, DateTime, JSON
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -8,7 +8,7 @@ class Producto(Base):
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, nullable=False)
     descripcion = Column(String, nullable=True)
-    categoria_id = Column(Integer, ForeignKey("categorias.id"), nullable=False)
+    categoria_id = Column(Integer, ForeignKey("categorias.id"), nullable=False, index=True)
     codigo = Column(String, unique=True, nullable=True)
     precio_venta = Column(Float, nullable=False)
 
@@ -18,6 +18,15 @@ class Producto(Base):
 
     activo = Column(Boolean, default=True)
     foto_url = Column(String, nullable=True)
+    # {"thumb": url, "medium": url}, las guarda services/image_variants al terminar
+    foto_variantes = Column(JSON(none_as_null=True), nullable=True)  # None = SQL NULL, no 'null'
+
+    # nombre + descripción + código normalizados para búsqueda (services/search.py)
+    busqueda = Column(String, nullable=True)
+
+    # 📈 Resumen de ventas (se actualiza en la misma sentencia que el stock)
+    unidades_vendidas = Column(Integer, default=0, server_default="0", nullable=False)
+    ultima_venta = Column(DateTime(timezone=True), nullable=True)
 
     # 🔗 Relaciones
     categoria = relationship("Categoria", back_populates="productos")
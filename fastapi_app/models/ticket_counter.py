@@ -0,0 +1,17 @@
+# models/ticket_counter.py
+from sqlalchemy import Column, Integer, String, Sequence
+from database import Base
+
+# Postgres: numeración de tickets con una secuencia nativa (create_all la crea)
+ticket_numero_seq = Sequence("ticket_numero_seq", start=1, metadata=Base.metadata)
+
+
+class TicketCounter(Base):
+    """
+    Contador atómico para backends sin secuencias (SQLite).
+    Una fila por serie de numeración.
+    """
+    __tablename__ = "ticket_counters"
+
+    nombre = Column(String, primary_key=True)
+    valor = Column(Integer, nullable=False, default=0)
@@ -1,7 +1,8 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from database import get_db
+from services import catalog_cache
 
 # Importar correctamente desde crud.categorias
 from crud import categorias as crud_categorias
@@ -22,11 +23,15 @@ def create_categoria(categoria: CategoriaCreate, db: Session = Depends(get_db)):
     return crud_categorias.create_categoria(db=db, payload=categoria)
 
 @router.get("/", response_model=List[Categoria])
-def list_categorias(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
+def list_categorias(request: Request, skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
     """
     Obtiene una lista de todas las categorías.
+    Servida desde la caché del catálogo (ETag / If-None-Match -> 304).
     """
-    return crud_categorias.list_categorias(db, skip=skip, limit=limit)
+    return catalog_cache.cached_response(
+        request,
+        lambda: [Categoria.from_orm(c) for c in crud_categorias.list_categorias(db, skip=skip, limit=limit)],
+    )
 
 @router.get("/{categoria_id}", response_model=Categoria)
 def get_categoria(categoria_id: int, db: Session = Depends(get_db)):
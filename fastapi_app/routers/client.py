@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from database import SessionLocal
+from database import get_db
 from crud.client import (
     create_client,
     get_clients,
@@ -14,15 +14,6 @@ from schemas.client import ClientCreate, ClientUpdate, ClientOut
 router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
 
-# Dependencia DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # 🔹 Crear cliente
 @router.post("/", response_model=ClientOut)
 def create_client_endpoint(client: ClientCreate, db: Session = Depends(get_db)):
@@ -0,0 +1,30 @@
+# routers/dashboard.py
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from crud import dashboard as crud_dashboard
+from schemas.dashboard import Dashboard
+from services import kpi
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+MAX_DIAS = 366
+
+
+# 🔹 KPIs: ingresos por día y método, anticipos vs saldo, equipos por estado, ventas por categoría
+@router.get("/", response_model=Dashboard)
+def ver_dashboard(
+    desde: Optional[date] = Query(None, description="Default: 29 días antes de `hasta`"),
+    hasta: Optional[date] = Query(None, description="Default: hoy (KPI_TIMEZONE)"),
+    db: Session = Depends(get_db),
+):
+    hasta = hasta or kpi.dia_local()
+    desde = desde or hasta - timedelta(days=29)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="`desde` debe ser anterior o igual a `hasta`")
+    if (hasta - desde).days >= MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"Rango máximo: {MAX_DIAS} días")
+    return crud_dashboard.get_dashboard(db, desde, hasta)
@@ -1,26 +1,49 @@
 # routers/detalle_cobro.py
-from typing import List, Any, Dict, Optional
+from typing import List, Any, Dict, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 import os
 import logging
 
-from database import get_db
+from database import get_async_db
 from crud import detalle_cobro as crud_detalle
-
-# Importa tus generadores de ticket (ajusta nombres/paths si difieren)
-from utils.tickets import generar_ticket_venta_multiple  # ticket venta
-from utils.ticket import generar_ticket_ingreso_reparacion  # ticket reparacion (si está en otro archivo)
+from services import storage
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 router = APIRouter(prefix="/detalle_cobro", tags=["Detalle de Cobro"])
 
 
+def _generar_ticket(es_reparacion: bool, anticipo: float, **datos) -> Tuple[Path, int]:
+    """
+    Genera el PDF y lo publica; devuelve (ruta, tamaño). Todo es bloqueante
+    (folio en BD, ReportLab, subida a S3): se llama con run_in_threadpool.
+    """
+    # Generadores de ticket: ReportLab se importa en el primer ticket, no al arrancar
+    from utils.tickets import generar_ticket_venta_multiple  # ticket venta
+    from utils.ticket import generar_ticket_ingreso_reparacion  # ticket reparacion
+
+    generar = generar_ticket_ingreso_reparacion if es_reparacion else generar_ticket_venta_multiple
+    # intentamos pasar 'anticipo' si la función lo acepta; si no, fallback
+    try:
+        ticket_path = generar(**datos, anticipo=anticipo)
+    except TypeError:
+        ticket_path = generar(**datos)
+
+    # Validar archivo generado
+    file_path = Path(ticket_path)
+    if not file_path.exists():
+        raise HTTPException(status_code=500, detail="Ticket generado pero archivo no encontrado")
+    file_size = file_path.stat().st_size
+    if file_size == 0:
+        raise HTTPException(status_code=500, detail="Ticket generado pero el archivo está vacío")
+    return file_path, file_size
+
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
-async def crear_detalles(request: Request, db: Session = Depends(get_db)):
+async def crear_detalles(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Crea detalles (venta o ingreso por reparacion).
     Acepta:
@@ -83,7 +106,7 @@ async def crear_detalles(request: Request, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="No se enviaron detalles")
 
         # Guardar en BD (tu CRUD debe devolver total y lista de detalles)
-        resultado = crud_detalle.crear_detalles_cobro(db, detalles_payload)
+        resultado = await crud_detalle.crear_detalles_cobro_async(db, detalles_payload)
         lista_detalles = resultado.get("detalles", [])
         total = float(resultado.get("total_general", resultado.get("total", 0.0)))
 
@@ -97,61 +120,26 @@ async def crear_detalles(request: Request, db: Session = Depends(get_db)):
         # Calcular cambio solo si pago efectivo y monto recibido refiere a lo que se entregó ahora
         cambio = max(0.0, monto_recibido_safe - monto_cobrado_ahora) if tipo_pago.lower() == "efectivo" else 0.0
 
-        # Generar ticket: intentamos pasar 'anticipo' si la función lo acepta; si no, fallback
-        ticket_path: Optional[str] = None
+        # Ticket fuera del event loop: folio en BD, ReportLab y subida al almacenamiento
         try:
-            if es_reparacion:
-                # intentar pasar anticipo
-                try:
-                    ticket_path = generar_ticket_ingreso_reparacion(
-                        detalles=lista_detalles,
-                        total=total,
-                        tipo_pago=tipo_pago,
-                        monto_recibido=monto_recibido_safe,
-                        cambio=cambio,
-                        anticipo=anticipo_safe
-                    )
-                except TypeError:
-                    # firma sin anticipo
-                    ticket_path = generar_ticket_ingreso_reparacion(
-                        detalles=lista_detalles,
-                        total=total,
-                        tipo_pago=tipo_pago,
-                        monto_recibido=monto_recibido_safe,
-                        cambio=cambio
-                    )
-            else:
-                try:
-                    ticket_path = generar_ticket_venta_multiple(
-                        detalles=lista_detalles,
-                        total=total,
-                        tipo_pago=tipo_pago,
-                        monto_recibido=monto_recibido_safe,
-                        cambio=cambio,
-                        anticipo=anticipo_safe
-                    )
-                except TypeError:
-                    ticket_path = generar_ticket_venta_multiple(
-                        detalles=lista_detalles,
-                        total=total,
-                        tipo_pago=tipo_pago,
-                        monto_recibido=monto_recibido_safe,
-                        cambio=cambio
-                    )
+            file_path, file_size = await run_in_threadpool(
+                _generar_ticket,
+                es_reparacion,
+                detalles=lista_detalles,
+                total=total,
+                tipo_pago=tipo_pago,
+                monto_recibido=monto_recibido_safe,
+                cambio=cambio,
+                anticipo=anticipo_safe,
+            )
+        except HTTPException:
+            raise
         except Exception as e:
             logger.exception("Error generando ticket PDF")
             # la venta ya está registrada, devolvemos error de ticket
             raise HTTPException(status_code=500, detail=f"Venta/ingreso registrado pero error generando ticket: {e}")
 
-        # Validar archivo generado
-        file_path = Path(ticket_path)
-        if not file_path.exists():
-            raise HTTPException(status_code=500, detail="Ticket generado pero archivo no encontrado")
-        file_size = file_path.stat().st_size
-        if file_size == 0:
-            raise HTTPException(status_code=500, detail="Ticket generado pero el archivo está vacío")
-
-        ticket_name = os.path.basename(ticket_path)
+        ticket_name = file_path.name
         base = str(request.base_url).rstrip("/")  # e.g. http://host:8000
         ticket_url = f"{base}{router.prefix}/ticket/{ticket_name}"
 
@@ -181,11 +169,8 @@ async def crear_detalles(request: Request, db: Session = Depends(get_db)):
 @router.get("/ticket/{ticket_name}")
 def descargar_ticket(ticket_name: str):
     safe_name = os.path.basename(ticket_name)
-    base_dir = Path(__file__).resolve().parent.parent
-    tickets_dir = (base_dir / "tickets").resolve()
-    file_path = tickets_dir / safe_name
-
-    if not file_path.exists():
+    # disco local o, si lo generó otra réplica, el almacenamiento compartido
+    respuesta = storage.blob_response(f"tickets/{safe_name}", media_type="application/pdf", filename=safe_name)
+    if respuesta is None:
         raise HTTPException(status_code=404, detail="Ticket no encontrado")
-
-    return FileResponse(str(file_path), media_type="application/pdf", filename=safe_name)
+    return respuesta
@@ -11,18 +11,12 @@ Router completo para /equipos con:
 Requiere:
 pip install pillow opencv-python-headless qrcode
 """
-import uuid
 import json
-import io
 import base64
 from pathlib import Path
 from typing import List, Optional
 from datetime import datetime
 
-from PIL import Image, ImageOps
-import numpy as np
-import cv2
-
 from fastapi import (
     APIRouter,
     Depends,
@@ -33,44 +27,37 @@ from fastapi import (
     status,
     Request,
     Response,
+    BackgroundTasks,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Ajusta estas importaciones a la estructura de tu proyecto
-from database import SessionLocal, engine, Base
-from services.email_equipo import enviar_email_reparacion
+from database import get_db, get_async_db, SessionLocal
+from services import email_outbox
+from services.qr_decode import decode_qr, QRDecodeTimeout
+from services import qr_assets, image_variants
+from utils import uploads
 from schemas.equipo import (
     EquipoCreate,
     EquipoUpdate,
     EquipoOut,
+    EquipoPage,
     EquipoNotificar,
+    EquipoBulkTransicion,
+    EquipoBulkOut,
 )
 from crud import equipos as crud_equipos
 
-# crea tablas si no existen (ajusta si ya lo haces en otro lado)
-Base.metadata.create_all(bind=engine)
-
 router = APIRouter(prefix="/equipos", tags=["Equipos"])
 
 # =====================================================
 # 📂 CARPETAS
 # =====================================================
 UPLOAD_DIR = Path("static/uploads/equipos")
-QR_DIR = Path("static/qrs/equipos")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-QR_DIR.mkdir(parents=True, exist_ok=True)
-
-# =====================================================
-# 🗄️ DB
-# =====================================================
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 def absolute_url(request: Request, relative_path: str) -> str:
@@ -85,220 +72,146 @@ def absolute_url(request: Request, relative_path: str) -> str:
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5 MB
 
 # =====================================================
-# 🔧 Helpers para OpenCV
-# =====================================================
-_detector = cv2.QRCodeDetector()
-
-
-def pil_to_cv2_bgr(pil_image: Image.Image) -> np.ndarray:
-    """Convierte PIL Image -> OpenCV BGR numpy array"""
-    rgb = np.array(pil_image.convert("RGB"))
-    # PIL usa RGB, OpenCV suele usar BGR
-    return rgb[:, :, ::-1].copy()
-
-
-# =====================================================
-# 🧩 UTIL: Intenta decodificar QR con transformaciones (OpenCV)
-# =====================================================
-def try_decode_qr(pil_image: Image.Image) -> Optional[str]:
-    """
-    Intenta decodificar QR usando varias transformaciones:
-    - imagen original
-    - grayscale
-    - autocontrast
-    - rotaciones 90/180/270
-    Retorna el primer texto encontrado o None.
-    """
-    candidates: List[Image.Image] = []
-
-    # versión base
-    try:
-        candidates.append(pil_image.convert("RGB"))
-    except Exception:
-        pass
-
-    # grayscale + autocontrast
-    try:
-        g = ImageOps.grayscale(pil_image)
-        candidates.append(g)
-    except Exception:
-        pass
-
-    try:
-        ac = ImageOps.autocontrast(pil_image)
-        candidates.append(ac)
-    except Exception:
-        pass
-
-    # rotaciones (aplicar a la imagen base y a autocontrast si existe)
-    base_images = [candidates[0]] if candidates else []
-    if len(candidates) > 1:
-        base_images.extend([img for img in candidates[1:]])
-
-    for base_img in base_images:
-        for rot in (0, 90, 180, 270):
-            try:
-                if rot == 0:
-                    img = base_img
-                else:
-                    img = base_img.rotate(rot, expand=True)
-                candidates.append(img)
-            except Exception:
-                pass
-
-    # ahora intentar decodificar cada candidato usando OpenCV
-    for img in candidates:
-        try:
-            cv_img = pil_to_cv2_bgr(img)
-            # detectAndDecode devuelve (data, points, straight_qrcode)
-            data, points, _ = _detector.detectAndDecode(cv_img)
-            if data and isinstance(data, str) and data.strip():
-                return data.strip()
-        except Exception:
-            # ignorar y continuar con el siguiente intento
-            continue
-
-    return None
-
-
-# =====================================================
-# UTIL: genera QR en memoria y retorna (bytes_png, base64_str)
-# =====================================================
-def generar_qr_bytes_and_base64(text: str) -> (bytes, str):
-    import qrcode
-
-    qr = qrcode.make(str(text))
-    buffer = io.BytesIO()
-    qr.save(buffer, format="PNG")
-    b = buffer.getvalue()
-    b64 = base64.b64encode(b).decode("utf-8")
-    return b, b64
-
-
-# =====================================================
-# 🚀 CREAR EQUIPO (genera QR con el ID) - DEVUELVE equipo + qr_url + qr_base64
+# 🚀 CREAR EQUIPO (QR determinista por ID) - DEVUELVE equipo + qr_url + qr_base64
 # =====================================================
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def crear_equipo(
     payload: EquipoCreate,
     request: Request,
+    background_tasks: BackgroundTasks,
+    incluir_qr_base64: bool = Query(True, description="False = no renderizar el QR en esta petición"),
     db: Session = Depends(get_db),
 ):
     """
-    Crea el equipo, genera QR (imagen PNG), guarda la URL en la BD y
-    devuelve JSON con:
+    Crea el equipo y devuelve JSON con:
       {
         "equipo": { ... },         # representación serializada del equipo (EquipoOut)
-        "qr_url": "https://.../static/qrs/equipos/xxxx.png",
-        "qr_base64": "iVBORw0K..."
+        "qr_url": "https://.../static/qrs/equipos/{id}.png",
+        "qr_base64": "iVBORw0K..."  # null si incluir_qr_base64=false
       }
-    Esto facilita que Flutter muestre la vista previa inmediatamente.
+    La URL del QR se guarda en el mismo commit de la creación. Si no se
+    pide qr_base64, el PNG se genera después de responder.
     """
-    equipo = crud_equipos.create_equipo(db, payload)
+    equipo = crud_equipos.create_equipo(
+        db,
+        payload,
+        qr_url_for=lambda equipo_id: absolute_url(request, qr_assets.qr_static_url(equipo_id)),
+    )
     if not equipo:
         raise HTTPException(status_code=400, detail="No se pudo crear el equipo")
 
-    # Generar QR (conteniendo solo el ID)
-    qr_bytes, qr_base64 = generar_qr_bytes_and_base64(str(equipo.id))
-
-    # Guardar en disco
-    qr_filename = f"{uuid.uuid4().hex}.png"
-    qr_path = QR_DIR / qr_filename
-    try:
-        with open(qr_path, "wb") as fh:
-            fh.write(qr_bytes)
-    except Exception as e:
-        # No es fatal: intentamos seguir y devolver base64 en la respuesta
-        pass
-
-    qr_url = absolute_url(request, f"/static/qrs/equipos/{qr_filename}")
+    qr_base64 = None
+    if incluir_qr_base64:
+        _, qr_base64 = qr_assets.get_qr_png_and_base64(equipo.id, guardar=True)
+    else:
+        background_tasks.add_task(qr_assets.ensure_qr, equipo.id)
 
-    # Guardar la URL en el registro del equipo
-    updated = crud_equipos.set_equipo_qr(db, equipo.id, qr_url)
-    if not updated:
-        # aún devolvemos la base64 para que frontend pueda mostrar algo
-        response_equipo = EquipoOut.from_orm(equipo).dict()
-        return {"equipo": response_equipo, "qr_url": qr_url, "qr_base64": qr_base64}
-
-    # serializar equipo actualizado
-    response_equipo = EquipoOut.from_orm(updated).dict()
-    return {"equipo": response_equipo, "qr_url": qr_url, "qr_base64": qr_base64}
+    response_equipo = EquipoOut.from_orm(equipo).dict()
+    return {"equipo": response_equipo, "qr_url": equipo.qr_url, "qr_base64": qr_base64}
 
 
 # =====================================================
 # Endpoint para servir la imagen PNG del QR (por id)
 # =====================================================
 @router.get("/{equipo_id}/qr")
-def get_qr_image(equipo_id: int):
+def get_qr_image(equipo_id: int, request: Request):
     """
-    Retorna image/png del primer archivo que encuentre en static/qrs/equipos
-    que contenga el equipo_id en su contenido (si fue generado por este router)
-    En nuestro caso generamos nombres UUID, así que busca en la BD la qr_url.
+    Retorna image/png del QR del equipo. La imagen depende solo del id,
+    así que no se consulta la BD y se sirve con ETag fuerte + immutable:
+    una reimpresión con If-None-Match recibe 304 sin tocar disco ni encoder.
+    Nunca escribe: el PNG se guarda solo al crear el equipo.
     """
-    # Para evitar dependencias con request/DB dentro de este helper, abrimos sesión rápida
-    db = SessionLocal()
-    try:
-        equipo = crud_equipos.get_equipo(db, equipo_id)
-    finally:
-        db.close()
-
-    if not equipo:
+    # fuera del rango de equipos.id (INTEGER) no puede existir
+    if not 1 <= equipo_id <= 2**31 - 1:
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
 
-    # Si no tiene qr_url, 404
-    qr_url = getattr(equipo, "qr_url", None)
-    if not qr_url:
-        raise HTTPException(status_code=404, detail="QR no encontrado para este equipo")
+    etag = qr_assets.qr_etag(equipo_id)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    # qr_url es una URL absoluta tipo https://.../static/qrs/equipos/xxx.png
-    # Convertimos a path relativo y servimos el archivo si existe
     try:
-        filename = Path(qr_url).name
-        file_path = QR_DIR / filename
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="Archivo QR no encontrado en servidor")
-        fh = open(file_path, "rb")
-        return StreamingResponse(fh, media_type="image/png")
-    except HTTPException:
-        raise
+        data = qr_assets.get_qr_png(equipo_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=data, media_type="image/png", headers=headers)
 
 
 # =====================================================
 # 🔍 LISTAR EQUIPOS (SOLO ACTIVOS)
 # =====================================================
+async def _pagina_equipos(
+    db: AsyncSession,
+    nombre_cliente: Optional[str],
+    estado: Optional[str],
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+):
+    try:
+        items = await crud_equipos.list_equipos_async(
+            db=db,
+            skip=skip,
+            limit=limit,
+            cliente_nombre=nombre_cliente,
+            estado=estado,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return items, crud_equipos.next_cursor(items, limit)
+
+
 @router.get("/", response_model=List[EquipoOut])
-def listar_equipos(
+async def listar_equipos(
+    response: Response,
     nombre_cliente: Optional[str] = Query(None),
     estado: Optional[str] = Query(None),
     skip: int = 0,
-    limit: int = 50,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=crud_equipos.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if nombre_cliente:
-        return crud_equipos.get_equipos_by_cliente_nombre(db, nombre_cliente)
-
-    return crud_equipos.list_equipos(
-        db=db,
-        skip=skip,
-        limit=limit,
-        cliente_nombre=nombre_cliente,
-        estado=estado,
-    )
+    """
+    Lista equipos activos. Para paginar sin OFFSET, enviar el valor de
+    la cabecera `X-Next-Cursor` de la respuesta anterior en `cursor`.
+    """
+    items, siguiente = await _pagina_equipos(db, nombre_cliente, estado, skip, limit, cursor)
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
+    return items
+
+
+@router.get("/pagina", response_model=EquipoPage)
+async def listar_equipos_pagina(
+    nombre_cliente: Optional[str] = Query(None),
+    estado: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=crud_equipos.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Igual que GET /equipos pero devuelve {items, next_cursor} en el cuerpo."""
+    items, siguiente = await _pagina_equipos(db, nombre_cliente, estado, 0, limit, cursor)
+    return {"items": items, "next_cursor": siguiente}
 
 
 # =====================================================
-# ⚡ FILTROS RÁPIDOS
+# ⚡ FILTROS RÁPIDOS (polling de tablets → sesión async)
+# Para tablets nuevas: GET /equipos/equipos/eventos o WS /equipos/equipos/ws
+# (routers/equipos_eventos.py) empujan los cambios sin polling.
 # =====================================================
 @router.get("/pendientes", response_model=List[EquipoOut])
-def equipos_pendientes(db: Session = Depends(get_db)):
-    return crud_equipos.list_equipos(db, estado="pendientes")
+async def equipos_pendientes(db: AsyncSession = Depends(get_async_db)):
+    return await crud_equipos.list_equipos_async(db, estado="pendientes")
 
 
 @router.get("/reparacion", response_model=List[EquipoOut])
-def equipos_en_reparacion(db: Session = Depends(get_db)):
-    return crud_equipos.list_equipos(db, estado="en_reparacion")
+async def equipos_en_reparacion(db: AsyncSession = Depends(get_async_db)):
+    return await crud_equipos.list_equipos_async(db, estado="en_reparacion")
 
 
 # =====================================================
@@ -311,50 +224,61 @@ async def subir_fotos_ultimo(
     back: UploadFile = File(...),
     db: Session = Depends(get_db),
 ):
+    """
+    Guarda las fotos frontal/trasera del último equipo activo.
+    Se copian a disco por bloques (utils.uploads): tamaño limitado a
+    MAX_PHOTO_SIZE por foto y nombre = sha256 del contenido.
+    Los derivados (foto_variantes) aparecen cuando termina el pool de imágenes.
+    """
     # Validación simple de tipo
     for f in (front, back):
         if not f.content_type or not f.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Ambos archivos deben ser imágenes")
 
-    saved_paths: List[Path] = []
+    saved: List[uploads.SavedUpload] = []
 
     try:
-        # front
-        ext_front = Path(front.filename).suffix.lower() or ".jpg"
-        name_front = f"{uuid.uuid4().hex}{ext_front}"
-        path_front = UPLOAD_DIR / name_front
-        with open(path_front, "wb") as fh:
-            fh.write(await front.read())
-        url_front = absolute_url(request, f"/static/uploads/equipos/{name_front}")
-        saved_paths.append(path_front)
-
-        # back
-        ext_back = Path(back.filename).suffix.lower() or ".jpg"
-        name_back = f"{uuid.uuid4().hex}{ext_back}"
-        path_back = UPLOAD_DIR / name_back
-        with open(path_back, "wb") as fh:
-            fh.write(await back.read())
-        url_back = absolute_url(request, f"/static/uploads/equipos/{name_back}")
-        saved_paths.append(path_back)
-
-        ultimo = crud_equipos.get_last_equipo(db)
+        # 2 fotos + margen para las cabeceras del multipart
+        uploads.check_content_length(request, 2 * uploads.MAX_PHOTO_SIZE + 64 * 1024)
+
+        for f in (front, back):
+            saved.append(await uploads.save_upload(f, UPLOAD_DIR))
+        url_front = absolute_url(request, f"/static/uploads/equipos/{saved[0].name}")
+        url_back = absolute_url(request, f"/static/uploads/equipos/{saved[1].name}")
+
+        # la sesión es síncrona: consultas fuera del event loop
+        ultimo = await run_in_threadpool(crud_equipos.get_last_equipo, db)
         if not ultimo:
             # limpiezas locales
-            for p in saved_paths:
-                p.unlink(missing_ok=True)
+            for foto in saved:
+                uploads.discard(foto)
             raise HTTPException(status_code=404, detail="No hay equipos registrados")
 
         json_fotos = json.dumps({"front": url_front, "back": url_back})
-        updated = crud_equipos.set_equipo_foto_json(db, ultimo.id, json_fotos)
+        updated = await run_in_threadpool(crud_equipos.set_equipo_foto_json, db, ultimo.id, json_fotos)
         if not updated:
             raise HTTPException(status_code=500, detail="No se pudo guardar las fotos")
+
+        # miniaturas / tamaño medio en segundo plano; al terminar se guardan sus URLs
+        equipo_id, foto_url = updated.id, updated.foto_url
+
+        def _registrar_variantes(resultado):
+            variantes = image_variants.variantes_equipo(image_variants.fotos_equipo(foto_url), resultado)
+            with SessionLocal() as s:
+                crud_equipos.set_equipo_foto_variantes(s, equipo_id, foto_url, variantes)
+
+        image_variants.encolar(*(foto.key for foto in saved), al_terminar=_registrar_variantes)
         return updated
 
     except HTTPException:
         raise
+    except uploads.UploadTooLarge as e:
+        for foto in saved:
+            uploads.discard(foto)
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        for p in saved_paths:
-            p.unlink(missing_ok=True)
+        for foto in saved:
+            uploads.discard(foto)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -391,6 +315,22 @@ def cancelar_equipo(equipo_id: int, db: Session = Depends(get_db)):
     return obj
 
 
+# 🔹 Varios equipos a la vez (cierre del día): una transacción, resultado por id
+@router.patch("/bulk", response_model=EquipoBulkOut)
+def transicion_masiva(payload: EquipoBulkTransicion, db: Session = Depends(get_db)):
+    resultados = crud_equipos.transicion_masiva(
+        db,
+        payload.ids,
+        payload.transicion,
+        archivar=payload.archivar,
+        observaciones=payload.observaciones,
+    )
+    return {
+        "actualizados": sum(1 for r in resultados if r["ok"]),
+        "resultados": resultados,
+    }
+
+
 # =====================================================
 # 📣 NOTIFICAR CLIENTE
 # =====================================================
@@ -405,6 +345,7 @@ def notificar_equipo(
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
 
     enviados = []
+    outbox_id = None
 
     if "email" in payload.via:
         if not equipo.cliente_correo:
@@ -413,22 +354,9 @@ def notificar_equipo(
                 detail="El equipo no tiene correo registrado",
             )
 
-        try:
-            enviar_email_reparacion(
-                to_email=equipo.cliente_correo,
-                cliente_nombre=equipo.cliente_nombre,
-                ticket_id=str(equipo.id),
-                modelo=equipo.modelo,
-                falla=equipo.fallo,
-                message_from_front=payload.message,
-            )
-        except Exception as e:
-            # registra el error y responde 500
-            print("❌ ERROR enviando correo:", e)
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error enviando correo: {str(e)}"
-            )
+        # Solo se encola: el worker del outbox lo entrega en segundo plano
+        outbox = email_outbox.encolar_email_reparacion(db, equipo, payload.message)
+        outbox_id = outbox.id
 
         enviados.append("email")
 
@@ -437,6 +365,8 @@ def notificar_equipo(
         "estado": equipo.estado,
         "notificado_via": enviados,
         "message": payload.message,
+        # estado de entrega: GET /outbox/{outbox_id}
+        "outbox_id": outbox_id,
     }
 
 
@@ -444,8 +374,8 @@ def notificar_equipo(
 # 🔍 OBTENER POR ID (INCLUYE ARCHIVADOS)
 # =====================================================
 @router.get("/{equipo_id}", response_model=EquipoOut)
-def obtener_equipo(equipo_id: int, db: Session = Depends(get_db)):
-    obj = crud_equipos.get_equipo(db, equipo_id)
+async def obtener_equipo(equipo_id: int, db: AsyncSession = Depends(get_async_db)):
+    obj = await crud_equipos.get_equipo_async(db, equipo_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Equipo no encontrado")
     return obj
@@ -483,26 +413,29 @@ def eliminar_equipo(equipo_id: int, db: Session = Depends(get_db)):
 @router.post("/qr/decode", response_model=EquipoOut)
 async def decode_qr_and_get_equipo(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Recibe una imagen (multipart/form-data) con un QR.
     El QR debe contener únicamente el ID numérico del equipo.
     Devuelve el Equipo correspondiente (o 404 si no existe/no se detecta QR).
+    La decodificación corre en el pool de services.qr_decode (no bloquea el loop).
     """
     # Validaciones básicas
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="Archivo no es una imagen")
 
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_UPLOAD_SIZE:
+    try:
+        file_bytes = await uploads.read_upload_capped(file, MAX_UPLOAD_SIZE)
+    except uploads.UploadTooLarge:
         raise HTTPException(status_code=413, detail="Archivo demasiado grande (máx 5MB)")
 
-    try:
-        # Abrir imagen con PIL de forma segura
-        image = Image.open(io.BytesIO(file_bytes)).convert("RGB")
+    return await _equipo_desde_qr(file_bytes, db)
 
-        qr_text = try_decode_qr(image)
+
+async def _equipo_desde_qr(file_bytes: bytes, db: AsyncSession):
+    try:
+        qr_text = await decode_qr(file_bytes)
         if not qr_text:
             raise HTTPException(status_code=404, detail="No se encontró QR en la imagen")
 
@@ -511,7 +444,7 @@ async def decode_qr_and_get_equipo(
             raise HTTPException(status_code=400, detail="El QR no contiene un ID de equipo válido")
 
         equipo_id = int(qr_text)
-        equipo = crud_equipos.get_equipo(db, equipo_id)
+        equipo = await crud_equipos.get_equipo_async(db, equipo_id)
         if not equipo:
             raise HTTPException(status_code=404, detail="Equipo no encontrado")
 
@@ -520,6 +453,8 @@ async def decode_qr_and_get_equipo(
     except HTTPException:
         # re-lanzar HTTPException sin envolverla
         raise
+    except QRDecodeTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         # En desarrollo puedes retornar str(e). En producción usa mensaje genérico.
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
@@ -533,7 +468,7 @@ class ImageBase64Payload(BaseModel):
 
 
 @router.post("/qr/decode_base64", response_model=EquipoOut)
-def decode_qr_base64(payload: ImageBase64Payload, db: Session = Depends(get_db)):
+async def decode_qr_base64(payload: ImageBase64Payload, db: AsyncSession = Depends(get_async_db)):
     """
     Recibe JSON con image_base64 y devuelve el equipo.
     Útil para clientes web/móvil que envían la imagen como base64.
@@ -544,25 +479,10 @@ def decode_qr_base64(payload: ImageBase64Payload, db: Session = Depends(get_db))
         if "," in data:
             _, data = data.split(",", 1)
         file_bytes = base64.b64decode(data)
-        if len(file_bytes) > MAX_UPLOAD_SIZE:
-            raise HTTPException(status_code=413, detail="Archivo demasiado grande (máx 5MB)")
-
-        image = Image.open(io.BytesIO(file_bytes)).convert("RGB")
-
-        qr_text = try_decode_qr(image)
-        if not qr_text:
-            raise HTTPException(status_code=404, detail="No se encontró QR en la imagen")
-
-        if not qr_text.isdigit():
-            raise HTTPException(status_code=400, detail="El QR no contiene un ID de equipo válido")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Base64 inválido: {e}")
 
-        equipo_id = int(qr_text)
-        equipo = crud_equipos.get_equipo(db, equipo_id)
-        if not equipo:
-            raise HTTPException(status_code=404, detail="Equipo no encontrado")
-        return equipo
+    if len(file_bytes) > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="Archivo demasiado grande (máx 5MB)")
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _equipo_desde_qr(file_bytes, db)
@@ -0,0 +1,178 @@
+# routers/equipos_eventos.py
+"""
+Cambios de equipos en tiempo real para las tablets (en vez de hacer
+polling a /equipos/pendientes y /equipos/reparacion):
+
+  GET /equipos/equipos/eventos   Server-Sent Events
+  WS  /equipos/equipos/ws        WebSocket (los mismos mensajes en JSON)
+
+(main.py monta este router con prefix="/equipos" sobre el suyo, igual
+que equipos_router: /equipos/equipos/pendientes, etc.)
+
+Parámetros: `estado` (repetible) filtra; `cursor` reanuda desde el último
+id recibido. Con SSE el navegador lo reenvía solo en Last-Event-ID.
+
+Mensajes:
+  snapshot  {"cursor", "items": [EquipoOut...], "truncado"} al conectar sin
+            cursor o si el cursor ya no se puede reanudar
+  equipo    un evento de services/equipo_eventos. Al reanudar se reenvían
+            también algunos anteriores al cursor (ver eventos_desde): el
+            cliente descarta los ids que ya aplicó y guarda como cursor
+            el mayor id recibido
+  resync    se perdieron eventos: reconectar con el último cursor
+"""
+import json
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+
+from fastapi import (
+    APIRouter,
+    Header,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
+
+import database
+from crud import equipos as crud_equipos
+from schemas.equipo import EquipoOut
+from services import equipo_eventos
+
+router = APIRouter(prefix="/equipos", tags=["Equipos"])
+
+# segundos entre heartbeats (los proxies cortan conexiones ociosas)
+HEARTBEAT = 15
+
+
+def _validar_estados(estados: Optional[List[str]]) -> List[str]:
+    invalidos = [e for e in estados or [] if e not in crud_equipos.VALID_ESTADOS]
+    if invalidos:
+        raise ValueError(f"Estados no válidos: {invalidos}. Válidos: {crud_equipos.VALID_ESTADOS}")
+    return list(dict.fromkeys(estados or []))
+
+
+async def _snapshot(db, estados: List[str]) -> dict:
+    # el cursor se lee antes que la lista: lo que cambie en medio llega como evento
+    cursor = await equipo_eventos.ultimo_id(db)
+    items, truncado = [], False
+    for estado in estados or [None]:
+        filas = await crud_equipos.list_equipos_async(db, limit=crud_equipos.MAX_PAGE_SIZE, estado=estado)
+        truncado = truncado or len(filas) == crud_equipos.MAX_PAGE_SIZE
+        items.extend(EquipoOut.model_validate(e).model_dump(mode="json") for e in filas)
+    return {"cursor": cursor, "items": items, "truncado": truncado}
+
+
+async def _mensajes(estados: List[str], cursor: Optional[int]) -> AsyncIterator[Optional[tuple]]:
+    """
+    (tipo, id, data) en orden; None = heartbeat. La suscripción empieza
+    antes del snapshot/replay para no perder nada en medio; la sesión de
+    BD se cierra antes de quedarse escuchando.
+    """
+    async with equipo_eventos.hub.suscribir(estados) as sus:
+        database.get_async_engine()
+        async with database.AsyncSessionLocal() as db:
+            replay = None
+            if cursor is not None:
+                replay = await equipo_eventos.eventos_desde(db, cursor, estados)
+            if replay is None:
+                snapshot = await _snapshot(db, estados)
+                inicial = [("snapshot", snapshot["cursor"], snapshot)]
+            else:
+                inicial = [("equipo", e["id"], e) for e in replay]
+
+        vistos = {i for tipo, i, _ in inicial if tipo == "equipo"}
+        for mensaje in inicial:
+            yield mensaje
+
+        while True:
+            evento = await sus.siguiente(HEARTBEAT)
+            if sus.resincronizar:
+                yield "resync", None, {"detail": "Se perdieron eventos: reconectar con el último cursor"}
+                return
+            if evento is None:
+                yield None
+            elif evento["id"] not in vistos:
+                yield "equipo", evento["id"], evento
+
+
+# =====================================================
+# 📡 SSE
+# =====================================================
+def _sse(tipo: str, id_: Optional[int], data: dict) -> str:
+    lineas = [f"id: {id_}"] if id_ is not None else []
+    lineas.append(f"event: {tipo}")
+    lineas.append("data: " + json.dumps(data, ensure_ascii=False, default=str))
+    return "\n".join(lineas) + "\n\n"
+
+
+@router.get("/eventos")
+async def eventos_sse(
+    estado: Optional[List[str]] = Query(None, description="Repetible: ?estado=pendientes&estado=en_reparacion"),
+    cursor: Optional[int] = Query(None, ge=0, description="Último id recibido (reanudar)"),
+    last_event_id: Optional[str] = Header(None),
+):
+    try:
+        estados = _validar_estados(estado)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+
+    async def stream():
+        yield "retry: 3000\n\n"
+        async with aclosing(_mensajes(estados, cursor)) as mensajes:
+            async for m in mensajes:
+                yield ": ping\n\n" if m is None else _sse(*m)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# =====================================================
+# 🔌 WebSocket
+# =====================================================
+async def _esperar_cierre(websocket: WebSocket) -> None:
+    # los mensajes del cliente (pings) se ignoran; solo importa el cierre
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/ws")
+async def eventos_ws(
+    websocket: WebSocket,
+    estado: Optional[List[str]] = Query(None),
+    cursor: Optional[int] = Query(None, ge=0),
+):
+    try:
+        estados = _validar_estados(estado)
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+
+    await websocket.accept()
+    cierre = asyncio.create_task(_esperar_cierre(websocket))
+    try:
+        async with aclosing(_mensajes(estados, cursor)) as mensajes:
+            async for m in mensajes:
+                if cierre.done():
+                    return
+                if m is None:
+                    await websocket.send_json({"tipo": "ping"})
+                    continue
+                tipo, _, data = m
+                await websocket.send_json({"tipo": tipo, "data": data})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        cierre.cancel()
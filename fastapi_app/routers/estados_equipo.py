@@ -3,19 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from database import SessionLocal
+from database import get_db
 from crud import estados_equipo as crud_estados
 from schemas.estado_equipo import EstadoEquipoCreate, EstadoEquipoOut
 
 router = APIRouter(prefix="/estados", tags=["Estados de Equipos"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # 🔹 Crear un nuevo estado
 @router.post("/{equipo_id}", response_model=EstadoEquipoOut, status_code=status.HTTP_201_CREATED)
 def crear_estado(equipo_id: int, payload: EstadoEquipoCreate, db: Session = Depends(get_db)):
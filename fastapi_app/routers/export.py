@@ -0,0 +1,77 @@
+# routers/export.py
+"""
+Exportaciones completas para contabilidad, en streaming:
+
+  GET /export/{equipos|cobros|ventas}?formato=csv|ndjson&desde=&hasta=
+
+La respuesta se arma lote a lote (crud/export.py): memoria constante sin
+importar cuántas filas haya, y sin retener una conexión del pool mientras
+el cliente descarga.
+"""
+import io
+import csv
+import json
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from crud import export as crud_export
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _valor(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    return getattr(v, "value", v)  # Enum (metodo_pago)
+
+
+def _csv(columnas, lotes):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columnas)
+    for filas in lotes:
+        writer.writerows([_valor(v) for v in fila] for fila in filas)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")  # solo encabezado (sin filas)
+
+
+def _ndjson(columnas, lotes):
+    for filas in lotes:
+        yield "".join(
+            json.dumps(dict(zip(columnas, map(_valor, fila))), ensure_ascii=False) + "\n"
+            for fila in filas
+        ).encode("utf-8")
+
+
+# 🔹 Exportar una entidad completa (o un rango de fechas, días inclusivos en KPI_TIMEZONE)
+@router.get("/{entidad}")
+def exportar(
+    entidad: Literal["equipos", "cobros", "ventas"],
+    formato: Literal["csv", "ndjson"] = Query("csv"),
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+):
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="`desde` debe ser anterior o igual a `hasta`")
+
+    columnas = crud_export.columnas(entidad)
+    lotes = crud_export.iter_lotes(entidad, desde, hasta)
+    cuerpo = _csv(columnas, lotes) if formato == "csv" else _ndjson(columnas, lotes)
+
+    nombre = f"{entidad}_{desde or 'inicio'}_{hasta or 'hoy'}.{formato}"
+    return StreamingResponse(
+        cuerpo,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
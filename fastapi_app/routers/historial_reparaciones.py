@@ -1,19 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from database import SessionLocal
+from database import get_db
 from crud import historial_reparaciones as crud_historial
 from schemas.historial_reparaciones import HistorialReparacionCreate, HistorialReparacionOut
 
 router = APIRouter(prefix="/reparaciones", tags=["Historial de Reparaciones"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # 🔹 Crear nueva reparación
 @router.post("/{equipo_id}", response_model=HistorialReparacionOut, status_code=status.HTTP_201_CREATED)
 def crear_reparacion(equipo_id: int, payload: HistorialReparacionCreate, db: Session = Depends(get_db)):
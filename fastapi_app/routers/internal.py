@@ -0,0 +1,28 @@
+# routers/internal.py
+"""
+Endpoints internos de operación (no los usa la app Flutter).
+"""
+from fastapi import APIRouter
+
+from database import pool_status
+from services import catalog_cache
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+# 🔹 Estado del pool de conexiones
+@router.get("/pool")
+def estado_pool():
+    """
+    Conexiones en uso (checked_out), overflow actual y
+    estadísticas de espera/timeout al pedir conexión al pool.
+    El pool async va en "async"; "presupuesto" es el total del proceso.
+    """
+    return pool_status()
+
+
+# 🔹 Caché del catálogo
+@router.get("/catalog_cache")
+def estado_catalog_cache():
+    """Versión actual del catálogo y entradas en caché de este proceso."""
+    return catalog_cache.stats()
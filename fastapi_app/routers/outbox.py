@@ -0,0 +1,25 @@
+# routers/outbox.py
+from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from database import get_db
+from services import email_outbox
+from schemas.email_outbox import EmailOutboxOut
+
+router = APIRouter(prefix="/outbox", tags=["Outbox de correos"])
+
+
+# 🔹 Conteo por estado (pendiente / enviando / enviado / fallido)
+@router.get("/", response_model=Dict[str, int])
+def resumen_outbox(db: Session = Depends(get_db)):
+    return email_outbox.resumen(db)
+
+
+# 🔹 Estado de entrega de un correo encolado
+@router.get("/{email_id}", response_model=EmailOutboxOut)
+def estado_email(email_id: int, db: Session = Depends(get_db)):
+    msg = email_outbox.get_email(db, email_id)
+    if not msg:
+        raise HTTPException(status_code=404, detail="Correo no encontrado")
+    return msg
@@ -1,12 +1,14 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import or_
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
+from pathlib import Path
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db, SessionLocal
 from crud import productos as crud_productos
-from schemas.productos import ProductoCreate, ProductoUpdate, Producto
-from models.productos import Producto as ProductoModel
-from models.categoria import Categoria
+from services import catalog_cache, image_variants
+from utils import uploads
+from schemas.productos import ProductoCreate, ProductoUpdate, Producto, ProductoResumen, VentasProductoPage
 
 # -----------------------------------------------------
 # Router para Productos
@@ -16,6 +18,9 @@ router = APIRouter(
     tags=["productos"]
 )
 
+UPLOAD_DIR = Path("static/uploads/productos")
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
 # -----------------------------------------------------
 # Crear producto
 # -----------------------------------------------------
@@ -31,41 +36,37 @@ def create_producto(producto: ProductoCreate, db: Session = Depends(get_db)):
 # -----------------------------------------------------
 # Listar productos con filtros y búsqueda
 # -----------------------------------------------------
-@router.get("/", response_model=List[Producto])
-def list_productos(
-    skip: int = 0,
-    limit: int = 50,
+@router.get("/", response_model=List[ProductoResumen])
+async def list_productos(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=crud_productos.MAX_CATALOGO_PAGE),
     categoria_id: Optional[int] = Query(None, description="Filtrar por ID de categoría"),
     categoria_nombre: Optional[str] = Query(None, description="Filtrar por nombre de categoría"),
     q: Optional[str] = Query(None, description="Término de búsqueda (nombre, descripción o código de producto)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Lista los productos con soporte para filtros:
     - Filtrar por categoría (ID o nombre)
     - Buscar texto parcial (nombre, descripción o código)
     - Paginación
+    Ruta caliente: usa la sesión async (no ocupa un hilo del threadpool).
+    No incluye el historial de ventas (ver /productos/{id}/ventas).
+    Servida desde la caché del catálogo (ETag / If-None-Match -> 304).
     """
-    query = db.query(ProductoModel).options(selectinload(ProductoModel.categoria))
-
-    if categoria_id is not None:
-        query = query.filter(ProductoModel.categoria_id == categoria_id)
-
-    if categoria_nombre:
-        query = query.join(ProductoModel.categoria).filter(Categoria.nombre.ilike(f"%{categoria_nombre}%"))
-
-    if q:
-        term = f"%{q}%"
-        query = query.filter(
-            or_(
-                ProductoModel.nombre.ilike(term),
-                ProductoModel.descripcion.ilike(term),
-                ProductoModel.codigo.ilike(term)
-            )
+    async def cargar():
+        productos = await crud_productos.list_productos_async(
+            db,
+            skip=skip,
+            limit=limit,
+            categoria_id=categoria_id,
+            categoria_nombre=categoria_nombre,
+            q=q,
         )
+        return [ProductoResumen.from_orm(p) for p in productos]
 
-    productos = query.offset(skip).limit(limit).all()
-    return productos
+    return await catalog_cache.cached_response_async(request, cargar)
 
 # -----------------------------------------------------
 # Obtener un producto específico
@@ -76,7 +77,7 @@ def get_producto(producto_id: int, db: Session = Depends(get_db)):
     Obtiene un producto específico por su ID.
     Incluye la información de categoría y stock.
     """
-    db_producto = crud_productos.get_producto(db, producto_id=producto_id)
+    db_producto = crud_productos.get_producto_detalle(db, producto_id=producto_id)
     if not db_producto:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -84,6 +85,28 @@ def get_producto(producto_id: int, db: Session = Depends(get_db)):
         )
     return db_producto
 
+# -----------------------------------------------------
+# Historial de ventas de un producto (paginado)
+# -----------------------------------------------------
+@router.get("/{producto_id}/ventas", response_model=VentasProductoPage)
+def list_ventas_producto(
+    producto_id: int,
+    limit: int = Query(50, ge=1, le=crud_productos.MAX_VENTAS_PAGE),
+    antes_de: Optional[int] = Query(None, description="Cursor: next_cursor de la página anterior"),
+    db: Session = Depends(get_db),
+):
+    """
+    Detalles de cobro del producto, más recientes primero.
+    Para la siguiente página pasar `antes_de=next_cursor`.
+    """
+    if not crud_productos.get_producto(db, producto_id=producto_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado."
+        )
+    items, siguiente = crud_productos.list_ventas_producto(db, producto_id, limit=limit, antes_de=antes_de)
+    return {"items": items, "next_cursor": siguiente}
+
 # -----------------------------------------------------
 # Actualizar un producto (editar)
 # -----------------------------------------------------
@@ -101,6 +124,51 @@ def update_producto(producto_id: int, payload: ProductoUpdate, db: Session = Dep
         )
     return db_producto
 
+# -----------------------------------------------------
+# Subir foto del producto
+# -----------------------------------------------------
+@router.post("/{producto_id}/foto", response_model=ProductoResumen)
+async def subir_foto_producto(
+    producto_id: int,
+    request: Request,
+    foto: UploadFile = File(...),
+    db: Session = Depends(get_db),
+):
+    """
+    Guarda la foto del producto (copiada por bloques, nombre = sha256).
+    La miniatura y el tamaño medio se generan en segundo plano y
+    aparecen en `foto_variantes`.
+    """
+    if not foto.content_type or not foto.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="El archivo debe ser una imagen")
+
+    try:
+        uploads.check_content_length(request, uploads.MAX_PHOTO_SIZE + 64 * 1024)
+        saved = await uploads.save_upload(foto, UPLOAD_DIR)
+    except uploads.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    base = str(request.base_url).rstrip("/")
+    foto_url = f"{base}/static/uploads/productos/{saved.name}"
+    db_producto = await run_in_threadpool(crud_productos.set_producto_foto, db, producto_id, foto_url)
+    if not db_producto:
+        uploads.discard(saved)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado."
+        )
+
+    # al terminar se guardan las URLs de los derivados (e invalida el catálogo)
+    def _registrar_variantes(resultado):
+        with SessionLocal() as s:
+            crud_productos.set_producto_foto_variantes(
+                s, producto_id, foto_url, image_variants.variant_urls(foto_url, resultado[saved.key])
+            )
+
+    image_variants.encolar(saved.key, al_terminar=_registrar_variantes)
+    # serializar fuera del loop (la categoría se carga de forma perezosa)
+    return await run_in_threadpool(ProductoResumen.from_orm, db_producto)
+
 # -----------------------------------------------------
 # Eliminar un producto
 # -----------------------------------------------------
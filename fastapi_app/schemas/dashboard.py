@@ -0,0 +1,43 @@
+# schemas/dashboard.py
+from datetime import date
+from typing import Dict, List
+from pydantic import BaseModel
+
+
+class CobrosDia(BaseModel):
+    dia: date
+    metodo_pago: str
+    cobros: int
+    monto_total: float
+    anticipos: float
+    saldo_pendiente: float
+
+
+class TotalesCobros(BaseModel):
+    cobros: int
+    monto_total: float
+    anticipos: float
+    saldo_pendiente: float
+    por_metodo_pago: Dict[str, float]
+
+
+class EquiposEstado(BaseModel):
+    activos: int
+    archivados: int
+
+
+class VentasCategoria(BaseModel):
+    """Ventas de la categoría dentro de [desde, hasta]."""
+    categoria_id: int
+    categoria: str
+    unidades_vendidas: int
+    monto_total: float
+
+
+class Dashboard(BaseModel):
+    desde: date
+    hasta: date
+    ingresos_por_dia: List[CobrosDia]
+    totales: TotalesCobros
+    equipos_por_estado: Dict[str, EquiposEstado]
+    ventas_por_categoria: List[VentasCategoria]
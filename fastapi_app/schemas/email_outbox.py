@@ -0,0 +1,20 @@
+# schemas/email_outbox.py
+from typing import Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class EmailOutboxOut(BaseModel):
+    id: int
+    equipo_id: Optional[int]
+    to_email: str
+    subject: str
+    status: str
+    attempts: int
+    last_error: Optional[str]
+    created_at: Optional[datetime]
+    next_attempt_at: Optional[datetime]
+    sent_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 # schemas/equipo.py
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from pydantic import BaseModel, Field, EmailStr, field_validator
 from datetime import datetime
 
@@ -142,12 +142,56 @@ class EquipoOut(BaseModel):
     qr_url: Optional[str] = None
     foto_url: Optional[str] = None
 
+    # URLs de miniatura/medio por foto: {"front": {"thumb", "medium"}, "back": {...}}
+    # (columna que llena services/image_variants; None mientras no estén: usar foto_url)
+    foto_variantes: Optional[Dict[str, Dict[str, str]]] = None
+
     # 🔥 CLAVE PARA PYDANTIC V2
     model_config = {
         "from_attributes": True
     }
 
 
+# ============================
+# PÁGINA (paginación por cursor)
+# ============================
+class EquipoPage(BaseModel):
+    items: List[EquipoOut]
+    # None cuando no hay más resultados
+    next_cursor: Optional[str] = None
+
+
+# ============================
+# CAMBIO DE ESTADO MASIVO
+# ============================
+TransicionLiteral = Literal["reparando", "listo", "cancelar"]
+
+MAX_BULK_IDS = 500
+
+
+class EquipoBulkTransicion(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
+    transicion: TransicionLiteral
+    # solo para "listo": False lo deja en la lista principal
+    archivar: bool = True
+    # se guarda en cada fila nueva del historial de estados
+    observaciones: Optional[str] = None
+
+
+class EquipoBulkResultado(BaseModel):
+    id: int
+    ok: bool
+    estado: Optional[str] = None
+    archived: Optional[bool] = None
+    # motivo cuando ok=False
+    detail: Optional[str] = None
+
+
+class EquipoBulkOut(BaseModel):
+    actualizados: int
+    resultados: List[EquipoBulkResultado]
+
+
 # ==================================================
 # NOTIFICACIONES
 # ==================================================
@@ -1,5 +1,6 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Dict, Optional, List
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
 
 # -----------------------------------------------------
 # Categorías
@@ -68,13 +69,40 @@ class DetalleCobroOut(DetalleCobroBase):
         orm_mode = True
 
 
+class VentasProductoPage(BaseModel):
+    """Página de ventas de un producto (más recientes primero)."""
+    items: List[DetalleCobroOut]
+    next_cursor: Optional[int] = None  # pasar como ?antes_de= para la siguiente página
+
+
 # -----------------------------------------------------
-# Producto con relaciones (salida completa)
+# Producto para listados (catálogo): tamaño acotado
 # -----------------------------------------------------
-class Producto(ProductoBase):
+class ProductoResumen(ProductoBase):
     id: int
+    foto_url: Optional[str] = None
     categoria: Optional[Categoria] = None
-    detalles_cobro: Optional[List[DetalleCobroOut]] = []  # 👈 Renombrado para coincidir con la relación SQLAlchemy
+    unidades_vendidas: int = 0
+    ultima_venta: Optional[datetime] = None
+
+    # {"thumb": url, "medium": url} de foto_url (columna que llena
+    # services/image_variants; vacío mientras no estén: usar foto_url)
+    foto_variantes: Dict[str, str] = Field(default_factory=dict)
+
+    @field_validator("foto_variantes", mode="before")
+    @classmethod
+    def _sin_variantes(cls, v):
+        return v or {}
+
+    class Config:
+        orm_mode = True
+
+
+# -----------------------------------------------------
+# Producto (detalle / alta / edición). El historial de ventas no va
+# aquí (crece sin límite): GET /productos/{id}/ventas, paginado.
+# -----------------------------------------------------
+class Producto(ProductoResumen):
 
     class Config:
         orm_mode = True
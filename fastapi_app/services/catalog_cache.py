@@ -0,0 +1,116 @@
+# services/catalog_cache.py
+"""
+Caché en memoria del catálogo (GET /categorias, GET /productos).
+
+- Lectura a través de la caché: la clave es la ruta + parámetros; el valor
+  es el JSON ya serializado y su ETag (hash del contenido).
+- Versión global del catálogo: crud.categorias / crud.productos /
+  crud.detalle_cobro llaman a `bump()` tras cada escritura o cambio de
+  stock y todas las entradas anteriores quedan invalidadas.
+- Cada proceso tiene su propia versión: con varios workers, un cambio hecho
+  en otro proceso se ve como mucho CATALOG_CACHE_TTL segundos después.
+- Un acierto no toca la BD (la sesión es perezosa y no pide conexión).
+
+Variables de entorno:
+  CATALOG_CACHE_TTL    segundos máximos por entrada (default 30, 0 = sin caché)
+  CATALOG_CACHE_SIZE   entradas máximas (default 256)
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", "30"))
+CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", "256"))
+
+_lock = threading.Lock()
+_version = 0
+_entradas: "OrderedDict[Hashable, _Entrada]" = OrderedDict()
+
+
+class _Entrada(NamedTuple):
+    version: int
+    expira: float
+    body: bytes
+    etag: str
+
+
+def version() -> int:
+    return _version
+
+
+def bump() -> None:
+    """Invalida todo el catálogo (llamar después del commit)."""
+    global _version
+    with _lock:
+        _version += 1
+        _entradas.clear()
+
+
+def _get(key: Hashable) -> Optional[_Entrada]:
+    with _lock:
+        entrada = _entradas.get(key)
+        if entrada is None:
+            return None
+        if entrada.version != _version or entrada.expira < time.monotonic():
+            del _entradas[key]
+            return None
+        _entradas.move_to_end(key)
+        return entrada
+
+
+def _put(key: Hashable, version_leida: int, datos: Any) -> _Entrada:
+    body = json.dumps(jsonable_encoder(datos), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    entrada = _Entrada(version_leida, time.monotonic() + CATALOG_CACHE_TTL, body, etag)
+    with _lock:
+        # si hubo un bump mientras se consultaba, no guardar datos viejos
+        if version_leida == _version and CATALOG_CACHE_TTL > 0:
+            _entradas[key] = entrada
+            _entradas.move_to_end(key)
+            while len(_entradas) > CATALOG_CACHE_SIZE:
+                _entradas.popitem(last=False)
+    return entrada
+
+
+def _responder(request: Request, entrada: _Entrada) -> Response:
+    headers = {"ETag": entrada.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if entrada.etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entrada.body, media_type="application/json", headers=headers)
+
+
+def _clave(request: Request) -> Hashable:
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())))
+
+
+def cached_response(request: Request, cargar: Callable[[], Any]) -> Response:
+    """`cargar()` devuelve los datos (ya en forma de schema) si no hay acierto."""
+    key = _clave(request)
+    entrada = _get(key)
+    if entrada is None:
+        v = _version
+        entrada = _put(key, v, cargar())
+    return _responder(request, entrada)
+
+
+async def cached_response_async(request: Request, cargar) -> Response:
+    """Igual que cached_response, con `cargar` como corrutina."""
+    key = _clave(request)
+    entrada = _get(key)
+    if entrada is None:
+        v = _version
+        entrada = _put(key, v, await cargar())
+    return _responder(request, entrada)
+
+
+def stats() -> dict:
+    with _lock:
+        return {"version": _version, "entradas": len(_entradas)}
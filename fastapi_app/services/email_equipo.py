@@ -6,11 +6,16 @@ Si RESEND_API_KEY no existe, intenta fallback SMTP (útil únicamente en local).
 """
 
 import os
+import time
 import logging
+import threading
 from typing import Optional
 from html import escape
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from services import metrics
 
 logger = logging.getLogger("email_equipo")
 logger.setLevel(logging.INFO)  # INFO en prod, DEBUG si necesitas más detalle
@@ -21,6 +26,8 @@ logger.setLevel(logging.INFO)  # INFO en prod, DEBUG si necesitas más detalle
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY", "").strip()
 # FROM por defecto: usar onboarding@resend.dev para pruebas sin verificar dominio
 FROM_EMAIL = os.environ.get("FROM_EMAIL", "Technicell <onboarding@resend.dev>")
+# Sobrescribible para pruebas contra un servidor Resend falso local
+RESEND_API_URL = os.environ.get("RESEND_API_URL", "https://api.resend.com/emails")
 
 # Opcional: configuración SMTP solo para fallback local (no funciona en Render)
 SMTP_HOST = os.environ.get("SMTP_HOST", "")
@@ -32,6 +39,24 @@ SMTP_USE_SSL = str(os.environ.get("SMTP_USE_SSL", "1")).lower() in ("1", "true",
 DEFAULT_TIMEOUT = int(os.environ.get("EMAIL_TIMEOUT", "30"))
 
 
+class EmailPermanentError(RuntimeError):
+    """Error que no se arregla reintentando (p. ej. 4xx de Resend)."""
+
+
+# Conexiones reutilizables por hilo (keep-alive HTTP / sesión SMTP abierta)
+_local = threading.local()
+
+
+def _get_http_session() -> requests.Session:
+    session = getattr(_local, "http", None)
+    if session is None:
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        _local.http = session
+    return session
+
+
 def _safe_escape(text: Optional[str]) -> str:
     return escape(text or "")
 
@@ -103,7 +128,6 @@ def _send_via_resend(to_email: str, subject: str, body_html: str, body_text: str
     if not RESEND_API_KEY:
         raise RuntimeError("RESEND_API_KEY no está configurada")
 
-    url = "https://api.resend.com/emails"
     headers = {
         "Authorization": f"Bearer {RESEND_API_KEY}",
         "Content-Type": "application/json",
@@ -118,15 +142,18 @@ def _send_via_resend(to_email: str, subject: str, body_html: str, body_text: str
     }
 
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
-        if not (200 <= resp.status_code < 300):
-            logger.error("Resend API error: %s %s", resp.status_code, resp.text)
-            raise RuntimeError(f"Resend API error: {resp.status_code} - {resp.text}")
-        logger.info("Correo enviado via Resend a %s (status %s)", to_email, resp.status_code)
+        resp = _get_http_session().post(RESEND_API_URL, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
     except requests.RequestException as exc:
         logger.exception("Error comunicándose con Resend API: %s", exc)
         raise RuntimeError(f"Error comunicándose con Resend API: {exc}") from exc
 
+    if not (200 <= resp.status_code < 300):
+        logger.error("Resend API error: %s %s", resp.status_code, resp.text)
+        if 400 <= resp.status_code < 500 and resp.status_code not in (408, 429):
+            raise EmailPermanentError(f"Resend API error: {resp.status_code} - {resp.text}")
+        raise RuntimeError(f"Resend API error: {resp.status_code} - {resp.text}")
+    logger.info("Correo enviado via Resend a %s (status %s)", to_email, resp.status_code)
+
 
 # -------------------------
 # Fallback: Envío por SMTP (solo si RESEND no configurado) - útil local
@@ -146,30 +173,89 @@ def _send_via_smtp(to_email: str, subject: str, body_html: str, body_text: str)
     msg.add_alternative(body_html, subtype="html")
 
     try:
-        if SMTP_USE_SSL:
-            logger.debug("Envío SMTP usando SSL %s:%s", SMTP_HOST, SMTP_PORT)
-            with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=DEFAULT_TIMEOUT) as server:
-                if SMTP_USER and SMTP_PASSWORD:
-                    server.login(SMTP_USER, SMTP_PASSWORD)
-                server.send_message(msg)
-        else:
-            logger.debug("Envío SMTP usando STARTTLS %s:%s", SMTP_HOST, SMTP_PORT)
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=DEFAULT_TIMEOUT) as server:
-                server.ehlo()
-                server.starttls()
-                server.ehlo()
-                if SMTP_USER and SMTP_PASSWORD:
-                    server.login(SMTP_USER, SMTP_PASSWORD)
-                server.send_message(msg)
+        server = _get_smtp()
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # la conexión reutilizada caducó: reconectar una vez
+            _close_smtp()
+            _get_smtp().send_message(msg)
         logger.info("Correo enviado via SMTP a %s", to_email)
     except Exception as exc:
+        _close_smtp()
         logger.exception("Error al enviar por SMTP: %s", exc)
         raise RuntimeError(f"Error al enviar por SMTP: {exc}") from exc
 
 
+def _get_smtp():
+    """Conexión SMTP abierta y autenticada, reutilizada por hilo."""
+    import smtplib
+
+    server = getattr(_local, "smtp", None)
+    if server is not None:
+        return server
+
+    if SMTP_USE_SSL:
+        logger.debug("Conexión SMTP usando SSL %s:%s", SMTP_HOST, SMTP_PORT)
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=DEFAULT_TIMEOUT)
+    else:
+        logger.debug("Conexión SMTP usando STARTTLS %s:%s", SMTP_HOST, SMTP_PORT)
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=DEFAULT_TIMEOUT)
+        server.ehlo()
+        server.starttls()
+        server.ehlo()
+    if SMTP_USER and SMTP_PASSWORD:
+        server.login(SMTP_USER, SMTP_PASSWORD)
+    _local.smtp = server
+    return server
+
+
+def _close_smtp() -> None:
+    server = getattr(_local, "smtp", None)
+    _local.smtp = None
+    if server is not None:
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+
 # -------------------------
 # Función pública principal
 # -------------------------
+def enviar_mensaje(to_email: str, subject: str, body_html: str, body_text: str) -> None:
+    """Envía un mensaje ya construido (lo usa el worker del outbox)."""
+    backend = "resend" if RESEND_API_KEY else "smtp"
+    t0 = time.perf_counter()
+    resultado = "error"
+    try:
+        # Preferir Resend (API) en producción/Render
+        if RESEND_API_KEY:
+            logger.debug("Usando Resend API para enviar correo a %s", to_email)
+            _send_via_resend(to_email=to_email, subject=subject, body_html=body_html, body_text=body_text)
+        else:
+            # Fallback SMTP (local)
+            logger.debug("RESEND_API_KEY no configurada — intentando envío por SMTP (fallback)")
+            _send_via_smtp(to_email=to_email, subject=subject, body_html=body_html, body_text=body_text)
+        resultado = "ok"
+    except EmailPermanentError:
+        resultado = "rejected"
+        raise
+    finally:
+        metrics.EMAIL_SEND.observe(time.perf_counter() - t0, backend=backend, result=resultado)
+
+
+def build_email_reparacion(
+    cliente_nombre: str,
+    ticket_id: str,
+    modelo: str,
+    falla: str,
+    message_from_front: Optional[str] = None,
+):
+    """(subject, body_html, body_text) del aviso de reparación."""
+    return _build_messages(cliente_nombre, ticket_id, modelo, falla, message_from_front)
+
+
 def enviar_email_reparacion(
     to_email: str,
     cliente_nombre: str,
@@ -179,16 +265,7 @@ def enviar_email_reparacion(
     message_from_front: Optional[str] = None,
 ) -> None:
     subject, body_html, body_text = _build_messages(cliente_nombre, ticket_id, modelo, falla, message_from_front)
-
-    # Preferir Resend (API) en producción/Render
-    if RESEND_API_KEY:
-        logger.debug("Usando Resend API para enviar correo a %s", to_email)
-        _send_via_resend(to_email=to_email, subject=subject, body_html=body_html, body_text=body_text)
-        return
-
-    # Fallback SMTP (local)
-    logger.debug("RESEND_API_KEY no configurada — intentando envío por SMTP (fallback)")
-    _send_via_smtp(to_email=to_email, subject=subject, body_html=body_html, body_text=body_text)
+    enviar_mensaje(to_email, subject, body_html, body_text)
 
 
 # ============================
@@ -0,0 +1,257 @@
+# services/email_outbox.py
+"""
+Outbox persistente de correos con workers de entrega en segundo plano.
+
+- `encolar_email_reparacion` inserta el mensaje en la tabla email_outbox
+  y retorna de inmediato (la petición HTTP no espera a Resend/SMTP).
+- Un hilo despachador reclama lotes con un UPDATE ... RETURNING atómico
+  (seguro con varios workers/procesos) y los entrega en un pool acotado
+  que reutiliza conexiones (keep-alive HTTP / sesión SMTP por hilo).
+- Los fallos se reintentan con backoff exponencial hasta
+  EMAIL_MAX_ATTEMPTS; los errores permanentes (4xx) no se reintentan.
+- Si el envío salió pero no se pudo guardar el resultado, el estado se
+  reintenta solo (en cada pasada del despachador), nunca el envío: un
+  'enviando' reclamado de nuevo por este proceso no se vuelve a mandar.
+
+Variables de entorno:
+  EMAIL_WORKERS         envíos concurrentes (default 4)
+  EMAIL_MAX_ATTEMPTS    intentos antes de marcar 'fallido' (default 6)
+  EMAIL_BACKOFF_BASE    segundos del primer reintento (default 15)
+  EMAIL_POLL_INTERVAL   segundos entre revisiones de la tabla (default 5)
+  EMAIL_LOCK_TIMEOUT    segundos tras los que un 'enviando' huérfano se reintenta (default 300)
+"""
+import os
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.email_outbox import EmailOutbox
+from services import email_equipo
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+EMAIL_WORKERS = int(os.environ.get("EMAIL_WORKERS", "4"))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_BACKOFF_BASE = float(os.environ.get("EMAIL_BACKOFF_BASE", "15"))
+EMAIL_POLL_INTERVAL = float(os.environ.get("EMAIL_POLL_INTERVAL", "5"))
+EMAIL_LOCK_TIMEOUT = float(os.environ.get("EMAIL_LOCK_TIMEOUT", "300"))
+
+
+# =====================================================
+# 📥 Encolar
+# =====================================================
+def encolar_email(
+    db: Session,
+    to_email: str,
+    subject: str,
+    body_html: str,
+    body_text: str,
+    equipo_id: Optional[int] = None,
+) -> EmailOutbox:
+    msg = EmailOutbox(
+        equipo_id=equipo_id,
+        to_email=to_email,
+        subject=subject,
+        body_html=body_html,
+        body_text=body_text,
+        status="pendiente",
+    )
+    db.add(msg)
+    db.commit()
+    db.refresh(msg)
+    _wakeup.set()
+    return msg
+
+
+def encolar_email_reparacion(db: Session, equipo, message_from_front: Optional[str] = None) -> EmailOutbox:
+    subject, body_html, body_text = email_equipo.build_email_reparacion(
+        cliente_nombre=equipo.cliente_nombre,
+        ticket_id=str(equipo.id),
+        modelo=equipo.modelo,
+        falla=equipo.fallo,
+        message_from_front=message_from_front,
+    )
+    return encolar_email(db, equipo.cliente_correo, subject, body_html, body_text, equipo_id=equipo.id)
+
+
+def get_email(db: Session, email_id: int) -> Optional[EmailOutbox]:
+    return db.get(EmailOutbox, email_id)
+
+
+def resumen(db: Session) -> dict:
+    filas = db.execute(
+        select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)
+    ).all()
+    return {status: total for status, total in filas}
+
+
+# =====================================================
+# 📤 Entrega
+# =====================================================
+def _backoff(attempts: int) -> timedelta:
+    segundos = EMAIL_BACKOFF_BASE * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=segundos * random.uniform(0.8, 1.2))
+
+
+def _reclamar_lote(limit: int) -> list:
+    """Marca hasta `limit` mensajes vencidos como 'enviando' y los devuelve."""
+    ahora = clock.now()
+    huerfano = ahora - timedelta(seconds=EMAIL_LOCK_TIMEOUT)
+    with SessionLocal() as db:
+        candidatos = select(EmailOutbox.id).where(
+            or_(
+                and_(EmailOutbox.status == "pendiente", EmailOutbox.next_attempt_at <= ahora),
+                and_(EmailOutbox.status == "enviando", EmailOutbox.locked_at < huerfano),
+            )
+        ).order_by(EmailOutbox.id).limit(limit)
+        ids = list(db.execute(candidatos).scalars())
+        if not ids:
+            return []
+        # Condicional: si otro worker ya los tomó, no se devuelven aquí
+        stmt = (
+            update(EmailOutbox)
+            .where(
+                EmailOutbox.id.in_(ids),
+                or_(
+                    EmailOutbox.status == "pendiente",
+                    and_(EmailOutbox.status == "enviando", EmailOutbox.locked_at < huerfano),
+                ),
+            )
+            .values(status="enviando", locked_at=ahora, attempts=EmailOutbox.attempts + 1)
+            .returning(
+                EmailOutbox.id,
+                EmailOutbox.to_email,
+                EmailOutbox.subject,
+                EmailOutbox.body_html,
+                EmailOutbox.body_text,
+                EmailOutbox.attempts,
+            )
+        )
+        filas = db.execute(stmt).all()
+        db.commit()
+        return filas
+
+
+def _escribir_estado(email_id: int, valores: dict) -> None:
+    with SessionLocal() as db:
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == email_id).values(**valores))
+        db.commit()
+
+
+# resultados ya decididos (correo enviado o descartado) que no se pudieron
+# guardar: email_id -> valores. Se reintentan sin volver a enviar.
+_sin_guardar: Dict[int, dict] = {}
+_sin_guardar_lock = threading.Lock()
+
+
+def _guardar_estado(email_id: int, valores: dict) -> bool:
+    try:
+        _escribir_estado(email_id, valores)
+    except Exception:
+        logger.exception("Correo %s: no se pudo guardar el estado %r; se reintentará", email_id, valores.get("status"))
+        with _sin_guardar_lock:
+            _sin_guardar[email_id] = valores
+        return False
+    with _sin_guardar_lock:
+        _sin_guardar.pop(email_id, None)
+    return True
+
+
+def _reintentar_estados() -> None:
+    with _sin_guardar_lock:
+        pendientes = list(_sin_guardar.items())
+    for email_id, valores in pendientes:
+        _guardar_estado(email_id, valores)
+
+
+def _entregar(fila) -> None:
+    email_id, to_email, subject, body_html, body_text, attempts = fila
+    with _sin_guardar_lock:
+        ya_resuelto = _sin_guardar.get(email_id)
+    if ya_resuelto is not None:
+        # reclamado otra vez tras EMAIL_LOCK_TIMEOUT: ya se envió, solo falta guardarlo
+        _guardar_estado(email_id, ya_resuelto)
+        return
+
+    valores = {"locked_at": None}
+    try:
+        email_equipo.enviar_mensaje(to_email, subject, body_html, body_text)
+        valores.update(status="enviado", sent_at=clock.now(), last_error=None)
+    except Exception as exc:
+        permanente = isinstance(exc, email_equipo.EmailPermanentError)
+        if permanente or attempts >= EMAIL_MAX_ATTEMPTS:
+            valores.update(status="fallido", last_error=str(exc))
+            logger.error("Correo %s fallido tras %s intentos: %s", email_id, attempts, exc)
+        else:
+            valores.update(
+                status="pendiente",
+                last_error=str(exc),
+                next_attempt_at=clock.now() + _backoff(attempts),
+            )
+            logger.warning("Correo %s: reintento programado (%s): %s", email_id, attempts, exc)
+
+    _guardar_estado(email_id, valores)
+
+
+# =====================================================
+# 🧵 Despachador
+# =====================================================
+_wakeup = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def procesar_pendientes() -> int:
+    """Una pasada: reclama y entrega un lote. Devuelve cuántos procesó."""
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=EMAIL_WORKERS, thread_name_prefix="email-outbox")
+    _reintentar_estados()
+    filas = _reclamar_lote(EMAIL_WORKERS * 2)
+    if filas:
+        hechos, _ = wait([_pool.submit(_entregar, fila) for fila in filas])
+        for futuro in hechos:
+            if futuro.exception() is not None:
+                logger.error("Error entregando correo", exc_info=futuro.exception())
+    return len(filas)
+
+
+def _loop() -> None:
+    while not _stop.is_set():
+        try:
+            if procesar_pendientes():
+                continue
+        except Exception:
+            logger.exception("Error en el despachador de correos")
+        _wakeup.wait(EMAIL_POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start() -> None:
+    global _thread
+    if _thread is not None:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="email-outbox-dispatcher", daemon=True)
+    _thread.start()
+
+
+def stop() -> None:
+    global _thread, _pool
+    _stop.set()
+    _wakeup.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
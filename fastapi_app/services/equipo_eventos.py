@@ -0,0 +1,490 @@
+# services/equipo_eventos.py
+"""
+Push en tiempo real de cambios de equipos (reemplaza el polling de
+/equipos/pendientes y /equipos/reparacion desde las tablets).
+
+- Eventos de mapper sobre Equipo (como services/kpi.py) escriben cada
+  alta, cambio, cambio de estado, archivado o borrado en la tabla
+  equipo_eventos, en la misma transacción del flush. El id de esa fila
+  es el cursor que guarda el cliente.
+- Al confirmarse la transacción el evento llega al Hub de cada worker:
+    local     se publica en este mismo proceso (after_commit). Sirve con
+              un solo worker y en tests.
+    postgres  pg_notify(ids) dentro de la transacción (Postgres solo lo
+              entrega si hay COMMIT). Un hilo por worker hace LISTEN y
+              lee los eventos notificados con un solo SELECT.
+- El Hub reparte a las suscripciones (SSE / WebSocket) según su filtro
+  de estados. Si una suscripción no da abasto se le pide resincronizar.
+
+Reconexión: el cliente manda el último id recibido y se le reenvían los
+eventos desde la tabla. Los ids salen de una secuencia al insertar, no
+al confirmar: una transacción con id menor puede confirmarse después de
+que el cliente ya recibió uno mayor. Por eso el replay empieza
+EQUIPO_EVENTOS_REPLAY_MARGEN ids antes del cursor y el cliente descarta
+por id los que ya aplicó. Dos eventos del mismo equipo no se cruzan (el
+UPDATE bloquea la fila hasta el COMMIT), así que uno tardío nunca pisa
+un estado más nuevo de su equipo. Si el cursor ya no está en la tabla
+(retención) o faltan demasiados, recibe un snapshot nuevo.
+
+Los UPDATE masivos por Core no disparan eventos de mapper; quien los use
+debe llamar a `registrar` en la misma transacción.
+
+Variables de entorno:
+  EQUIPO_EVENTOS_BROKER           auto | local | postgres (auto: postgres si la BD lo es)
+  EQUIPO_EVENTOS_RETENCION_HORAS  antigüedad máxima de la tabla (default 72)
+  EQUIPO_EVENTOS_MAX_REPLAY       eventos a reenviar antes de preferir snapshot (default 1000)
+  EQUIPO_EVENTOS_REPLAY_MARGEN    ids previos al cursor que se reenvían al reanudar (default 100)
+  EQUIPO_EVENTOS_COLA             eventos en cola por suscripción (default 500)
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import select as io_select
+from types import SimpleNamespace
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event, inspect, insert, select, delete, func, or_, text
+from sqlalchemy.orm import Session, object_session
+
+from models.equipo import Equipo
+from models.equipo_evento import EquipoEvento
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+EQUIPO_EVENTOS_BROKER = os.environ.get("EQUIPO_EVENTOS_BROKER", "auto").lower()
+EQUIPO_EVENTOS_RETENCION_HORAS = float(os.environ.get("EQUIPO_EVENTOS_RETENCION_HORAS", "72"))
+EQUIPO_EVENTOS_MAX_REPLAY = int(os.environ.get("EQUIPO_EVENTOS_MAX_REPLAY", "1000"))
+EQUIPO_EVENTOS_REPLAY_MARGEN = int(os.environ.get("EQUIPO_EVENTOS_REPLAY_MARGEN", "100"))
+EQUIPO_EVENTOS_COLA = int(os.environ.get("EQUIPO_EVENTOS_COLA", "500"))
+
+CANAL = "equipo_eventos"
+_PENDIENTES = "equipo_eventos_pendientes"  # clave en session.info (broker local)
+
+# lo que la tablet muestra en la lista (sin clave de bloqueo ni datos de contacto extra)
+CAMPOS_RESUMEN = (
+    "id", "cliente_nombre", "cliente_numero", "marca", "modelo", "fallo", "estado",
+    "archived", "imei", "fecha_ingreso", "fecha_entrega", "foto_url", "qr_url",
+)
+
+
+# =====================================================
+# 🧾 Tabla de eventos (misma transacción que el cambio)
+# =====================================================
+def _json(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+def resumen(equipo) -> dict:
+    """Resumen serializable de un Equipo (o de una fila con esas columnas)."""
+    return {c: _json(getattr(equipo, c, None)) for c in CAMPOS_RESUMEN}
+
+
+def fila(equipo, cambio: str, estado_anterior: Optional[str] = None) -> dict:
+    return {
+        "equipo_id": equipo.id,
+        "tipo": cambio,
+        "estado": equipo.estado,
+        "estado_anterior": estado_anterior,
+        "archived": bool(equipo.archived),
+        "datos": resumen(equipo),
+    }
+
+
+def a_evento(e) -> dict:
+    """Fila de equipo_eventos (ORM o Row) -> mensaje para el cliente."""
+    return {
+        "id": e.id,
+        "cambio": e.tipo,
+        "equipo_id": e.equipo_id,
+        "estado": e.estado,
+        "estado_anterior": e.estado_anterior,
+        "archived": bool(e.archived),
+        "fecha": _json(e.creado_en),
+        "equipo": e.datos,
+    }
+
+
+def _registrar(connection, session: Optional[Session], filas: List[dict]) -> List[dict]:
+    if not filas:
+        return []
+    ahora = clock.now()
+    filas = [{**f, "creado_en": ahora} for f in filas]
+    ids = connection.execute(
+        insert(EquipoEvento).returning(EquipoEvento.id, sort_by_parameter_order=True), filas
+    ).scalars().all()
+    eventos = [a_evento(SimpleNamespace(id=i, **f)) for i, f in zip(ids, filas)]
+    broker().notificar(connection, session, eventos)
+    return eventos
+
+
+def registrar(db: Session, filas: Iterable[dict]) -> List[dict]:
+    """
+    Para cambios hechos sin el ORM: `filas` se arman con `fila(...)`.
+    Debe llamarse dentro de la transacción del cambio; se publican al commit.
+    """
+    return _registrar(db.connection(), db, list(filas))
+
+
+# =====================================================
+# 📱 Eventos de mapper
+# =====================================================
+def _previo(target, campo):
+    hist = inspect(target).attrs[campo].history
+    return hist.deleted[0] if hist.deleted else getattr(target, campo)
+
+
+def _equipo_insertado(mapper, connection, target):
+    _registrar(connection, object_session(target), [fila(target, "creado")])
+
+
+def _equipo_actualizado(mapper, connection, target):
+    estado = inspect(target)
+    if not any(estado.attrs[a.key].history.has_changes() for a in mapper.column_attrs):
+        return
+    estado_antes = _previo(target, "estado")
+    if target.archived and not _previo(target, "archived"):
+        cambio = "archivado"
+    elif estado_antes != target.estado:
+        cambio = "estado"
+    else:
+        cambio = "actualizado"
+    _registrar(connection, object_session(target), [fila(target, cambio, estado_antes)])
+
+
+def _equipo_borrado(mapper, connection, target):
+    _registrar(connection, object_session(target), [fila(target, "eliminado", target.estado)])
+
+
+def _al_confirmar(session):
+    eventos = session.info.pop(_PENDIENTES, None)
+    if eventos:
+        hub.publicar(eventos)
+
+
+def _al_revertir(session):
+    session.info.pop(_PENDIENTES, None)
+
+
+def _registrar_listeners() -> None:
+    event.listen(Equipo, "after_insert", _equipo_insertado)
+    event.listen(Equipo, "after_update", _equipo_actualizado)
+    event.listen(Equipo, "after_delete", _equipo_borrado)
+    event.listen(Session, "after_commit", _al_confirmar)
+    event.listen(Session, "after_rollback", _al_revertir)
+
+
+_registrar_listeners()
+
+
+# =====================================================
+# 📡 Hub por proceso (suscripciones SSE / WebSocket)
+# =====================================================
+class Suscripcion:
+    def __init__(self, estados: Optional[Iterable[str]] = None):
+        self.estados = frozenset(estados or ())
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=EQUIPO_EVENTOS_COLA)
+        # se perdieron eventos (cola llena o broker reconectado):
+        # el cliente debe reconectar con su último cursor
+        self.resincronizar = False
+
+    def acepta(self, evento: dict) -> bool:
+        # el estado anterior también cuenta: así la tablet se entera de
+        # que un equipo salió de su lista
+        return (
+            not self.estados
+            or evento["estado"] in self.estados
+            or evento["estado_anterior"] in self.estados
+        )
+
+    def entregar(self, evento: dict) -> None:
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.resincronizar = True
+
+    def marcar(self) -> None:
+        self.resincronizar = True
+        try:
+            self.cola.put_nowait(None)  # despierta al consumidor
+        except asyncio.QueueFull:
+            pass
+
+    async def siguiente(self, timeout: float) -> Optional[dict]:
+        """
+        Próximo evento o None si pasó `timeout` (heartbeat). Revisar
+        `resincronizar` antes de usar el resultado.
+        """
+        try:
+            return await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Hub:
+    def __init__(self):
+        self._suscripciones = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @asynccontextmanager
+    async def suscribir(self, estados: Optional[Iterable[str]] = None):
+        self._loop = asyncio.get_running_loop()
+        b = broker()
+        if not b.activo():
+            # LISTEN antes del snapshot: nada queda entre uno y otro
+            await asyncio.to_thread(b.iniciar)
+        sus = Suscripcion(estados)
+        self._suscripciones.add(sus)
+        try:
+            yield sus
+        finally:
+            self._suscripciones.discard(sus)
+
+    def publicar(self, eventos: List[dict]) -> None:
+        """Seguro desde cualquier hilo (threadpool, listener de Postgres)."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._suscripciones:
+            return
+        loop.call_soon_threadsafe(self._repartir, list(eventos))
+
+    def resincronizar(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._marcar_todas)
+
+    def _repartir(self, eventos: List[dict]) -> None:
+        for sus in list(self._suscripciones):
+            for evento in eventos:
+                if sus.acepta(evento):
+                    sus.entregar(evento)
+
+    def _marcar_todas(self) -> None:
+        for sus in list(self._suscripciones):
+            sus.marcar()
+
+    @property
+    def suscripciones(self) -> int:
+        return len(self._suscripciones)
+
+
+hub = Hub()
+
+
+# =====================================================
+# 🔌 Brokers (cómo llega un evento a todos los workers)
+# =====================================================
+class BrokerLocal:
+    """Solo este proceso: publica al confirmar la sesión. Para tests y un solo worker."""
+
+    nombre = "local"
+
+    def notificar(self, connection, session: Optional[Session], eventos: List[dict]) -> None:
+        if session is not None:
+            session.info.setdefault(_PENDIENTES, []).extend(eventos)
+
+    def activo(self) -> bool:
+        return True
+
+    def iniciar(self, esperar: bool = True) -> None:
+        pass
+
+    def detener(self) -> None:
+        pass
+
+
+class BrokerPostgres(BrokerLocal):
+    """
+    NOTIFY en la transacción del cambio + un hilo LISTEN por worker.
+    El payload son solo ids (límite de 8000 bytes); el hilo lee los
+    eventos de la tabla, una consulta por ráfaga y no por cliente.
+    """
+
+    nombre = "postgres"
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._escuchando = threading.Event()
+
+    def notificar(self, connection, session, eventos) -> None:
+        if connection.dialect.name != "postgresql":
+            return super().notificar(connection, session, eventos)
+        connection.execute(
+            text("SELECT pg_notify(:canal, :ids)"),
+            {"canal": CANAL, "ids": ",".join(str(e["id"]) for e in eventos)},
+        )
+
+    def activo(self) -> bool:
+        return self._escuchando.is_set()
+
+    def iniciar(self, esperar: bool = True) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="equipo-eventos-listen", daemon=True)
+            self._thread.start()
+        if esperar:
+            self._escuchando.wait(timeout=5)
+
+    def detener(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        espera = 1.0
+        primera = True
+        while not self._stop.is_set():
+            try:
+                self._escuchar(reconexion=not primera)
+                espera = 1.0
+            except Exception:
+                logger.exception("LISTEN %s caído; reintentando en %.0fs", CANAL, espera)
+                self._escuchando.clear()
+                self._stop.wait(espera)
+                espera = min(espera * 2, 30.0)
+            primera = False
+
+    def _escuchar(self, reconexion: bool) -> None:
+        from database import engine
+
+        fairy = engine.raw_connection()
+        fairy.detach()  # conexión dedicada, fuera del pool
+        conn = fairy.driver_connection
+        try:
+            conn.autocommit = True
+            cur = conn.cursor()
+            cur.execute(f"LISTEN {CANAL}")
+            self._escuchando.set()
+            if reconexion:
+                # lo publicado mientras no escuchábamos se recupera con el cursor
+                hub.resincronizar()
+            ultimo_ping = time.monotonic()
+            while not self._stop.is_set():
+                if io_select.select([conn], [], [], 5.0) == ([], [], []):
+                    if time.monotonic() - ultimo_ping > 30:
+                        cur.execute("SELECT 1")  # detecta conexiones muertas
+                        ultimo_ping = time.monotonic()
+                    continue
+                conn.poll()
+                ids = set()
+                while conn.notifies:
+                    payload = conn.notifies.pop(0).payload
+                    ids.update(int(i) for i in payload.split(",") if i)
+                if ids:
+                    hub.publicar(_leer(ids))
+        finally:
+            self._escuchando.clear()
+            fairy.close()
+
+
+def _leer(ids) -> List[dict]:
+    from database import engine
+
+    with engine.connect() as conn:
+        filas = conn.execute(
+            select(EquipoEvento).where(EquipoEvento.id.in_(sorted(ids))).order_by(EquipoEvento.id)
+        ).all()
+    return [a_evento(f) for f in filas]
+
+
+_broker = None
+
+
+def broker():
+    global _broker
+    if _broker is None:
+        nombre = EQUIPO_EVENTOS_BROKER
+        if nombre == "auto":
+            from database import engine
+
+            nombre = "postgres" if engine.dialect.name == "postgresql" else "local"
+        if nombre == "postgres":
+            _broker = BrokerPostgres()
+        elif nombre == "local":
+            _broker = BrokerLocal()
+        else:
+            raise RuntimeError(f"EQUIPO_EVENTOS_BROKER desconocido: {nombre!r}")
+    return _broker
+
+
+# =====================================================
+# 🔁 Reanudar desde un cursor
+# =====================================================
+def _filtro_estados(stmt, estados):
+    if estados:
+        stmt = stmt.where(or_(EquipoEvento.estado.in_(estados), EquipoEvento.estado_anterior.in_(estados)))
+    return stmt
+
+
+async def ultimo_id(db) -> int:
+    """Cursor actual (se lee ANTES del snapshot: lo posterior llega como evento)."""
+    return (await db.execute(select(func.coalesce(func.max(EquipoEvento.id), 0)))).scalar_one()
+
+
+async def eventos_desde(db, cursor: int, estados=None) -> Optional[List[dict]]:
+    """
+    Eventos con id > cursor - EQUIPO_EVENTOS_REPLAY_MARGEN (filtrados por
+    estado), o None si no se puede reanudar: el cursor ya salió de la
+    tabla, es de otra BD o faltan más de EQUIPO_EVENTOS_MAX_REPLAY.
+    Incluye eventos que el cliente ya tiene: debe descartarlos por id.
+    """
+    minimo, maximo = (await db.execute(
+        select(func.min(EquipoEvento.id), func.max(EquipoEvento.id))
+    )).one()
+    if minimo is None or cursor < minimo - 1 or cursor > maximo:
+        return None
+    desde = max(cursor - EQUIPO_EVENTOS_REPLAY_MARGEN, 0)
+    tope = EQUIPO_EVENTOS_MAX_REPLAY + (cursor - desde)
+    stmt = _filtro_estados(
+        select(EquipoEvento).where(EquipoEvento.id > desde), estados
+    ).order_by(EquipoEvento.id).limit(tope + 1)
+    filas = (await db.execute(stmt)).scalars().all()
+    if len(filas) > tope:
+        return None
+    return [a_evento(f) for f in filas]
+
+
+# =====================================================
+# 🧹 Retención
+# =====================================================
+def limpiar(connection, horas: float = EQUIPO_EVENTOS_RETENCION_HORAS) -> int:
+    limite = clock.now() - timedelta(hours=horas)
+    borrados = connection.execute(delete(EquipoEvento).where(EquipoEvento.creado_en < limite)).rowcount
+    if borrados:
+        logger.info("Eventos de equipos: %s eliminados (retención %sh)", borrados, horas)
+    return borrados
+
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _loop_limpieza() -> None:
+    from database import engine
+
+    while not _stop.is_set():
+        try:
+            with engine.begin() as conn:
+                limpiar(conn)
+        except Exception:
+            logger.exception("Error limpiando equipo_eventos")
+        _stop.wait(3600)
+
+
+def start() -> None:
+    """Arranca el LISTEN (Postgres) y la limpieza periódica."""
+    global _thread
+    if _thread is not None:
+        return
+    _stop.clear()
+    broker().iniciar(esperar=False)  # no retrasar el arranque
+    _thread = threading.Thread(target=_loop_limpieza, name="equipo-eventos-retencion", daemon=True)
+    _thread.start()
+
+
+def stop() -> None:
+    _stop.set()
+    broker().detener()
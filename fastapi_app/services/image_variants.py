@@ -0,0 +1,221 @@
+# services/image_variants.py
+"""
+Derivados de fotos (miniatura y tamaño medio) para equipos y productos.
+
+- Se generan en segundo plano tras la subida (pool de hilos acotado), nunca
+  dentro de la petición.
+- Se respeta la orientación EXIF y se guardan sin metadatos (EXIF, GPS...).
+- Nombre determinista junto al original: {stem}_{variante}.{ext}; como el
+  original ya se llama por su sha256, los derivados se generan una vez.
+- Originales y derivados se leen/escriben por clave en services.storage
+  (disco local o S3).
+- Al terminar, quien encoló guarda las URLs de los derivados en la fila
+  (equipos.foto_variantes / productos.foto_variantes): EquipoOut y
+  ProductoResumen solo leen esa columna, sin consultar el storage.
+
+Variables de entorno:
+  IMAGE_VARIANT_FORMAT   webp (default) | jpeg
+  IMAGE_WORKERS          hilos del pool (default 2)
+
+Para generar (y registrar) los derivados de fotos ya subidas:
+    python -m services.image_variants
+"""
+import io
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from services import storage
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {"thumb": 320, "medium": 1024}  # lado mayor en px
+IMAGE_VARIANT_FORMAT = os.environ.get("IMAGE_VARIANT_FORMAT", "webp").lower()
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+
+_EXT = {"webp": "webp", "jpeg": "jpg"}[IMAGE_VARIANT_FORMAT]
+_CONTENT_TYPE = {"webp": "image/webp", "jpeg": "image/jpeg"}[IMAGE_VARIANT_FORMAT]
+_SAVE_KW = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}[IMAGE_VARIANT_FORMAT]
+
+
+def variant_key(original_key: str, variante: str) -> str:
+    p = PurePosixPath(original_key)
+    return str(p.with_name(f"{p.stem}_{variante}.{_EXT}"))
+
+
+# =====================================================
+# 🖼️ Generación
+# =====================================================
+def generar_variantes(original_key: str) -> Dict[str, str]:
+    """
+    Crea los derivados que falten del original `original_key` (idempotente).
+    Devuelve {variante: clave} de todos los derivados.
+    """
+    from PIL import Image, ImageOps
+
+    store = storage.get_store()
+    claves = {v: variant_key(original_key, v) for v in VARIANTS}
+    pendientes = [v for v, key in claves.items() if not store.exists(key)]
+    if not pendientes:
+        return claves
+
+    data = storage.read_bytes(original_key)
+    if data is None:
+        raise FileNotFoundError(original_key)
+
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEG: decodificar directamente a menor resolución
+        mayor = max(VARIANTS[v] for v in pendientes)
+        img.draft("RGB", (mayor, mayor))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        for variante in pendientes:
+            lado = VARIANTS[variante]
+            copia = img.copy()
+            copia.thumbnail((lado, lado), Image.LANCZOS)
+            buffer = io.BytesIO()
+            # sin exif= / icc_profile=: no se copian metadatos
+            copia.save(buffer, **_SAVE_KW)
+            store.put_bytes(claves[variante], buffer.getvalue(), _CONTENT_TYPE)
+    return claves
+
+
+Resultado = Dict[str, Dict[str, str]]  # clave del original -> {variante: clave}
+
+
+def _generar_seguro(original_keys, al_terminar: Optional[Callable[[Resultado], None]] = None) -> Resultado:
+    resultado = {}
+    for original_key in original_keys:
+        try:
+            resultado[original_key] = generar_variantes(original_key)
+        except Exception:
+            logger.exception("No se pudieron generar derivados de %s", original_key)
+    if resultado and al_terminar is not None:
+        try:
+            al_terminar(resultado)
+        except Exception:
+            logger.exception("No se pudieron registrar los derivados de %s", list(resultado))
+    return resultado
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def encolar(*original_keys: str, al_terminar: Optional[Callable[[Resultado], None]] = None) -> None:
+    """
+    Programa la generación de derivados sin esperar el resultado.
+    `al_terminar(resultado)` se llama una vez (en el hilo del pool) con los
+    originales que salieron bien; ahí se guardan las URLs en la BD.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, IMAGE_WORKERS), thread_name_prefix="img-variants")
+    _executor.submit(_generar_seguro, original_keys, al_terminar)
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# =====================================================
+# 🔗 URLs (solo texto, sin I/O)
+# =====================================================
+def clave_de_url(url: Optional[str]) -> Optional[str]:
+    """Clave de storage de una URL bajo /static/ (None si no es nuestra)."""
+    if not url:
+        return None
+    path = urlsplit(url).path
+    return path.lstrip("/") if path.startswith("/static/") else None
+
+
+def variant_urls(url: str, claves: Dict[str, str]) -> Dict[str, str]:
+    """{"thumb": url, "medium": url} con el mismo host que la URL del original."""
+    partes = urlsplit(url)
+    return {v: urlunsplit((partes.scheme, partes.netloc, "/" + key, "", "")) for v, key in claves.items()}
+
+
+def fotos_equipo(foto_url: Optional[str]) -> Dict[str, str]:
+    """
+    foto_url de equipos: JSON {"front", "back"} o una URL suelta
+    (se devuelve bajo la clave "foto").
+    """
+    if not foto_url:
+        return {}
+    try:
+        fotos = json.loads(foto_url)
+    except ValueError:
+        fotos = {"foto": foto_url}
+    if not isinstance(fotos, dict):
+        return {}
+    return {k: v for k, v in fotos.items() if isinstance(v, str)}
+
+
+def variantes_equipo(fotos: Dict[str, str], resultado: Resultado) -> Dict[str, Dict[str, str]]:
+    """Valor de equipos.foto_variantes: {"front": {"thumb", "medium"}, ...}."""
+    variantes = {}
+    for nombre, url in fotos.items():
+        key = clave_de_url(url)
+        if key in resultado:
+            variantes[nombre] = variant_urls(url, resultado[key])
+    return variantes
+
+
+# =====================================================
+# 🔁 Relleno de fotos existentes
+# =====================================================
+def generar_pendientes() -> int:
+    """Equipos y productos con foto pero sin foto_variantes registradas."""
+    from sqlalchemy import select
+
+    from database import SessionLocal
+    from models.equipo import Equipo
+    from models.productos import Producto
+    from crud import equipos as crud_equipos, productos as crud_productos
+
+    with SessionLocal() as db:
+        equipos = db.execute(
+            select(Equipo.id, Equipo.foto_url)
+            .where(Equipo.foto_url.isnot(None), Equipo.foto_variantes.is_(None))
+        ).all()
+        productos = db.execute(
+            select(Producto.id, Producto.foto_url)
+            .where(Producto.foto_url.isnot(None), Producto.foto_variantes.is_(None))
+        ).all()
+
+    n = 0
+    for equipo_id, foto_url in equipos:
+        fotos = fotos_equipo(foto_url)
+        resultado = _generar_seguro([k for k in map(clave_de_url, fotos.values()) if k])
+        if resultado:
+            with SessionLocal() as db:
+                crud_equipos.set_equipo_foto_variantes(db, equipo_id, foto_url, variantes_equipo(fotos, resultado))
+            n += 1
+    for producto_id, foto_url in productos:
+        key = clave_de_url(foto_url)
+        resultado = _generar_seguro([key]) if key else {}
+        if resultado:
+            with SessionLocal() as db:
+                crud_productos.set_producto_foto_variantes(db, producto_id, foto_url, variant_urls(foto_url, resultado[key]))
+            n += 1
+    return n
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"{generar_pendientes()} fotos registradas")
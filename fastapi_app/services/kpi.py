@@ -0,0 +1,274 @@
+# services/kpi.py
+"""
+Mantenimiento incremental de las tablas resumen del dashboard.
+
+- kpi_cobros_dia: por cada Cobro insertado/modificado/borrado se suma (o
+  resta) su aporte a la fila (día, método de pago).
+- kpi_equipos_estado: por cada Equipo que entra, cambia de estado o se
+  archiva se mueve una unidad entre filas (estado, archived).
+
+Se hace con eventos de mapper (como services/search.py): el UPSERT corre
+en la misma conexión y transacción del flush, así que el resumen nunca
+queda distinto de lo que se guardó. Los UPDATE/INSERT masivos por Core
+no disparan eventos; quien los use debe llamar a `ajustar_equipos`.
+
+- kpi_ventas_categoria_dia: crud.detalle_cobro suma cada carrito a la
+  fila (día, categoría) en la misma transacción de la venta (las ventas
+  van por Core, sin eventos de mapper: ver `filas_ventas`).
+
+`reconstruir(conn)` recalcula todo desde las tablas de hechos (migración
+v0002 o reparación manual: `python -m services.kpi`).
+
+KPI_TIMEZONE (default UTC) decide a qué día pertenece cada cobro.
+"""
+import os
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Iterable, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event, inspect, select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.cobros import Cobro
+from models.equipo import Equipo
+from models.detalle_cobro import DetalleCobro
+from models.productos import Producto
+from models.kpi import KpiCobrosDia, KpiEquiposEstado, KpiVentasCategoriaDia
+
+logger = logging.getLogger(__name__)
+
+KPI_TIMEZONE = ZoneInfo(os.environ.get("KPI_TIMEZONE", "UTC"))
+
+
+def dia_local(fecha=None) -> date:
+    """Día en KPI_TIMEZONE. Las fechas sin zona se guardan en UTC (datetime.utcnow)."""
+    if fecha is None:
+        fecha = datetime.now(timezone.utc)
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha.astimezone(KPI_TIMEZONE).date()
+
+
+# =====================================================
+# 🔧 UPSERT aditivo (Postgres / SQLite)
+# =====================================================
+def stmt_upsert(dialecto: str, model, claves: Tuple[str, ...]):
+    """INSERT ... ON CONFLICT DO UPDATE que suma las columnas que no son clave."""
+    insert = postgresql.insert if dialecto == "postgresql" else sqlite.insert
+    tabla = model.__table__
+    stmt = insert(tabla)
+    sumar = {c.name: c + stmt.excluded[c.name] for c in tabla.columns if c.name not in claves}
+    return stmt.on_conflict_do_update(index_elements=list(claves), set_=sumar)
+
+
+def _upsert(connection, model, claves: Tuple[str, ...], filas) -> None:
+    if not filas:
+        return
+    connection.execute(stmt_upsert(connection.dialect.name, model, claves), filas)
+
+
+# =====================================================
+# 💵 Cobros
+# =====================================================
+_CAMPOS_COBRO = ("fecha_pago", "metodo_pago", "monto_total", "anticipo", "saldo_pendiente")
+
+
+def _metodo(valor) -> str:
+    return getattr(valor, "value", None) or str(valor)
+
+
+def _aporte_cobro(fecha_pago, metodo_pago, monto_total, anticipo, saldo_pendiente, signo: int) -> dict:
+    return {
+        "dia": dia_local(fecha_pago),
+        "metodo_pago": _metodo(metodo_pago),
+        "cobros": signo,
+        "monto_total": signo * float(monto_total or 0),
+        "anticipos": signo * float(anticipo or 0),
+        "saldo_pendiente": signo * float(saldo_pendiente or 0),
+    }
+
+
+def _previo(target, campo):
+    hist = inspect(target).attrs[campo].history
+    return hist.deleted[0] if hist.deleted else getattr(target, campo)
+
+
+def _cobro_insertado(mapper, connection, target):
+    valores = [getattr(target, c) for c in _CAMPOS_COBRO]
+    _upsert(connection, KpiCobrosDia, ("dia", "metodo_pago"), [_aporte_cobro(*valores, 1)])
+
+
+def _cobro_actualizado(mapper, connection, target):
+    antes = [_previo(target, c) for c in _CAMPOS_COBRO]
+    despues = [getattr(target, c) for c in _CAMPOS_COBRO]
+    if antes == despues:
+        return
+    _upsert(connection, KpiCobrosDia, ("dia", "metodo_pago"), [
+        _aporte_cobro(*antes, -1),
+        _aporte_cobro(*despues, 1),
+    ])
+
+
+def _cobro_borrado(mapper, connection, target):
+    valores = [_previo(target, c) for c in _CAMPOS_COBRO]
+    _upsert(connection, KpiCobrosDia, ("dia", "metodo_pago"), [_aporte_cobro(*valores, -1)])
+
+
+# =====================================================
+# 📱 Equipos
+# =====================================================
+def _fila_equipo(estado, archived, signo: int) -> dict:
+    return {"estado": estado or "recibido", "archived": bool(archived), "total": signo}
+
+
+def ajustar_equipos(connection, cambios: Iterable[Tuple[Tuple[str, bool], Tuple[str, bool]]]) -> None:
+    """
+    Para cambios hechos sin el ORM: `cambios` son pares
+    ((estado_antes, archived_antes), (estado_despues, archived_despues)).
+    Debe llamarse en la misma transacción que el UPDATE.
+    """
+    neto = defaultdict(int)
+    for antes, despues in cambios:
+        if antes == despues:
+            continue
+        neto[antes] -= 1
+        neto[despues] += 1
+    filas = [_fila_equipo(estado, archived, n) for (estado, archived), n in neto.items() if n]
+    _upsert(connection, KpiEquiposEstado, ("estado", "archived"), filas)
+
+
+def _equipo_insertado(mapper, connection, target):
+    _upsert(connection, KpiEquiposEstado, ("estado", "archived"),
+            [_fila_equipo(target.estado, target.archived, 1)])
+
+
+def _equipo_actualizado(mapper, connection, target):
+    antes = (_previo(target, "estado") or "recibido", bool(_previo(target, "archived")))
+    despues = (target.estado or "recibido", bool(target.archived))
+    if antes != despues:
+        ajustar_equipos(connection, [(antes, despues)])
+
+
+def _equipo_borrado(mapper, connection, target):
+    _upsert(connection, KpiEquiposEstado, ("estado", "archived"),
+            [_fila_equipo(_previo(target, "estado"), _previo(target, "archived"), -1)])
+
+
+# =====================================================
+# 🛒 Ventas por categoría
+# =====================================================
+CLAVES_VENTAS = ("dia", "categoria_id")
+
+
+def filas_ventas(lineas, dia: date = None) -> list:
+    """
+    `lineas`: (categoria_id, cantidad, subtotal) de un carrito. Filas para
+    stmt_upsert(..., KpiVentasCategoriaDia, CLAVES_VENTAS), una por categoría.
+    """
+    dia = dia or dia_local()
+    por_categoria = {}
+    for categoria_id, cantidad, subtotal in lineas:
+        fila = por_categoria.setdefault(categoria_id, {"dia": dia, "categoria_id": categoria_id, "unidades": 0, "monto": 0.0})
+        fila["unidades"] += cantidad
+        fila["monto"] += float(subtotal or 0)
+    return list(por_categoria.values())
+
+
+def sumar_ventas(connection, lineas, dia: date = None) -> None:
+    """
+    Versión síncrona de lo que crud.detalle_cobro hace por carrito, para
+    otras rutas de venta. Debe llamarse en la misma transacción de la venta.
+    """
+    _upsert(connection, KpiVentasCategoriaDia, CLAVES_VENTAS, filas_ventas(lineas, dia))
+
+
+def _registrar_listeners() -> None:
+    event.listen(Cobro, "after_insert", _cobro_insertado)
+    event.listen(Cobro, "after_update", _cobro_actualizado)
+    event.listen(Cobro, "after_delete", _cobro_borrado)
+    event.listen(Equipo, "after_insert", _equipo_insertado)
+    event.listen(Equipo, "after_update", _equipo_actualizado)
+    event.listen(Equipo, "after_delete", _equipo_borrado)
+
+
+_registrar_listeners()
+
+
+# =====================================================
+# 🔁 Reconstrucción completa
+# =====================================================
+def reconstruir(connection) -> dict:
+    """
+    Recalcula las tablas resumen leyendo cobros y equipos (una sola pasada).
+    El día se calcula en Python para usar la misma KPI_TIMEZONE que los eventos.
+    """
+    connection.execute(delete(KpiCobrosDia))
+    connection.execute(delete(KpiEquiposEstado))
+
+    por_dia = {}
+    cobros = 0
+    resultado = connection.execute(
+        select(*(getattr(Cobro, c) for c in _CAMPOS_COBRO)).execution_options(yield_per=2000)
+    )
+    for fila in resultado:
+        aporte = _aporte_cobro(*fila, 1)
+        clave = (aporte["dia"], aporte["metodo_pago"])
+        if clave in por_dia:
+            for campo in ("cobros", "monto_total", "anticipos", "saldo_pendiente"):
+                por_dia[clave][campo] += aporte[campo]
+        else:
+            por_dia[clave] = aporte
+        cobros += 1
+    _upsert(connection, KpiCobrosDia, ("dia", "metodo_pago"), list(por_dia.values()))
+
+    por_estado = connection.execute(
+        select(Equipo.estado, Equipo.archived, func.count()).group_by(Equipo.estado, Equipo.archived)
+    ).all()
+    neto = defaultdict(int)
+    for estado, archived, total in por_estado:
+        neto[(estado or "recibido", bool(archived))] += total
+    _upsert(connection, KpiEquiposEstado, ("estado", "archived"),
+            [_fila_equipo(e, a, n) for (e, a), n in neto.items()])
+
+    ventas = reconstruir_ventas(connection)
+
+    logger.info("KPIs reconstruidos: %s cobros en %s días/método, %s grupos de equipos, %s ventas",
+                cobros, len(por_dia), len(neto), ventas)
+    return {"cobros": cobros, "filas_dia": len(por_dia), "grupos_equipos": len(neto), "ventas": ventas}
+
+
+def reconstruir_ventas(connection) -> int:
+    """
+    kpi_ventas_categoria_dia desde detalle_cobros. Las ventas sin fecha
+    (anteriores a la migración v0003) no tienen día y no se cuentan.
+    """
+    connection.execute(delete(KpiVentasCategoriaDia))
+    resultado = connection.execute(
+        select(DetalleCobro.fecha, Producto.categoria_id, DetalleCobro.cantidad, DetalleCobro.subtotal)
+        .join(Producto, Producto.id == DetalleCobro.producto_id)
+        .where(DetalleCobro.fecha.isnot(None))
+        .execution_options(yield_per=2000)
+    )
+    por_clave = {}
+    ventas = 0
+    for fecha, categoria_id, cantidad, subtotal in resultado:
+        for fila in filas_ventas([(categoria_id, cantidad, subtotal)], dia_local(fecha)):
+            clave = (fila["dia"], fila["categoria_id"])
+            if clave in por_clave:
+                por_clave[clave]["unidades"] += fila["unidades"]
+                por_clave[clave]["monto"] += fila["monto"]
+            else:
+                por_clave[clave] = fila
+        ventas += 1
+    _upsert(connection, KpiVentasCategoriaDia, CLAVES_VENTAS, list(por_clave.values()))
+    return ventas
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from database import engine
+
+    with engine.begin() as conn:
+        print(reconstruir(conn))
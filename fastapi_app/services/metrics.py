@@ -0,0 +1,315 @@
+# services/metrics.py
+"""
+Métricas estilo Prometheus (formato de texto 0.0.4) sin dependencias.
+
+- MetricsMiddleware (ASGI): latencia por plantilla de ruta (histograma),
+  peticiones en curso, contador por código de estado, y por petición:
+  número de sentencias SQL y tiempo total en BD.
+- Eventos de SQLAlchemy (todas las engines, también la async): duración de
+  cada sentencia.
+- Espera al pedir conexión a cada pool, sync y async (database.*pool_wait_stats).
+- Temporizadores de QR decode, render de PDF y envío de correo.
+
+Todo se expone en GET /metrics. Cada proceso tiene sus propios valores
+(con varios workers, Prometheus debe leer cada uno o agregarlos).
+"""
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+# =====================================================
+# 📊 Tipos de métrica
+# =====================================================
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(l, "")) for l in self.labels)
+
+    def _fmt_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        partes = [f'{l}="{_escape(v)}"' for l, v in zip(self.labels, key)]
+        if extra:
+            partes.append(extra)
+        return "{" + ",".join(partes) + "}" if partes else ""
+
+    def render(self) -> str:
+        raise NotImplementedError
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> str:
+        with self._lock:
+            items = list(self._values.items())
+        return "\n".join(f"{self.name}{self._fmt_labels(k)} {v}" for k, v in items)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [conteos por bucket..., +Inf], suma
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            data[0][i] += 1
+            data[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> str:
+        with self._lock:
+            items = [(k, list(v[0]), v[1]) for k, v in self._values.items()]
+        lineas = []
+        for key, conteos, suma in items:
+            acumulado = 0
+            for limite, n in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += n
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                etiqueta = 'le="%s"' % le
+                lineas.append(f"{self.name}_bucket{self._fmt_labels(key, etiqueta)} {acumulado}")
+            lineas.append(f"{self.name}_sum{self._fmt_labels(key)} {suma}")
+            lineas.append(f"{self.name}_count{self._fmt_labels(key)} {acumulado}")
+        return "\n".join(lineas)
+
+
+_REGISTRY = []
+
+
+# =====================================================
+# 📈 Métricas de la app
+# =====================================================
+HTTP_REQUESTS = Counter("http_requests_total", "Peticiones HTTP por ruta y código", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Latencia por plantilla de ruta", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Peticiones en curso", ("method",))
+
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request", "Sentencias SQL por petición", ("route",), buckets=COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "Tiempo en BD por petición", ("route",))
+DB_STATEMENT_DURATION = Histogram("db_statement_duration_seconds", "Duración de cada sentencia SQL", ("operation",))
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener conexión del pool", ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "Checkouts que agotaron DB_POOL_TIMEOUT", ("pool",))
+
+QR_DECODE = Histogram("qr_decode_seconds", "Decodificación de QR (incluye espera de turno)", ("result",))
+PDF_RENDER = Histogram("pdf_render_seconds", "Render de tickets PDF", ("ticket",))
+EMAIL_SEND = Histogram("email_send_seconds", "Envío de correo", ("backend", "result"))
+
+
+# =====================================================
+# 🧵 Contexto por petición
+# =====================================================
+class RequestContext:
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.guard = None  # QueryRecorder de services/query_guard, si está activo
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope)
+
+
+_current: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar("metrics_request", default=None)
+
+
+def current_request() -> Optional[RequestContext]:
+    return _current.get()
+
+
+@contextmanager
+def request_context(scope=None):
+    """Contexto propio para un bloque fuera de MetricsMiddleware (tests, benchmarks)."""
+    ctx = RequestContext(scope)
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if scope.get("path", "").startswith("/static/"):
+        return "/static"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI puro (no envuelve el body como BaseHTTPMiddleware)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope.get("method", "")
+        ctx = RequestContext(scope)
+        token = _current.set(ctx)
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - t0
+            HTTP_IN_FLIGHT.dec(method=method)
+            route = ctx.route
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status["code"]))
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            DB_STATEMENTS_PER_REQUEST.observe(ctx.statements, route=route)
+            DB_TIME_PER_REQUEST.observe(ctx.db_seconds, route=route)
+            _current.reset(token)
+
+
+# =====================================================
+# 🗄️ SQLAlchemy y pool
+# =====================================================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_t0", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    pila = conn.info.get("_metrics_t0")
+    if not pila:
+        return
+    elapsed = time.perf_counter() - pila.pop()
+    operacion = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_STATEMENT_DURATION.observe(elapsed, operation=operacion)
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.statements += 1
+        ctx.db_seconds += elapsed
+        if ctx.guard is not None:
+            ctx.guard.registrar(statement, parameters, elapsed)
+
+
+def _handle_error(exception_context):
+    # sentencia fallida: sacar su tiempo de inicio de la conexión
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("_metrics_t0"):
+        conn.info["_metrics_t0"].pop()
+
+
+def _pool_wait(pool: str):
+    def observar(elapsed: float, timed_out: bool) -> None:
+        DB_POOL_WAIT.observe(elapsed, pool=pool)
+        if timed_out:
+            DB_POOL_TIMEOUTS.inc(pool=pool)
+    return observar
+
+
+_installed = False
+
+
+def install() -> None:
+    """Registra los eventos (idempotente)."""
+    global _installed
+    if _installed:
+        return
+    from database import pool_wait_stats, async_pool_wait_stats
+
+    # a nivel de clase Engine: cubre también el engine async (sync_engine)
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    pool_wait_stats.observers.append(_pool_wait("sync"))
+    async_pool_wait_stats.observers.append(_pool_wait("async"))
+    _installed = True
+
+
+# =====================================================
+# 📤 Exposición
+# =====================================================
+def render() -> str:
+    from database import pool_status
+
+    partes = []
+    for m in _REGISTRY:
+        cuerpo = m.render()
+        partes.append(f"# HELP {m.name} {m.doc}\n# TYPE {m.name} {m.kind}")
+        if cuerpo:
+            partes.append(cuerpo)
+
+    # estado instantáneo de los pools (sync y, si ya se creó, async)
+    estado = pool_status()
+    pools = {"sync": estado, "async": estado["async"] or {}}
+    for campo in ("size", "checked_in", "checked_out", "overflow"):
+        lineas = [
+            f'db_pool_{campo}{{pool="{nombre}"}} {p[campo]}'
+            for nombre, p in pools.items() if isinstance(p.get(campo), (int, float))
+        ]
+        if lineas:
+            partes.append(f"# TYPE db_pool_{campo} gauge\n" + "\n".join(lineas))
+    return "\n".join(partes) + "\n"
@@ -0,0 +1,100 @@
+# services/qr_assets.py
+"""
+QR de equipos determinista y cacheado.
+
+El QR solo contiene el ID del equipo, así que la imagen depende únicamente
+del ID: se guarda como static/qrs/equipos/{id}.png, se genera una sola vez
+y se reutiliza. Ni servirla ni construir su URL requiere consultar la BD.
+El PNG se guarda en services.storage (disco local o S3 compartido).
+
+Solo `ensure_qr` (al crear el equipo) escribe en el almacenamiento. Servir
+un id que no tiene PNG lo genera en memoria y nada más: recorrer ids con
+GET no puede llenar el disco ni el bucket.
+"""
+import io
+import logging
+import base64
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Tuple
+
+from services import storage
+
+logger = logging.getLogger(__name__)
+
+QR_DIR = Path("static/qrs/equipos")
+QR_DIR.mkdir(parents=True, exist_ok=True)
+
+# subir si cambia el formato de la imagen (invalida ETags y cachés de clientes)
+QR_VERSION = 1
+
+
+def qr_filename(equipo_id: int) -> str:
+    return f"{int(equipo_id)}.png"
+
+
+def qr_key(equipo_id: int) -> str:
+    return f"static/qrs/equipos/{qr_filename(equipo_id)}"
+
+
+def qr_static_url(equipo_id: int) -> str:
+    """Ruta relativa bajo /static (la sirve StaticFiles)."""
+    return f"/static/qrs/equipos/{qr_filename(equipo_id)}"
+
+
+def qr_etag(equipo_id: int) -> str:
+    # fuerte: mismo id + misma versión => mismos bytes
+    digest = hashlib.sha1(f"qr:{QR_VERSION}:{int(equipo_id)}".encode()).hexdigest()[:16]
+    return f'"{digest}"'
+
+
+def _render_png(text: str) -> bytes:
+    import qrcode
+
+    qr = qrcode.make(text)
+    buffer = io.BytesIO()
+    qr.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _leer(equipo_id: int):
+    try:
+        return storage.read_bytes(qr_key(equipo_id))
+    except Exception:
+        logger.exception("No se pudo leer el QR del equipo %s del almacenamiento", equipo_id)
+        return None
+
+
+@lru_cache(maxsize=512)
+def get_qr_png(equipo_id: int) -> bytes:
+    """
+    Bytes PNG del QR: memoria -> disco / almacenamiento -> generar.
+    Lo generado aquí queda solo en memoria (no escribe).
+    """
+    data = _leer(equipo_id)
+    if data:
+        return data
+    return _render_png(str(int(equipo_id)))
+
+
+def save_qr_png(equipo_id: int, data: bytes) -> None:
+    """Escritura atómica; si ya existe el mismo contenido no se reescribe."""
+    try:
+        storage.get_store().put_bytes(qr_key(equipo_id), data, "image/png")
+    except Exception:
+        logger.exception("No se pudo guardar el QR del equipo %s", equipo_id)
+
+
+def ensure_qr(equipo_id: int) -> bytes:
+    """Al crear el equipo (o en BackgroundTasks): deja el PNG en el almacenamiento."""
+    data = _leer(equipo_id)
+    if not data:
+        data = _render_png(str(int(equipo_id)))
+        save_qr_png(equipo_id, data)
+    return data
+
+
+def get_qr_png_and_base64(equipo_id: int, guardar: bool = False) -> Tuple[bytes, str]:
+    data = ensure_qr(equipo_id) if guardar else get_qr_png(equipo_id)
+    return data, base64.b64encode(data).decode("utf-8")
@@ -0,0 +1,193 @@
+# services/qr_decode.py
+"""
+Decodificación de QR fuera del event loop.
+
+- Las variantes (RGB, grises, autocontraste × 4 rotaciones) se generan de
+  forma perezosa y se detiene en el primer acierto.
+- Se ejecuta en un pool de procesos acotado; cada proceso tiene su propio
+  cv2.QRCodeDetector (no se comparte entre hilos).
+- Cada petición tiene un plazo: al vencer se responde sin esperar al worker,
+  y el worker deja de probar variantes al pasar el mismo plazo. Su turno
+  en la cola se libera cuando el worker termina.
+
+Variables de entorno:
+  QR_DECODE_WORKERS   procesos del pool (0 = hilos en el proceso actual)
+  QR_DECODE_TIMEOUT   segundos por petición (default 8)
+"""
+import io
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from services import metrics
+
+QR_DECODE_WORKERS = int(os.environ.get("QR_DECODE_WORKERS", str(min(2, os.cpu_count() or 1))))
+QR_DECODE_TIMEOUT = float(os.environ.get("QR_DECODE_TIMEOUT", "8"))
+
+
+class QRDecodeTimeout(Exception):
+    pass
+
+
+# =====================================================
+# 🔧 Lado worker (proceso o hilo)
+# =====================================================
+_local = threading.local()
+
+
+def _init_worker() -> None:
+    import cv2
+
+    _local.detector = cv2.QRCodeDetector()
+
+
+def _get_detector():
+    if getattr(_local, "detector", None) is None:
+        _init_worker()
+    return _local.detector
+
+
+def _variantes(pil_image) -> Iterator:
+    """
+    Genera candidatos en orden de probabilidad de acierto, calculando
+    cada transformación solo cuando hace falta.
+    """
+    from PIL import ImageOps
+
+    bases = [
+        lambda: pil_image.convert("RGB"),
+        lambda: ImageOps.grayscale(pil_image),
+        lambda: ImageOps.autocontrast(pil_image),
+    ]
+    cache = {}
+    for rot in (0, 90, 180, 270):
+        for i, build in enumerate(bases):
+            try:
+                if i not in cache:
+                    cache[i] = build()
+                img = cache[i]
+                yield img if rot == 0 else img.rotate(rot, expand=True)
+            except Exception:
+                continue
+
+
+def _pil_to_cv2_bgr(pil_image):
+    import numpy as np
+
+    rgb = np.array(pil_image.convert("RGB"))
+    # PIL usa RGB, OpenCV suele usar BGR
+    return rgb[:, :, ::-1].copy()
+
+
+def try_decode_qr(pil_image, deadline: Optional[float] = None) -> Optional[str]:
+    """
+    Retorna el primer texto de QR encontrado o None.
+    `deadline` es un time.time() absoluto a partir del cual se deja de intentar.
+    """
+    detector = _get_detector()
+    for img in _variantes(pil_image):
+        if deadline is not None and time.time() > deadline:
+            return None
+        try:
+            data, _, _ = detector.detectAndDecode(_pil_to_cv2_bgr(img))
+            if data and isinstance(data, str) and data.strip():
+                return data.strip()
+        except Exception:
+            continue
+    return None
+
+
+def decode_bytes(file_bytes: bytes, deadline: Optional[float] = None) -> Optional[str]:
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(file_bytes))
+    image.load()
+    return try_decode_qr(image, deadline)
+
+
+# =====================================================
+# 🚀 Lado app (async)
+# =====================================================
+_executor: Optional[Executor] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_lock = threading.Lock()
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                if QR_DECODE_WORKERS > 0:
+                    _executor = ProcessPoolExecutor(
+                        max_workers=QR_DECODE_WORKERS,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                    )
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qr-decode")
+    return _executor
+
+
+async def decode_qr(file_bytes: bytes, timeout: float = QR_DECODE_TIMEOUT) -> Optional[str]:
+    """
+    Decodifica en el pool sin bloquear el event loop.
+    Lanza QRDecodeTimeout si se supera `timeout` (incluida la espera de turno).
+    """
+    t0 = time.perf_counter()
+    resultado = "error"
+    try:
+        texto = await _decode_qr(file_bytes, timeout)
+        resultado = "ok" if texto else "not_found"
+        return texto
+    except QRDecodeTimeout:
+        resultado = "timeout"
+        raise
+    finally:
+        metrics.QR_DECODE.observe(time.perf_counter() - t0, result=resultado)
+
+
+async def _decode_qr(file_bytes: bytes, timeout: float) -> Optional[str]:
+    global _semaphore
+    if _semaphore is None:
+        # cola acotada: como mucho 2 trabajos por worker en vuelo
+        _semaphore = asyncio.Semaphore(max(1, QR_DECODE_WORKERS) * 2)
+
+    deadline = time.time() + timeout
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.wait_for(_semaphore.acquire(), timeout)
+    except asyncio.TimeoutError:
+        raise QRDecodeTimeout("Tiempo de espera agotado para decodificar QR")
+    try:
+        cf = _get_executor().submit(decode_bytes, file_bytes, deadline)
+    except BaseException:
+        _semaphore.release()
+        raise
+    # el turno se libera cuando el worker termina de verdad, no al vencer el
+    # plazo: si no, con workers ocupados la cola dejaría de estar acotada
+    cf.add_done_callback(lambda _: _liberar(loop))
+    try:
+        restante = max(0.0, deadline - time.time())
+        return await asyncio.wait_for(asyncio.wrap_future(cf), restante)
+    except asyncio.TimeoutError:
+        raise QRDecodeTimeout("Tiempo de espera agotado para decodificar QR")
+
+
+def _liberar(loop: asyncio.AbstractEventLoop) -> None:
+    # se llama desde el hilo del executor (o el de resultados del pool de procesos)
+    try:
+        loop.call_soon_threadsafe(_semaphore.release)
+    except RuntimeError:
+        pass  # loop ya cerrado (apagado)
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
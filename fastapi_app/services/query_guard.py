@@ -0,0 +1,196 @@
+# services/query_guard.py
+"""
+Detector de N+1 y de consultas lentas por petición.
+
+No registra eventos propios: services/metrics.py ya cronometra cada
+sentencia y, si la petición (o el bloque `track(...)`) tiene un
+QueryRecorder en su RequestContext, se la pasa con su duración. Aquí:
+- se cuentan las sentencias;
+- se agrupa por texto SQL: la misma sentencia repetida N+ veces con
+  parámetros distintos es el patrón N+1 (un SELECT por fila) y se
+  registra una vez con la ruta que la originó;
+- se registran las sentencias que tardan más de SLOW_QUERY_MS.
+
+En modo estricto (tests) el exceso de presupuesto o un N+1 lanza
+QueryBudgetExceeded al terminar la petición o el bloque `track`.
+
+Variables de entorno:
+  QUERY_GUARD            1 (default) / 0 para desactivar
+  QUERY_GUARD_STRICT     1 para lanzar excepción (tests / CI)
+  QUERY_BUDGET           máximo de sentencias por petición (0 = sin límite)
+  N_PLUS_ONE_THRESHOLD   repeticiones con parámetros distintos (default 5)
+  SLOW_QUERY_MS          umbral de consulta lenta en ms (default 200)
+"""
+import os
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Set
+
+from services import metrics
+
+logger = logging.getLogger("query_guard")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return str(os.environ.get(name, "1" if default else "0")).lower() in ("1", "true", "yes")
+
+
+QUERY_GUARD = _env_bool("QUERY_GUARD", True)
+QUERY_GUARD_STRICT = _env_bool("QUERY_GUARD_STRICT", False)
+QUERY_BUDGET = int(os.environ.get("QUERY_BUDGET", "0"))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "5"))
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryRecorder:
+    """Sentencias de una petición (o de un bloque `track`)."""
+
+    def __init__(self, label: str, budget: int = QUERY_BUDGET, strict: bool = QUERY_GUARD_STRICT, scope=None):
+        self._label = label
+        self.scope = scope
+        self.budget = budget
+        self.strict = strict
+        self.statements = 0
+        self.db_seconds = 0.0
+        self._params: Dict[str, Set[int]] = {}   # sql -> hashes de parámetros vistos
+        self.repeated: Dict[str, int] = {}       # sql -> veces (solo las marcadas N+1)
+        self.slow = []
+        self.fallos: List[str] = []              # solo en modo estricto
+        self.pausas = 0                          # > 0 dentro de pausar()
+
+    @property
+    def label(self) -> str:
+        if self.scope is None:
+            return self._label
+        return f"{self.scope.get('method', '')} {metrics.route_template(self.scope)}"
+
+    def _fallar(self, mensaje: str) -> None:
+        if self.strict:
+            self.fallos.append(mensaje)
+
+    def registrar(self, statement: str, parameters, elapsed: float) -> None:
+        """Lo llama services/metrics.py tras cada sentencia ya cronometrada."""
+        if self.pausas:
+            return
+        self.statements += 1
+        self.db_seconds += elapsed
+        if self.budget and self.statements == self.budget + 1:
+            logger.warning("[%s] presupuesto de %s sentencias superado", self.label, self.budget)
+            self._fallar(f"{self.label}: más de {self.budget} sentencias SQL")
+
+        vistos = self._params.setdefault(statement, set())
+        try:
+            vistos.add(hash(repr(parameters)))
+        except Exception:
+            vistos.add(len(vistos))
+        veces = len(vistos)
+        if veces >= N_PLUS_ONE_THRESHOLD:
+            primera = statement not in self.repeated
+            self.repeated[statement] = veces
+            if primera:
+                logger.warning(
+                    "[%s] posible N+1: la misma sentencia con %s parámetros distintos: %s",
+                    self.label, veces, _resumen(statement),
+                )
+                self._fallar(f"{self.label}: N+1 en {_resumen(statement)}")
+
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            self.slow.append((elapsed, statement))
+            logger.warning("[%s] consulta lenta (%.1f ms): %s", self.label, elapsed * 1000, _resumen(statement))
+
+    def comprobar(self) -> None:
+        """En modo estricto, lanza los fallos registrados (fin de petición o de `track`)."""
+        if self.fallos:
+            raise QueryBudgetExceeded("; ".join(self.fallos))
+
+    def summary(self) -> dict:
+        return {
+            "label": self.label,
+            "statements": self.statements,
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "n_plus_one": {_resumen(k): v for k, v in self.repeated.items()},
+            "slow": len(self.slow),
+        }
+
+
+def _resumen(statement: str, largo: int = 160) -> str:
+    s = " ".join(statement.split())
+    return s if len(s) <= largo else s[:largo] + "..."
+
+
+# =====================================================
+# 🔍 Uso
+# =====================================================
+@contextmanager
+def track(label: str, budget: int = QUERY_BUDGET, strict: bool = QUERY_GUARD_STRICT):
+    """
+    Registra las sentencias del bloque (tests, benchmarks, scripts):
+
+        with query_guard.track("listado", budget=2, strict=True) as rec:
+            crud_productos.list_productos(db)
+        assert rec.statements <= 2
+    """
+    metrics.install()
+    rec = QueryRecorder(label, budget=budget, strict=strict)
+    with metrics.request_context() as ctx:
+        ctx.guard = rec
+        yield rec
+    rec.comprobar()
+
+
+def current():
+    """QueryRecorder de la petición o bloque `track` en curso (o None)."""
+    ctx = metrics.current_request()
+    return ctx.guard if ctx is not None else None
+
+
+@contextmanager
+def pausar():
+    """
+    No registra las sentencias del bloque. Para lecturas por lotes donde
+    repetir la misma sentencia es lo esperado (crud/export.py), no un N+1.
+    """
+    rec = current()
+    if rec is None:
+        yield
+        return
+    rec.pausas += 1
+    try:
+        yield
+    finally:
+        rec.pausas -= 1
+
+
+class QueryGuardMiddleware:
+    """
+    Un QueryRecorder por petición HTTP, colgado del RequestContext de
+    MetricsMiddleware (debe ir por dentro de él); la etiqueta es METHOD +
+    plantilla de ruta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_GUARD:
+            return await self.app(scope, receive, send)
+
+        ctx = metrics.current_request()
+        if ctx is None:
+            # sin MetricsMiddleware por fuera: contexto propio
+            with metrics.request_context(scope):
+                return await self(scope, receive, send)
+
+        rec = QueryRecorder(scope.get("path", ""), scope=scope)
+        ctx.guard = rec
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            ctx.guard = None
+            if rec.repeated or rec.slow:
+                logger.info("Resumen SQL %s", rec.summary())
+        rec.comprobar()
@@ -0,0 +1,38 @@
+# services/resumen_ventas.py
+"""
+Columnas pre-agregadas de ventas por producto
+(productos.unidades_vendidas / productos.ultima_venta).
+
+Las mantiene crud.detalle_cobro en el mismo UPDATE que descuenta el stock,
+así el catálogo las lee sin tocar detalle_cobros. `setup_resumen_ventas`
+las añade a tablas ya existentes (create_all no altera tablas) y calcula
+las unidades históricas una sola vez, al crear la columna.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+from database import engine as _engine
+
+logger = logging.getLogger(__name__)
+
+
+def setup_resumen_ventas(engine=_engine) -> None:
+    with engine.begin() as conn:
+        existentes = {c["name"] for c in inspect(conn).get_columns("productos")}
+
+        if "ultima_venta" not in existentes:
+            tipo = "TIMESTAMP WITH TIME ZONE" if conn.dialect.name == "postgresql" else "TIMESTAMP"
+            conn.execute(text(f"ALTER TABLE productos ADD COLUMN ultima_venta {tipo}"))
+
+        if "unidades_vendidas" not in existentes:
+            conn.execute(text(
+                "ALTER TABLE productos ADD COLUMN unidades_vendidas INTEGER NOT NULL DEFAULT 0"
+            ))
+            # historial previo: sumar una vez (la fecha de esas ventas no se guardaba)
+            resultado = conn.execute(text(
+                "UPDATE productos SET unidades_vendidas = ("
+                "SELECT COALESCE(SUM(d.cantidad), 0) FROM detalle_cobros d "
+                "WHERE d.producto_id = productos.id)"
+            ))
+            logger.info("Resumen de ventas: %s productos recalculados", resultado.rowcount)
@@ -0,0 +1,221 @@
+# services/search.py
+"""
+Búsqueda por subcadena indexada e insensible a acentos para clientes,
+equipos y productos.
+
+- Cada modelo guarda una columna normalizada (minúsculas, sin acentos)
+  que se rellena automáticamente al insertar/actualizar.
+- Postgres: índices GIN pg_trgm sobre esas columnas; los LIKE '%term%'
+  usan el índice y los resultados se ordenan por similarity().
+- SQLite: tablas FTS5 (tokenizer trigram) sincronizadas por triggers;
+  los resultados se ordenan por bm25 (rank).
+- Sin índices disponibles (o término < 3 letras en SQLite) se hace un
+  LIKE sobre la columna normalizada.
+
+`setup_search(engine)` se ejecuta en el paso de migración (migrate.py),
+no al arrancar la app; la app detecta en la primera búsqueda qué índices
+existen.
+"""
+import logging
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import event, inspect, text, table, column, literal_column, func
+
+from database import engine as _engine
+from models.client import Cliente
+from models.equipo import Equipo
+from models.productos import Producto
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """'José PÉREZ' -> 'jose perez'"""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_acentos = "".join(ch for ch in descompuesto if not unicodedata.combining(ch))
+    return " ".join(sin_acentos.lower().split())
+
+
+# =====================================================
+# 🔧 Columnas normalizadas (tabla -> (modelo, columna, fuentes))
+# =====================================================
+SEARCH_COLUMNS = {
+    "clientes": (Cliente, "nombre_busqueda", ("nombre_completo",)),
+    "equipos": (Equipo, "cliente_nombre_busqueda", ("cliente_nombre",)),
+    "productos": (Producto, "busqueda", ("nombre", "descripcion", "codigo")),
+}
+
+
+def _texto_busqueda(obj, fuentes) -> str:
+    return normalizar(" ".join(str(getattr(obj, f) or "") for f in fuentes))
+
+
+def _registrar_listeners() -> None:
+    for model, col, fuentes in SEARCH_COLUMNS.values():
+        def _rellenar(mapper, connection, target, col=col, fuentes=fuentes):
+            setattr(target, col, _texto_busqueda(target, fuentes))
+
+        event.listen(model, "before_insert", _rellenar)
+        event.listen(model, "before_update", _rellenar)
+
+
+_registrar_listeners()
+
+
+# =====================================================
+# 🏗️ Índices por backend
+# =====================================================
+_backend = _engine.url.get_backend_name()
+# None = sin detectar todavía (ver _indices)
+_fts_ready: Optional[bool] = None
+_trgm_ready: Optional[bool] = None
+
+
+def _fts_name(tabla: str) -> str:
+    return f"{tabla}_fts"
+
+
+def _asegurar_columnas(conn, tabla: str, col: str) -> None:
+    # create_all no añade columnas a tablas existentes
+    existentes = {c["name"] for c in inspect(conn).get_columns(tabla)}
+    if col not in existentes:
+        conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {col} VARCHAR"))
+
+
+def _rellenar_existentes(conn, tabla: str, col: str, fuentes) -> None:
+    cols = ", ".join(("id",) + tuple(fuentes))
+    filas = conn.execute(text(f"SELECT {cols} FROM {tabla} WHERE {col} IS NULL")).all()
+    if not filas:
+        return
+    conn.execute(
+        text(f"UPDATE {tabla} SET {col} = :v WHERE id = :id"),
+        [{"id": fila[0], "v": normalizar(" ".join(str(x or "") for x in fila[1:]))} for fila in filas],
+    )
+    logger.info("Búsqueda: %s filas normalizadas en %s", len(filas), tabla)
+
+
+def _setup_postgres(conn) -> None:
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for tabla, (_, col, _) in SEARCH_COLUMNS.items():
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{tabla}_{col}_trgm "
+            f"ON {tabla} USING gin ({col} gin_trgm_ops)"
+        ))
+
+
+def _setup_sqlite(conn) -> bool:
+    try:
+        for tabla, (_, col, _) in SEARCH_COLUMNS.items():
+            fts = _fts_name(tabla)
+            existe = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": fts}
+            ).first()
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{col}, content='{tabla}', content_rowid='id', tokenize='trigram')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+                f"INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col}); END"
+            ))
+            # solo reindexa si cambia la columna de búsqueda (no en cada
+            # cambio de estado/stock); DROP para reemplazar el trigger previo
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_au"))
+            conn.execute(text(
+                f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {col} ON {tabla} "
+                f"WHEN old.{col} IS NOT new.{col} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col}); "
+                f"INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col}); END"
+            ))
+            if not existe:
+                # índice nuevo: indexar las filas que ya había
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        return True
+    except Exception:
+        # SQLite < 3.34 no trae el tokenizer trigram: se usa LIKE
+        logger.warning("FTS5 trigram no disponible; búsqueda con LIKE", exc_info=True)
+        return False
+
+
+def setup_search(engine=_engine) -> None:
+    """Crea columnas, rellena filas existentes y construye los índices."""
+    global _fts_ready, _trgm_ready
+
+    with engine.begin() as conn:
+        for tabla, (_, col, fuentes) in SEARCH_COLUMNS.items():
+            _asegurar_columnas(conn, tabla, col)
+            _rellenar_existentes(conn, tabla, col, fuentes)
+
+    if _backend == "postgresql":
+        with engine.begin() as conn:
+            _setup_postgres(conn)
+        _fts_ready, _trgm_ready = False, True
+    elif _backend == "sqlite":
+        with engine.begin() as conn:
+            _fts_ready, _trgm_ready = _setup_sqlite(conn), False
+
+
+def _indices():
+    """
+    (fts_ready, trgm_ready). Si setup_search no corrió en este proceso, la
+    primera búsqueda consulta una vez si los índices existen. Si la BD no
+    responde no se cachea y esta búsqueda usa LIKE.
+    """
+    global _fts_ready, _trgm_ready
+    if _fts_ready is None or _trgm_ready is None:
+        try:
+            with _engine.connect() as conn:
+                if _backend == "sqlite":
+                    fila = conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"),
+                        {"n": _fts_name("productos")},
+                    ).first()
+                    _fts_ready, _trgm_ready = fila is not None, False
+                elif _backend == "postgresql":
+                    fila = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+                    _fts_ready, _trgm_ready = False, fila is not None
+                else:
+                    _fts_ready, _trgm_ready = False, False
+        except Exception:
+            logger.warning("No se pudo detectar los índices de búsqueda", exc_info=True)
+            return False, False
+    return _fts_ready, _trgm_ready
+
+
+# =====================================================
+# 🔍 Aplicar búsqueda a un select()
+# =====================================================
+def apply_search(stmt, tabla: str, termino: str, rank: bool = True):
+    """
+    Añade a `stmt` (select sobre el modelo de `tabla`) el filtro de
+    búsqueda y, si `rank`, el orden por relevancia.
+    """
+    model, col, _ = SEARCH_COLUMNS[tabla]
+    columna = getattr(model, col)
+    t = normalizar(termino)
+    if not t:
+        return stmt
+
+    fts_ready, trgm_ready = _indices()
+
+    if _backend == "sqlite" and fts_ready and len(t) >= 3:
+        fts = _fts_name(tabla)
+        fts_t = table(fts, column("rowid"), column("rank"))
+        frase = '"' + t.replace('"', '""') + '"'
+        stmt = stmt.join(fts_t, fts_t.c.rowid == model.id).where(
+            literal_column(fts).op("MATCH")(frase)
+        )
+        return stmt.order_by(fts_t.c.rank) if rank else stmt
+
+    # Postgres: el índice GIN trigram sirve este LIKE
+    stmt = stmt.where(columna.contains(t, autoescape=True))
+    if rank and trgm_ready:
+        stmt = stmt.order_by(func.similarity(columna, t).desc())
+    return stmt
@@ -0,0 +1,336 @@
+# services/storage.py
+"""
+Almacenamiento de archivos (QR, fotos, tickets PDF) compartido entre nodos.
+
+Las claves son rutas relativas a fastapi_app/, las mismas que ya se usaban
+en disco: "static/qrs/equipos/15.png", "static/uploads/equipos/<sha256>.jpg",
+"tickets/ticket_venta_....pdf". Así las URLs /static/... no cambian.
+
+Backends (STORAGE_BACKEND):
+  local  (default) archivos bajo fastapi_app/ (sirve también un volumen
+         compartido montado en varias réplicas)
+  s3     bucket S3 o compatible (MinIO, R2...). Variables:
+         STORAGE_S3_BUCKET, STORAGE_S3_ENDPOINT (vacío = AWS),
+         STORAGE_S3_REGION, STORAGE_S3_PREFIX; credenciales AWS_* estándar.
+
+Direccionamiento por contenido: las fotos ya se nombran por su sha256
+(`content_key`) y cada objeto guarda su sha256; un `put` con el mismo
+contenido que lo ya almacenado no vuelve a escribir ni a subir nada.
+
+Con S3 el disco local queda como caché: los archivos se escriben primero
+ahí y luego se publican; /static sirve lo local y, si falta, lo pide al
+bucket (ver StorageStaticFiles).
+
+Para probar contra un S3 falso local:
+    python -m benchmarks.fake_s3 9000
+    STORAGE_BACKEND=s3 STORAGE_S3_ENDPOINT=http://127.0.0.1:9000 STORAGE_S3_BUCKET=technicell ...
+"""
+import os
+import shutil
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local").lower()
+STORAGE_S3_BUCKET = os.environ.get("STORAGE_S3_BUCKET", "")
+STORAGE_S3_ENDPOINT = os.environ.get("STORAGE_S3_ENDPOINT", "") or None
+STORAGE_S3_REGION = os.environ.get("STORAGE_S3_REGION", "us-east-1")
+STORAGE_S3_PREFIX = os.environ.get("STORAGE_S3_PREFIX", "").strip("/")
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_key(prefix: str, sha256: str, ext: str) -> str:
+    """Clave direccionada por contenido: {prefix}/{sha256}{ext}."""
+    return f"{prefix.strip('/')}/{sha256}{ext}"
+
+
+def guess_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+# =====================================================
+# 💾 Disco local
+# =====================================================
+class LocalBlobStore:
+    is_local = True
+
+    def __init__(self, root: Path = BASE_DIR):
+        self.root = root.resolve()
+        self._lock = threading.Lock()
+
+    def local_path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Clave fuera del almacenamiento: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).is_file()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.local_path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        with open(self.local_path(key), "rb") as fh:
+            yield from iter(lambda: fh.read(CHUNK_SIZE), b"")
+
+    def _mismo_contenido(self, path: Path, size: int, sha256: str) -> bool:
+        try:
+            return path.stat().st_size == size and sha256_file(path) == sha256
+        except OSError:
+            return False
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> bool:
+        """Escritura atómica; False si ya estaba el mismo contenido."""
+        path = self.local_path(key)
+        if self._mismo_contenido(path, len(data), sha256_bytes(data)):
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_bytes(data)
+            tmp.replace(path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            raise
+        return True
+
+    def put_file(self, key: str, src: Path, content_type: Optional[str] = None) -> bool:
+        path = self.local_path(key)
+        src = Path(src).resolve()
+        if src == path:
+            return False  # ya está en su lugar
+        if self._mismo_contenido(path, src.stat().st_size, sha256_file(src)):
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        shutil.copyfile(src, tmp)
+        tmp.replace(path)
+        return True
+
+    def delete(self, key: str) -> None:
+        self.local_path(key).unlink(missing_ok=True)
+
+
+# =====================================================
+# ☁️ S3 / compatible
+# =====================================================
+class S3BlobStore:
+    is_local = False
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str], region: str, prefix: str = ""):
+        import boto3
+        from botocore.config import Config
+
+        if not bucket:
+            raise RuntimeError("STORAGE_S3_BUCKET no está configurado")
+        self.bucket = bucket
+        self.prefix = prefix
+        # el cliente de boto3 es seguro entre hilos
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(
+                retries={"max_attempts": 3, "mode": "standard"},
+                max_pool_connections=20,
+                s3={"addressing_style": "path"} if endpoint_url else None,
+            ),
+        )
+        self._errores = self.client.exceptions
+
+    def _k(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return None
+
+    def _head(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._k(key))
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def _mismo_contenido(self, key: str, sha256: str) -> bool:
+        head = self._head(key)
+        return head is not None and head.get("Metadata", {}).get("sha256") == sha256
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self._k(key))
+        except self._errores.NoSuchKey:
+            return None
+        return obj["Body"].read()
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        obj = self.client.get_object(Bucket=self.bucket, Key=self._k(key))
+        yield from obj["Body"].iter_chunks(CHUNK_SIZE)
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> bool:
+        sha256 = sha256_bytes(data)
+        if self._mismo_contenido(key, sha256):
+            return False
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._k(key),
+            Body=data,
+            ContentType=content_type or guess_type(key),
+            Metadata={"sha256": sha256},
+        )
+        return True
+
+    def put_file(self, key: str, src: Path, content_type: Optional[str] = None) -> bool:
+        sha256 = sha256_file(src)
+        if self._mismo_contenido(key, sha256):
+            return False
+        # upload_file hace multipart en archivos grandes sin cargarlos en memoria
+        self.client.upload_file(
+            str(src),
+            self.bucket,
+            self._k(key),
+            ExtraArgs={"ContentType": content_type or guess_type(key), "Metadata": {"sha256": sha256}},
+        )
+        return True
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._k(key))
+
+
+# =====================================================
+# 🔧 Instancia del proceso
+# =====================================================
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if STORAGE_BACKEND == "s3":
+                    _store = S3BlobStore(STORAGE_S3_BUCKET, STORAGE_S3_ENDPOINT, STORAGE_S3_REGION, STORAGE_S3_PREFIX)
+                else:
+                    _store = LocalBlobStore()
+    return _store
+
+
+def is_local() -> bool:
+    return STORAGE_BACKEND != "s3"
+
+
+def key_for(path: Path) -> str:
+    """Clave de un archivo local bajo fastapi_app/ (o relativo al cwd)."""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return path.relative_to(Path.cwd().resolve()).as_posix()
+
+
+def _avisar_event_loop(operacion: str) -> None:
+    # con S3 es una petición de red: bloquearía todas las demás peticiones
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    logger.warning("storage.%s bloqueante en el event loop: usar run_in_threadpool", operacion, stack_info=True)
+
+
+def publish_file(path: Path, content_type: Optional[str] = None) -> str:
+    """
+    Publica un archivo ya escrito en disco local bajo su clave. Con el backend
+    local no hace nada (ya está en su lugar). Devuelve la clave.
+    Con S3 sube el archivo: desde código async, llamarla en el threadpool.
+    """
+    if is_local():
+        try:
+            return key_for(path)
+        except ValueError:
+            # fuera de fastapi_app/ (p. ej. benchmarks en un directorio temporal)
+            return Path(path).as_posix()
+    _avisar_event_loop("publish_file")
+    key = key_for(path)
+    get_store().put_file(key, path, content_type)
+    return key
+
+
+def read_bytes(key: str) -> Optional[bytes]:
+    """Disco local primero (caché), luego el almacenamiento (mismo aviso que publish_file)."""
+    local = BASE_DIR / key
+    if local.is_file():
+        return local.read_bytes()
+    if not is_local():
+        _avisar_event_loop("read_bytes")
+    return get_store().get(key)
+
+
+# =====================================================
+# 🌐 Respuestas HTTP
+# =====================================================
+def blob_response(key: str, media_type: Optional[str] = None, filename: Optional[str] = None):
+    """FileResponse si está en disco; si no, streaming desde el almacenamiento. None si no existe."""
+    from fastapi.responses import FileResponse, StreamingResponse
+
+    local = BASE_DIR / key
+    media_type = media_type or guess_type(key)
+    if local.is_file():
+        return FileResponse(str(local), media_type=media_type, filename=filename)
+    store = get_store()
+    if is_local() or not store.exists(key):
+        return None
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else None
+    return StreamingResponse(store.iter_chunks(key), media_type=media_type, headers=headers)
+
+
+def static_files(directory: str = "static"):
+    """StaticFiles para /static que, con S3, busca en el bucket lo que no está en disco."""
+    from fastapi.staticfiles import StaticFiles
+    from starlette.concurrency import run_in_threadpool
+    from starlette.exceptions import HTTPException
+    from starlette.responses import StreamingResponse
+
+    class StorageStaticFiles(StaticFiles):
+        async def get_response(self, path, scope):
+            try:
+                return await super().get_response(path, scope)
+            except HTTPException as exc:
+                if exc.status_code != 404 or is_local():
+                    raise
+            key = f"{directory}/{path}".replace(os.sep, "/")
+            store = get_store()
+            if not await run_in_threadpool(store.exists, key):
+                raise HTTPException(status_code=404)
+            return StreamingResponse(store.iter_chunks(key), media_type=guess_type(key))
+
+    return StorageStaticFiles(directory=directory)
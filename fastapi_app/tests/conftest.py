@@ -0,0 +1,32 @@
+# tests/conftest.py
+"""
+Entorno de los tests: SQLite temporal y broker de eventos local. Se fija
+antes de importar database (lee DATABASE_URL al importarse). El esquema
+se crea una vez por sesión.
+
+Uso (desde fastapi_app/):
+    python -m pytest -q tests
+"""
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/tests.db")
+os.environ.setdefault("EQUIPO_EVENTOS_BROKER", "local")
+os.environ.setdefault("TIME_SYNC_URL", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def esquema():
+    import migrate
+    from database import Base, engine
+
+    migrate._registrar_modelos()
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
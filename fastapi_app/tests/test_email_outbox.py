@@ -0,0 +1,160 @@
+# tests/test_email_outbox.py
+"""
+Outbox de correos contra el Resend falso (benchmarks/fake_resend.py):
+reclamo y envío, backoff ante 5xx, error permanente (4xx) y resultado
+que no se pudo guardar tras un envío exitoso.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from benchmarks import fake_resend
+from database import SessionLocal
+from models.email_outbox import EmailOutbox
+from services import email_equipo, email_outbox
+from utils import clock
+
+
+@pytest.fixture(scope="module")
+def resend():
+    server = fake_resend.serve(0)
+    yield f"http://127.0.0.1:{server.server_address[1]}/emails"
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def entorno(resend, monkeypatch):
+    monkeypatch.setattr(email_equipo, "RESEND_API_KEY", "test")
+    monkeypatch.setattr(email_equipo, "RESEND_API_URL", resend)
+    monkeypatch.setattr(email_outbox, "EMAIL_BACKOFF_BASE", 60.0)
+    fake_resend.reset()
+    with SessionLocal() as db:
+        db.execute(delete(EmailOutbox))
+        db.commit()
+    yield
+    email_outbox._sin_guardar.clear()
+
+
+def _encolar() -> int:
+    with SessionLocal() as db:
+        return email_outbox.encolar_email(db, "cliente@example.com", "Asunto", "<p>hola</p>", "hola").id
+
+
+def _leer(email_id: int) -> EmailOutbox:
+    with SessionLocal() as db:
+        return db.get(EmailOutbox, email_id)
+
+
+def _vencer(email_id: int, **valores) -> None:
+    with SessionLocal() as db:
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == email_id).values(**valores))
+        db.commit()
+
+
+def test_reclama_y_envia_una_vez():
+    email_id = _encolar()
+
+    assert email_outbox.procesar_pendientes() == 1
+    msg = _leer(email_id)
+    assert (msg.status, msg.attempts, msg.locked_at) == ("enviado", 1, None)
+    assert msg.sent_at is not None
+    assert [c["to"] for c in fake_resend.recibidos()] == ["cliente@example.com"]
+
+    # ya enviado: no se vuelve a reclamar
+    assert email_outbox.procesar_pendientes() == 0
+    assert len(fake_resend.recibidos()) == 1
+
+
+def test_error_temporal_reintenta_con_backoff():
+    email_id = _encolar()
+    fake_resend.responder(503)
+
+    antes = clock.now()
+    assert email_outbox.procesar_pendientes() == 1
+    msg = _leer(email_id)
+    assert (msg.status, msg.attempts) == ("pendiente", 1)
+    assert "503" in msg.last_error
+    espera = msg.next_attempt_at.replace(tzinfo=None) - antes.replace(tzinfo=None)
+    assert timedelta(seconds=60 * 0.8 - 1) <= espera <= timedelta(seconds=60 * 1.2 + 1)
+
+    # aún no vence el backoff
+    assert email_outbox.procesar_pendientes() == 0
+
+    _vencer(email_id, next_attempt_at=antes - timedelta(seconds=1))
+    assert email_outbox.procesar_pendientes() == 1
+    msg = _leer(email_id)
+    assert (msg.status, msg.attempts, msg.last_error) == ("enviado", 2, None)
+    assert len(fake_resend.recibidos()) == 1
+
+
+def test_error_permanente_no_reintenta():
+    email_id = _encolar()
+    fake_resend.responder(422)
+
+    assert email_outbox.procesar_pendientes() == 1
+    msg = _leer(email_id)
+    assert (msg.status, msg.attempts) == ("fallido", 1)
+    assert "422" in msg.last_error
+
+    _vencer(email_id, next_attempt_at=clock.now() - timedelta(days=1))
+    assert email_outbox.procesar_pendientes() == 0
+    assert fake_resend.recibidos() == []
+
+
+def test_agota_intentos(monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_MAX_ATTEMPTS", 1)
+    email_id = _encolar()
+    fake_resend.responder(503)
+
+    assert email_outbox.procesar_pendientes() == 1
+    assert _leer(email_id).status == "fallido"
+
+
+def test_estado_no_guardado_no_reenvia(monkeypatch):
+    email_id = _encolar()
+    escribir = email_outbox._escribir_estado
+    fallos = []
+
+    def falla_una_vez(*args):
+        if not fallos:
+            fallos.append(args)
+            raise RuntimeError("BD caída")
+        escribir(*args)
+
+    monkeypatch.setattr(email_outbox, "_escribir_estado", falla_una_vez)
+
+    assert email_outbox.procesar_pendientes() == 1
+    assert len(fake_resend.recibidos()) == 1
+    assert _leer(email_id).status == "enviando"
+
+    # vence el lock: el mismo proceso lo reclama, guarda el estado y no reenvía
+    _vencer(email_id, locked_at=clock.now() - timedelta(seconds=email_outbox.EMAIL_LOCK_TIMEOUT + 1))
+    monkeypatch.setattr(email_outbox, "_reintentar_estados", lambda: None)
+    assert email_outbox.procesar_pendientes() == 1
+    msg = _leer(email_id)
+    assert msg.status == "enviado"
+    assert len(fake_resend.recibidos()) == 1
+    assert email_outbox._sin_guardar == {}
+
+
+def test_estado_no_guardado_se_reintenta_en_la_siguiente_pasada(monkeypatch):
+    email_id = _encolar()
+    escribir = email_outbox._escribir_estado
+    fallos = []
+
+    def falla_una_vez(*args):
+        if not fallos:
+            fallos.append(args)
+            raise RuntimeError("BD caída")
+        escribir(*args)
+
+    monkeypatch.setattr(email_outbox, "_escribir_estado", falla_una_vez)
+
+    assert email_outbox.procesar_pendientes() == 1
+    assert _leer(email_id).status == "enviando"
+
+    # siguiente pasada sin nada que reclamar: solo guarda el resultado
+    assert email_outbox.procesar_pendientes() == 0
+    assert _leer(email_id).status == "enviado"
+    assert len(fake_resend.recibidos()) == 1
@@ -0,0 +1,100 @@
+# tests/test_equipo_eventos.py
+"""
+Push de equipos con BrokerLocal: suscripción, snapshot, evento en vivo y
+reanudación con cursor (routers/equipos_eventos._mensajes).
+"""
+import asyncio
+
+from database import SessionLocal
+from models.client import Cliente
+from models.equipo import Equipo
+from routers.equipos_eventos import _mensajes
+from services import equipo_eventos
+
+
+def _crear_equipo() -> int:
+    with SessionLocal() as db:
+        cliente = Cliente(nombre_completo="Ana Pérez", telefono="5550001")
+        db.add(cliente)
+        db.flush()
+        equipo = Equipo(
+            cliente_id=cliente.id, cliente_nombre=cliente.nombre_completo,
+            cliente_numero=cliente.telefono, modelo="A52", fallo="Pantalla",
+            tipo_clave="PIN", estado="recibido",
+        )
+        db.add(equipo)
+        db.commit()
+        return equipo.id
+
+
+def _cambiar_estado(equipo_id: int, estado: str) -> None:
+    with SessionLocal() as db:
+        db.get(Equipo, equipo_id).estado = estado
+        db.commit()
+
+
+async def _siguiente(mensajes):
+    # los heartbeats (None) no interesan aquí
+    while True:
+        m = await asyncio.wait_for(mensajes.__anext__(), timeout=5)
+        if m is not None:
+            return m
+
+
+def test_broker_local_snapshot_evento_y_reanudar():
+    assert isinstance(equipo_eventos.broker(), equipo_eventos.BrokerLocal)
+    equipo_id = _crear_equipo()
+
+    async def escenario():
+        # ---- suscripción sin cursor: snapshot ----
+        mensajes = _mensajes([], None)
+        tipo, cursor, snapshot = await _siguiente(mensajes)
+        assert tipo == "snapshot"
+        assert [e["id"] for e in snapshot["items"]] == [equipo_id]
+        assert equipo_eventos.hub.suscripciones == 1
+
+        # ---- cambio confirmado: llega en vivo ----
+        _cambiar_estado(equipo_id, "en_reparacion")
+        tipo, id_evento, evento = await _siguiente(mensajes)
+        assert tipo == "equipo"
+        assert id_evento > cursor
+        assert (evento["cambio"], evento["estado"], evento["estado_anterior"]) == (
+            "estado", "en_reparacion", "recibido",
+        )
+        await mensajes.aclose()
+        assert equipo_eventos.hub.suscripciones == 0
+
+        # ---- desconectado: el cambio queda en la tabla ----
+        _cambiar_estado(equipo_id, "listo")
+
+        # ---- reanudar con el último id recibido ----
+        mensajes = _mensajes([], id_evento)
+        replay = []
+        while not replay or replay[-1][1] <= id_evento:
+            replay.append(await _siguiente(mensajes))
+        await mensajes.aclose()
+
+        assert {tipo for tipo, _, _ in replay} == {"equipo"}
+        ids = [i for _, i, _ in replay]
+        assert ids == sorted(ids)
+        # el margen reenvía lo ya recibido: el cliente lo descarta por id
+        assert id_evento in ids
+        nuevo = replay[-1][2]
+        assert (nuevo["equipo_id"], nuevo["estado"]) == (equipo_id, "listo")
+
+        # ---- cursor que no es de esta BD: snapshot nuevo ----
+        mensajes = _mensajes([], ids[-1] + 1000)
+        tipo, _, snapshot = await _siguiente(mensajes)
+        await mensajes.aclose()
+        assert tipo == "snapshot"
+        assert snapshot["items"][0]["estado"] == "listo"
+
+    asyncio.run(escenario())
+
+
+def test_rutas_publicadas():
+    # main.py suma su prefix="/equipos" al del router (como en equipos_router)
+    import main
+
+    rutas = {r.path for r in main.app.routes}
+    assert {"/equipos/equipos/eventos", "/equipos/equipos/ws"} <= rutas
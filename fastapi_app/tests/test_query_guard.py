@@ -0,0 +1,49 @@
+# tests/test_query_guard.py
+"""
+Detector de N+1 sobre los eventos de services/metrics.py: una sola
+medición por sentencia y, en modo estricto, el fallo al cerrar el bloque.
+"""
+import pytest
+from sqlalchemy import text
+
+from database import engine
+from services import metrics, query_guard
+
+
+def _selects(conn, n: int) -> None:
+    for i in range(n):
+        conn.execute(text("SELECT :i"), {"i": i})
+
+
+def test_n_mas_uno_falla_al_cerrar_el_bloque():
+    with engine.connect() as conn:
+        with pytest.raises(query_guard.QueryBudgetExceeded, match="N\\+1"):
+            with query_guard.track("n+1", strict=True) as rec:
+                _selects(conn, query_guard.N_PLUS_ONE_THRESHOLD)
+                # las sentencias siguientes no fallan: se lanza al salir
+                _selects(conn, 1)
+        assert rec.statements == query_guard.N_PLUS_ONE_THRESHOLD + 1
+        # sin tiempos de inicio colgados en la conexión
+        assert not conn.info.get("_metrics_t0")
+
+
+def test_presupuesto_y_una_sola_medicion():
+    with engine.connect() as conn:
+        with pytest.raises(query_guard.QueryBudgetExceeded, match="más de 2"):
+            with query_guard.track("presupuesto", budget=2, strict=True) as rec:
+                _selects(conn, 3)
+                ctx = metrics.current_request()
+        # el recorder es el del RequestContext de metrics: mismas sentencias y tiempo
+        assert ctx.guard is rec
+        assert rec.statements == ctx.statements == 3
+        assert rec.db_seconds == ctx.db_seconds
+
+
+def test_pausar_no_cuenta():
+    with engine.connect() as conn:
+        with query_guard.track("export", budget=1, strict=True) as rec:
+            with query_guard.pausar():
+                _selects(conn, query_guard.N_PLUS_ONE_THRESHOLD + 2)
+            conn.execute(text("SELECT 1"))
+    assert rec.statements == 1
+    assert rec.repeated == {}
@@ -0,0 +1,104 @@
+# utils/clock.py
+"""
+Reloj compartido para timestamps de los modelos.
+
+Antes cada modelo consultaba worldtimeapi.org en cada INSERT (hasta 5 s de
+bloqueo por fila). Ahora el desfase contra la hora de internet se mide una
+sola vez, se refresca en un hilo de fondo y `now()` solo suma ese desfase
+cacheado a la hora local: nunca toca la red.
+
+Variables de entorno:
+  TIME_SYNC_URL       URL de worldtimeapi (vacía = no sincronizar)
+  TIME_SYNC_INTERVAL  segundos entre refrescos (default 3600)
+  TIME_SYNC_TIMEOUT   timeout de la petición (default 5)
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Configuración (leer desde ENV)
+# -----------------------------
+TIME_SYNC_URL = os.environ.get(
+    "TIME_SYNC_URL", "http://worldtimeapi.org/api/timezone/Etc/UTC"
+).strip()
+TIME_SYNC_INTERVAL = float(os.environ.get("TIME_SYNC_INTERVAL", "3600"))
+TIME_SYNC_TIMEOUT = float(os.environ.get("TIME_SYNC_TIMEOUT", "5"))
+
+_offset = timedelta(0)
+_last_sync: Optional[float] = None
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def _medir_offset() -> Optional[timedelta]:
+    """
+    Consulta la hora de internet y devuelve (hora_remota - hora_local),
+    compensando la mitad del round trip. None si falla.
+    """
+    try:
+        t0 = time.time()
+        resp = requests.get(TIME_SYNC_URL, timeout=TIME_SYNC_TIMEOUT)
+        t1 = time.time()
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+        remota = datetime.fromisoformat(data["utc_datetime"].replace("Z", "+00:00"))
+        local = datetime.fromtimestamp((t0 + t1) / 2, tz=timezone.utc)
+        return remota - local
+    except Exception:
+        logger.debug("No se pudo sincronizar la hora con %s", TIME_SYNC_URL, exc_info=True)
+        return None
+
+
+def sync() -> bool:
+    """Mide el desfase ahora mismo (bloqueante). Devuelve True si se actualizó."""
+    global _offset, _last_sync
+    if not TIME_SYNC_URL:
+        return False
+    offset = _medir_offset()
+    if offset is None:
+        return False
+    with _lock:
+        _offset = offset
+        _last_sync = time.monotonic()
+    logger.info("Reloj sincronizado (offset=%.3fs)", offset.total_seconds())
+    return True
+
+
+def _loop() -> None:
+    while True:
+        sync()
+        time.sleep(TIME_SYNC_INTERVAL)
+
+
+def start() -> None:
+    """Arranca (una sola vez) el hilo de fondo que refresca el desfase."""
+    global _thread
+    if _thread is not None or not TIME_SYNC_URL:
+        return
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_loop, name="clock-sync", daemon=True)
+        _thread.start()
+
+
+def offset() -> timedelta:
+    return _offset
+
+
+def now() -> datetime:
+    """
+    Hora UTC (timezone-aware) = hora local + desfase cacheado.
+    Pensada como `default` de columnas: no hace I/O.
+    """
+    start()
+    return datetime.now(timezone.utc) + _offset
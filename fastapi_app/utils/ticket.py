@@ -8,12 +8,22 @@ import logging
 import os
 import re
 from utils.ticket_counter import obtener_siguiente_numero_ticket
+from utils import ticket_render
+from services import storage, metrics
 
 logger = logging.getLogger(__name__)
 
 # A5 (horizontal/vertical) para tickets pequeños
 A5 = (148 * mm, 210 * mm)
 
+# Pie fijo del ticket de reparación (ya partido en líneas)
+_AVISO_LINES = (
+    "El artículo se entregará junto con el ticket físico o electrónico.",
+    "Sin embargo, el ticket electrónico NO tiene garantía. Conserva tu ticket.",
+    "El tiempo de reparación será tomado en consideración al momento de resolver la incidencia.",
+)
+_AVISO_WRAPPED = tuple(sub for ln in _AVISO_LINES for sub in ticket_render.wrap_text(ln, 60))
+
 
 def _get_tickets_dir(path: Optional[str] = "tickets") -> Path:
     base_dir = Path(__file__).resolve().parent.parent
@@ -84,54 +94,9 @@ def _draw_header_simple(
     company: str,
     subtitle: str,
 ) -> float:
-    y = alto - margin
-    max_logo_h = 25 * mm
-    max_logo_w = ancho - 2 * margin
-    logo_present = logo_full.exists()
-    if logo_present:
-        try:
-            from PIL import Image
-
-            with Image.open(str(logo_full)) as im:
-                img_w_px, img_h_px = im.size
-                ratio = img_w_px / img_h_px if img_h_px != 0 else 1.0
-                logo_h = min(max_logo_h, max_logo_w / ratio)
-                logo_w = logo_h * ratio
-        except Exception:
-            logo_w = min(max_logo_w, 50 * mm)
-            logo_h = min(max_logo_h, 50 * mm)
-        logo_x = (ancho - logo_w) / 2
-        logo_y = y - logo_h
-        try:
-            c.drawImage(
-                str(logo_full),
-                x=logo_x,
-                y=logo_y,
-                width=logo_w,
-                height=logo_h,
-                preserveAspectRatio=True,
-                anchor="c",
-                mask="auto",
-            )
-        except Exception:
-            try:
-                c.drawImage(str(logo_full), x=logo_x, y=logo_y, width=logo_w, height=logo_h, mask="auto")
-            except Exception:
-                logger.exception("No se pudo dibujar logo en ticket_reparacion header")
-        y = logo_y - (3 * mm)
-    else:
-        y -= 6 * mm
-
-    c.setFont("Helvetica-Bold", 13)
-    c.drawCentredString(ancho / 2, y, company)
-    y -= 5 * mm
-    c.setFont("Helvetica", 9)
-    c.drawCentredString(ancho / 2, y, subtitle)
-    y -= 6 * mm
-    c.setLineWidth(0.5)
-    c.line(margin, y, ancho - margin, y)
-    y -= 6 * mm
-    return y
+    return ticket_render.draw_header(
+        c, ancho, alto, margin, logo_full, company, subtitle, ticket_render.HEADER_REPARACION
+    )
 
 
 # ----------------- NUEVAS FUNCIONES PARA ESC/POS -----------------
@@ -339,6 +304,7 @@ def imprimir_ticket_escpos_from_data(
 # ----------------- FIN NUEVAS FUNCIONES ESC/POS -----------------
 
 
+@metrics.PDF_RENDER.time(ticket="ingreso_reparacion")
 def generar_ticket_ingreso_reparacion(
     cliente_nombre: Optional[str] = None,
     contacto: Optional[str] = None,
@@ -556,15 +522,9 @@ def generar_ticket_ingreso_reparacion(
         c.drawCentredString(ancho / 2, y, "IMPORTANTE")
         y -= 5 * mm
         c.setFont("Helvetica", 8)
-        aviso_lines = [
-            "El artículo se entregará junto con el ticket físico o electrónico.",
-            "Sin embargo, el ticket electrónico NO tiene garantía. Conserva tu ticket.",
-            "El tiempo de reparación será tomado en consideración al momento de resolver la incidencia.",
-        ]
-        for ln in aviso_lines:
-            for sub in _wrap_text(ln, 60):
-                c.drawCentredString(ancho / 2, y, sub)
-                y -= 4.5 * mm
+        for sub in _AVISO_WRAPPED:
+            c.drawCentredString(ancho / 2, y, sub)
+            y -= 4.5 * mm
         y -= 4 * mm
         c.setFont("Helvetica", 9)
         c.drawString(left_x, y, "Recibido por (firma): ____________________________")
@@ -589,6 +549,10 @@ def generar_ticket_ingreso_reparacion(
     if not nombre_archivo.exists() or nombre_archivo.stat().st_size == 0:
         raise RuntimeError("No se pudo generar el ticket de ingreso (archivo vacío o inexistente)")
 
+    # disponible para las demás réplicas (no-op con almacenamiento local; con
+    # S3 bloquea: los routers async llaman a este generador en el threadpool)
+    storage.publish_file(nombre_archivo, "application/pdf")
+
     logger.debug("Ticket ingreso generado: %s", nombre_archivo)
 
     # Si se pidió impresión térmica, intentarlo (pero PDF ya generado)
@@ -622,17 +586,4 @@ def generar_ticket_ingreso_reparacion(
 
 
 def _wrap_text(text: str, max_chars: int):
-    if not text:
-        return [""]
-    words = text.split()
-    lines = []
-    cur = ""
-    for w in words:
-        if len(cur) + 1 + len(w) <= max_chars:
-            cur = f"{cur} {w}".strip()
-        else:
-            lines.append(cur)
-            cur = w
-    if cur:
-        lines.append(cur)
-    return lines
+    return list(ticket_render.wrap_text(text, max_chars))
@@ -1,31 +1,38 @@
 from pathlib import Path
-
-def obtener_siguiente_numero_ticket(tickets_dir: Path) -> int:
-    counter_file = tickets_dir / "ticket_counter.txt"
-
-    # Si no existe, inicializar en 1
-    if not counter_file.exists():
-        counter_file.write_text("1")
-        return 1
-
-    # Leer número actual
-    try:
-        numero_actual = int(counter_file.read_text().strip())
-    except:
-        numero_actual = 1
-
-    siguiente = numero_actual + 1
-
-    # Si pasa de 100, reiniciar y borrar todos los tickets previos
-    if siguiente > 100:
-        siguiente = 1
-
-        # borrar archivos .pdf
-        for archivo in tickets_dir.iterdir():
-            if archivo.is_file() and archivo.name.endswith(".pdf"):
-                archivo.unlink()
-
-    # guardar número actualizado
-    counter_file.write_text(str(siguiente))
-
-    return siguiente
+from typing import Optional
+
+from sqlalchemy import update, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import engine
+from models.ticket_counter import TicketCounter, ticket_numero_seq
+
+SERIE_TICKETS = "tickets"
+
+
+def obtener_siguiente_numero_ticket(tickets_dir: Optional[Path] = None) -> int:
+    """
+    Asigna el siguiente número de ticket desde la BD: O(1), atómico entre
+    workers/procesos/nodos y sin tocar el sistema de archivos.
+    - Postgres: nextval() de la secuencia ticket_numero_seq
+    - Otros (SQLite): UPDATE ... SET valor = valor + 1 RETURNING valor
+
+    `tickets_dir` se ignora (se mantiene por compatibilidad). La limpieza
+    de PDFs viejos vive en utils/ticket_retention.py.
+    """
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            return int(conn.execute(select(ticket_numero_seq.next_value())).scalar_one())
+
+        # SQLite: asegurar la fila y luego incremento atómico con RETURNING
+        conn.execute(
+            sqlite_insert(TicketCounter)
+            .values(nombre=SERIE_TICKETS, valor=0)
+            .on_conflict_do_nothing()
+        )
+        return int(conn.execute(
+            update(TicketCounter)
+            .where(TicketCounter.nombre == SERIE_TICKETS)
+            .values(valor=TicketCounter.valor + 1)
+            .returning(TicketCounter.valor)
+        ).scalar_one())
@@ -0,0 +1,195 @@
+# utils/ticket_render.py
+"""
+Piezas comunes y cacheadas para renderizar tickets PDF (ReportLab).
+
+- El logo se decodifica una sola vez por proceso (ImageReader en caché,
+  invalidado si cambia el mtime del archivo).
+- La geometría del encabezado se calcula una vez por tamaño de página/estilo.
+- Dentro de cada PDF el encabezado se dibuja como Form XObject: las páginas
+  siguientes solo lo referencian (doForm) en lugar de repetir el dibujo.
+- Las mediciones de texto (stringWidth) se cachean por (texto, fuente, tamaño).
+"""
+import hashlib
+import logging
+import threading
+import weakref
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+logger = logging.getLogger(__name__)
+
+# canvas -> nombres de los Form XObject ya grabados en ese PDF
+_forms_por_canvas: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_forms_lock = threading.Lock()
+
+
+class HeaderStyle(NamedTuple):
+    max_logo_h: float
+    logo_gap: float          # espacio bajo el logo
+    company_size: int
+    company_gap: float       # espacio bajo el nombre de la empresa
+
+
+# tickets.py (venta) y ticket.py (ingreso reparación)
+HEADER_VENTA = HeaderStyle(max_logo_h=30 * mm, logo_gap=4 * mm, company_size=14, company_gap=6 * mm)
+HEADER_REPARACION = HeaderStyle(max_logo_h=25 * mm, logo_gap=3 * mm, company_size=13, company_gap=5 * mm)
+
+
+class _Logo(NamedTuple):
+    reader: ImageReader
+    ratio: float
+
+
+# =====================================================
+# 🖼️ Logo decodificado una vez
+# =====================================================
+@lru_cache(maxsize=8)
+def _load_logo(path: str, mtime: float) -> Optional[_Logo]:
+    try:
+        reader = ImageReader(path)
+        w, h = reader.getSize()
+        return _Logo(reader, (w / h) if h else 1.0)
+    except Exception:
+        logger.exception("No se pudo cargar el logo %s", path)
+        return None
+
+
+def get_logo(path: Path) -> Optional[_Logo]:
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    return _load_logo(str(path), mtime)
+
+
+# =====================================================
+# 🔤 Mediciones de texto
+# =====================================================
+@lru_cache(maxsize=4096)
+def string_width(text: str, fontname: str, fontsize: float) -> float:
+    return stringWidth(text, fontname, fontsize)
+
+
+def fit_text(text: str, max_width: float, fontname: str, fontsize: float) -> str:
+    """
+    Devuelve una versión truncada con '...' si el texto supera max_width.
+    """
+    if not text:
+        return ""
+    if string_width(text, fontname, fontsize) <= max_width:
+        return text
+    ellipsis = "..."
+    ellipsis_w = string_width(ellipsis, fontname, fontsize)
+    # Binary-ish truncation
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high) // 2
+        candidate = text[:mid].rstrip()
+        if string_width(candidate, fontname, fontsize) + ellipsis_w <= max_width:
+            low = mid + 1
+        else:
+            high = mid
+    safe_text = text[:max(0, low - 1)].rstrip()
+    return safe_text + ellipsis
+
+
+# =====================================================
+# 🧾 Encabezado (logo + empresa + subtítulo + línea)
+# =====================================================
+class _HeaderLayout(NamedTuple):
+    logo_box: Optional[Tuple[float, float, float, float]]  # x, y, w, h
+    company_y: float
+    subtitle_y: float
+    line_y: float
+    content_y: float
+
+
+@lru_cache(maxsize=64)
+def _header_layout(ancho: float, alto: float, margin: float, logo_ratio: Optional[float], style: HeaderStyle) -> _HeaderLayout:
+    y = alto - margin
+    logo_box = None
+    if logo_ratio is not None:
+        max_logo_w = ancho - 2 * margin
+        logo_h = min(style.max_logo_h, max_logo_w / logo_ratio)
+        logo_w = logo_h * logo_ratio
+        logo_x = (ancho - logo_w) / 2
+        logo_y = y - logo_h
+        logo_box = (logo_x, logo_y, logo_w, logo_h)
+        y = logo_y - style.logo_gap
+    else:
+        # si no hay logo, dejar espacio pequeño
+        y -= 6 * mm
+
+    company_y = y
+    y -= style.company_gap
+    subtitle_y = y
+    y -= 6 * mm
+    line_y = y
+    y -= 6 * mm
+    return _HeaderLayout(logo_box, company_y, subtitle_y, line_y, y)
+
+
+def draw_header(
+    c,
+    ancho: float,
+    alto: float,
+    margin: float,
+    logo_full: Path,
+    company: str,
+    subtitle: str,
+    style: HeaderStyle,
+) -> float:
+    """
+    Dibuja el encabezado y devuelve la y donde empieza el contenido.
+    La primera vez en cada PDF se graba como Form XObject; después se reutiliza.
+    """
+    logo = get_logo(logo_full)
+    layout = _header_layout(ancho, alto, margin, logo.ratio if logo else None, style)
+
+    key = f"{ancho}|{alto}|{margin}|{logo_full}|{company}|{subtitle}|{style}"
+    name = "hdr" + hashlib.md5(key.encode()).hexdigest()[:12]
+    with _forms_lock:
+        forms = _forms_por_canvas.setdefault(c, set())
+
+    if name not in forms:
+        c.beginForm(name)
+        if logo and layout.logo_box:
+            x, y, w, h = layout.logo_box
+            try:
+                c.drawImage(logo.reader, x=x, y=y, width=w, height=h, preserveAspectRatio=True, anchor="c", mask="auto")
+            except Exception:
+                logger.exception("No se pudo dibujar el logo en el ticket (header)")
+        c.setFont("Helvetica-Bold", style.company_size)
+        c.drawCentredString(ancho / 2, layout.company_y, company)
+        c.setFont("Helvetica", 9)
+        c.drawCentredString(ancho / 2, layout.subtitle_y, subtitle)
+        c.setLineWidth(0.5)
+        c.line(margin, layout.line_y, ancho - margin, layout.line_y)
+        c.endForm()
+        forms.add(name)
+
+    c.doForm(name)
+    return layout.content_y
+
+
+@lru_cache(maxsize=256)
+def wrap_text(text: str, max_chars: int) -> Tuple[str, ...]:
+    if not text:
+        return ("",)
+    words = text.split()
+    lines = []
+    cur = ""
+    for w in words:
+        if len(cur) + 1 + len(w) <= max_chars:
+            cur = f"{cur} {w}".strip()
+        else:
+            lines.append(cur)
+            cur = w
+    if cur:
+        lines.append(cur)
+    return tuple(lines)
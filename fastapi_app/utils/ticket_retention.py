@@ -0,0 +1,84 @@
+# utils/ticket_retention.py
+"""
+Política de retención de tickets PDF, separada de la numeración.
+
+Se ejecuta en un hilo de fondo (nunca dentro de una petición) y borra los
+PDF más viejos que TICKET_RETENTION_DAYS y, si aún sobran, los más
+antiguos hasta dejar TICKET_RETENTION_MAX archivos.
+
+Con STORAGE_BACKEND=s3 solo limpia la copia local de esta réplica; en el
+bucket la retención se configura con una regla de ciclo de vida (prefijo
+tickets/).
+
+Variables de entorno:
+  TICKET_RETENTION_DAYS      días a conservar (default 30, 0 = sin límite)
+  TICKET_RETENTION_MAX       máximo de PDFs (default 1000, 0 = sin límite)
+  TICKET_RETENTION_INTERVAL  segundos entre pasadas (default 3600)
+"""
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TICKET_RETENTION_DAYS = float(os.environ.get("TICKET_RETENTION_DAYS", "30"))
+TICKET_RETENTION_MAX = int(os.environ.get("TICKET_RETENTION_MAX", "1000"))
+TICKET_RETENTION_INTERVAL = float(os.environ.get("TICKET_RETENTION_INTERVAL", "3600"))
+
+TICKETS_DIR = Path(__file__).resolve().parent.parent / "tickets"
+
+_thread: Optional[threading.Thread] = None
+
+
+def aplicar_retencion(
+    tickets_dir: Path = TICKETS_DIR,
+    max_age_days: float = TICKET_RETENTION_DAYS,
+    max_files: int = TICKET_RETENTION_MAX,
+) -> int:
+    """Una pasada de limpieza. Devuelve cuántos archivos borró."""
+    if not tickets_dir.exists():
+        return 0
+
+    pdfs = []
+    with os.scandir(tickets_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                pdfs.append((entry.stat().st_mtime, entry.path))
+    pdfs.sort()
+
+    borrar = []
+    if max_age_days > 0:
+        limite = time.time() - max_age_days * 86400
+        borrar = [p for mtime, p in pdfs if mtime < limite]
+        pdfs = pdfs[len(borrar):]
+    if max_files > 0 and len(pdfs) > max_files:
+        borrar.extend(p for _, p in pdfs[: len(pdfs) - max_files])
+
+    for path in borrar:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    if borrar:
+        logger.info("Retención de tickets: %s PDF eliminados", len(borrar))
+    return len(borrar)
+
+
+def _loop() -> None:
+    while True:
+        try:
+            aplicar_retencion()
+        except Exception:
+            logger.exception("Error aplicando retención de tickets")
+        time.sleep(TICKET_RETENTION_INTERVAL)
+
+
+def start() -> None:
+    global _thread
+    if _thread is not None:
+        return
+    _thread = threading.Thread(target=_loop, name="ticket-retention", daemon=True)
+    _thread.start()
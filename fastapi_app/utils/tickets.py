@@ -7,6 +7,8 @@ from pathlib import Path
 from typing import List, Any, Dict, Optional
 import os
 import logging
+from utils import ticket_render
+from services import storage, metrics
 
 logger = logging.getLogger(__name__)
 
@@ -71,89 +73,26 @@ def _get_tickets_dir(path: Optional[str] = "tickets") -> Path:
     return tickets_dir
 
 
-def _fit_text(canvas_obj, text: str, max_width: float, fontname: str, fontsize: float) -> str:
+def _fit_text(text: str, max_width: float, fontname: str, fontsize: float) -> str:
     """
     Devuelve una versión truncada con '...' si el texto supera max_width.
-    Usa canvas_obj.stringWidth para medir.
+    Las mediciones se cachean en utils.ticket_render.
     """
-    if not text:
-        return ""
-    width = canvas_obj.stringWidth(text, fontname, fontsize)
-    if width <= max_width:
-        return text
-    ellipsis = "..."
-    ellipsis_w = canvas_obj.stringWidth(ellipsis, fontname, fontsize)
-    # Binary-ish truncation
-    low, high = 0, len(text)
-    while low < high:
-        mid = (low + high) // 2
-        candidate = text[:mid].rstrip()
-        if canvas_obj.stringWidth(candidate, fontname, fontsize) + ellipsis_w <= max_width:
-            low = mid + 1
-        else:
-            high = mid
-    safe_text = text[:max(0, low - 1)].rstrip()
-    return safe_text + ellipsis
+    return ticket_render.fit_text(text, max_width, fontname, fontsize)
 
 
 def _draw_header(c: canvas.Canvas, ancho: float, alto: float, margin: float, logo_full: Path, company: str, subtitle: str):
     """
     Dibuja encabezado con logo centrado y textos centrados debajo.
     Devuelve la y de inicio del contenido (punto desde donde comienza a listar productos).
+    Logo decodificado una vez por proceso; encabezado reutilizado como Form XObject.
     """
-    y = alto - margin
-
-    # Logo: intentaremos un size relativo (máx 30 mm de alto)
-    max_logo_h = 30 * mm
-    max_logo_w = ancho - 2 * margin
-    logo_present = logo_full.exists()
-    if logo_present:
-        try:
-            # intentamos mantener aspect ratio; usamos reportlab to get image size via PIL if available
-            from PIL import Image
-            with Image.open(str(logo_full)) as im:
-                img_w_px, img_h_px = im.size
-                # ratio in points (pixels -> points is handled roughly by keeping aspect ratio)
-                # compute scale to fit max dimensions
-                ratio = img_w_px / img_h_px if img_h_px != 0 else 1.0
-                logo_h = min(max_logo_h, max_logo_w / ratio)
-                logo_w = logo_h * ratio
-        except Exception:
-            # fallback sizes if PIL no disponible
-            logo_w = min(max_logo_w, 50 * mm)
-            logo_h = min(max_logo_h, 50 * mm)
-        logo_x = (ancho - logo_w) / 2
-        logo_y = y - logo_h
-        try:
-            c.drawImage(str(logo_full), x=logo_x, y=logo_y, width=logo_w, height=logo_h, preserveAspectRatio=True, anchor="c", mask='auto')
-        except Exception:
-            # fallback: intentar dibujar sin preserveAspectRatio
-            try:
-                c.drawImage(str(logo_full), x=logo_x, y=logo_y, width=logo_w, height=logo_h, mask='auto')
-            except Exception:
-                logger.exception("No se pudo dibujar el logo en el ticket (header)")
-
-        y = logo_y - (4 * mm)  # espacio después del logo
-    else:
-        # si no hay logo, dejar espacio pequeño
-        y -= 6 * mm
-
-    # Empresa y subtítulo centrados
-    c.setFont("Helvetica-Bold", 14)
-    c.drawCentredString(ancho / 2, y, company)
-    y -= 6 * mm
-    c.setFont("Helvetica", 9)
-    c.drawCentredString(ancho / 2, y, subtitle)
-    y -= 6 * mm
-
-    # Línea separadora
-    c.setLineWidth(0.5)
-    c.line(margin, y, ancho - margin, y)
-    y -= 6 * mm
-
-    return y
+    return ticket_render.draw_header(
+        c, ancho, alto, margin, logo_full, company, subtitle, ticket_render.HEADER_VENTA
+    )
 
 
+@metrics.PDF_RENDER.time(ticket="venta")
 def generar_ticket_venta_multiple(
     detalles: List[Any],
     total: float,
@@ -169,7 +108,8 @@ def generar_ticket_venta_multiple(
     Lanza RuntimeError si algo sale mal o el archivo no existe / está vacío.
     """
     tickets_dir = _get_tickets_dir(path)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # con microsegundos: varias réplicas publican en el mismo almacenamiento
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     nombre_archivo = tickets_dir / f"ticket_venta_{timestamp}.pdf"
 
     # Normalizar si recibieron dict con "detalles"
@@ -223,7 +163,7 @@ def generar_ticket_venta_multiple(
 
             # Si no cabe, truncar nombre con _fit_text
             max_name_w = name_col_w
-            display_name = _fit_text(c, producto_nombre, max_name_w, font_main, 9)
+            display_name = _fit_text(producto_nombre, max_name_w, font_main, 9)
 
             # posición columnas
             name_x = left_x
@@ -294,5 +234,9 @@ def generar_ticket_venta_multiple(
         logger.exception("Verificación de archivo fallida")
         raise
 
+    # disponible para las demás réplicas (no-op con almacenamiento local; con
+    # S3 bloquea: los routers async llaman a este generador en el threadpool)
+    storage.publish_file(nombre_archivo, "application/pdf")
+
     logger.debug("Ticket generado correctamente: %s (bytes=%s)", nombre_archivo, nombre_archivo.stat().st_size)
     return str(nombre_archivo)
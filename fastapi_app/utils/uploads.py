@@ -0,0 +1,127 @@
+# utils/uploads.py
+"""
+Copia de archivos subidos (UploadFile) a disco sin bloquear el event loop.
+
+- Se lee en bloques de UPLOAD_CHUNK_SIZE: nunca hay una imagen completa
+  en memoria.
+- Cada bloque se escribe (y se suma al hash) en el threadpool; el loop solo
+  espera.
+- El límite de tamaño se comprueba mientras se copia: al pasarlo se corta,
+  se borra el temporal y se lanza UploadTooLarge.
+- El nombre final es el sha256 del contenido: la misma foto subida dos veces
+  ocupa un solo archivo (y con S3 se sube una sola vez).
+
+Starlette ya guarda el multipart en un SpooledTemporaryFile (máx. 1 MB en
+memoria por archivo); `check_content_length` rechaza antes de leer nada
+las peticiones que declaran un cuerpo mayor que el permitido.
+"""
+import os
+import uuid
+import hashlib
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from fastapi import Request, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from services import storage
+
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1 MB
+MAX_PHOTO_SIZE = int(os.environ.get("MAX_PHOTO_SIZE", str(15 * 1024 * 1024)))  # 15 MB
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Archivo demasiado grande (máx {max_bytes // (1024 * 1024)}MB)")
+        self.max_bytes = max_bytes
+
+
+class SavedUpload(NamedTuple):
+    path: Path
+    key: str  # clave en services.storage
+    name: str
+    size: int
+    sha256: str
+    created: bool  # False si ya existía un archivo con el mismo contenido
+
+
+def check_content_length(request: Request, max_bytes: int) -> None:
+    """Rechaza por cabecera antes de consumir el cuerpo (si viene Content-Length)."""
+    try:
+        declarado = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        return
+    if declarado > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+
+def _escribir_bloque(fh, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    fh.write(chunk)
+
+
+def _finalizar(tmp: Path, final: Path) -> bool:
+    if final.exists():
+        tmp.unlink(missing_ok=True)
+        return False
+    tmp.replace(final)
+    return True
+
+
+async def save_upload(
+    upload: UploadFile,
+    dest_dir: Path,
+    max_bytes: int = MAX_PHOTO_SIZE,
+    default_ext: str = ".jpg",
+) -> SavedUpload:
+    """Copia `upload` a dest_dir/{sha256}{ext} en bloques, con límite de tamaño."""
+    ext = (Path(upload.filename or "").suffix.lower() or default_ext)[:10]
+    tmp = dest_dir / f".{uuid.uuid4().hex}.part"
+    hasher = hashlib.sha256()
+    size = 0
+
+    fh = await run_in_threadpool(open, tmp, "wb")
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await run_in_threadpool(_escribir_bloque, fh, hasher, chunk)
+    except BaseException:
+        await run_in_threadpool(fh.close)
+        tmp.unlink(missing_ok=True)
+        raise
+    await run_in_threadpool(fh.close)
+
+    digest = hasher.hexdigest()
+    name = f"{digest}{ext}"
+    created = await run_in_threadpool(_finalizar, tmp, dest_dir / name)
+    # con almacenamiento remoto, publicar (no sube si ya existe el mismo contenido)
+    key = await run_in_threadpool(storage.publish_file, dest_dir / name, upload.content_type)
+    return SavedUpload(dest_dir / name, key, name, size, digest, created)
+
+
+async def read_upload_capped(upload: UploadFile, max_bytes: int) -> bytes:
+    """Lee a memoria (para archivos pequeños, p. ej. QR) cortando al pasar max_bytes."""
+    partes = []
+    size = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        partes.append(chunk)
+    return b"".join(partes)
+
+
+def discard(saved: Optional[SavedUpload]) -> None:
+    """Borra un archivo recién creado (no los que ya existían: pueden estar en uso)."""
+    if saved is not None and saved.created:
+        # en el almacenamiento remoto se deja: otra réplica puede haber
+        # subido el mismo contenido (misma clave) y estar usándolo
+        saved.path.unlink(missing_ok=True)